@@ -1,31 +1,331 @@
+from __future__ import annotations
+
+import asyncio
+import functools
 import os
-from pathlib import Path
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, TypeVar
 
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 from faicons import icon_svg
-from shiny import App, Inputs, Outputs, Session, reactive, render, ui
+from shiny import App, Inputs, Outputs, Session, reactive, render, req, ui
 from shinywidgets import output_widget, render_widget
+from starlette.applications import Starlette
+from starlette.routing import Mount
 
+from utils.cache import RenderCache
+from utils.connectors import (
+    CONNECTOR_MEASURES,
+    get_connector_histograms,
+    get_connector_table,
+    get_histogram_counts,
+)
+from utils.definitions import Definition
+from utils.etl import (
+    get_data_dir,
+    load_cleaned_data,
+    load_connector_table,
+    load_data_version,
+)
+from utils.export import get_export_filename, iter_export
+from utils.filters import (
+    Filters,
+    get_filter_input_id,
+    get_filters_key,
+)
 from utils.helper_text import (
     about_text,
     access_text,
+    connectors_text,
     disclaimer_text,
+    filter_text,
     github_text,
     info_modal,
     map_text,
+    near_me_text,
     top_ten_text,
+    trends_text,
+)
+from utils.indexes import get_indexes, load_indexes
+from utils.metrics import METRICS_ENABLED, get_metrics_route, instrument
+from utils.overview import (
+    StaticPage,
+    get_plotlyjs_page,
+    get_static_page,
+    get_static_page_route,
+    load_overview,
+    render_overview,
 )
-from utils.plotter import get_map, plot_accessibility, plot_top_ten
-from utils.processor import get_summary_data
+from utils.plotter import (
+    get_map,
+    get_viewport_map,
+    plot_accessibility,
+    plot_connector_histograms,
+    plot_trends,
+)
+from utils.processor import (
+    get_accessibility_counts,
+    get_county_data,
+    get_county_value_counts,
+    get_data_version,
+    get_summary_data,
+    load_summary_data,
+)
+from utils.profiling import STARTUP_TIMINGS, format_timings, timed
+from utils.reactivity import debounce, latest_task
+from utils.snapshots import load_trends
+from utils.spatial import (
+    NearbyChargers,
+    get_nearby_chargers,
+    get_nearest_k,
+    get_postcode_locations,
+    locate_postcode,
+)
+from utils.viewport import get_viewport_route
+
+# plotly is only imported once a session renders, see utils/plotter.py
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
 
 load_dotenv()
 
-DATA = pd.read_csv(
-    Path().resolve() / "data" / "ncr_data_cleaned.csv",
+# with several uvicorn workers, NCR_SHARED_DATA keeps the frame on the memory
+# mapped file so the workers share one copy through the page cache
+with timed("load data"):
+    DATA = load_cleaned_data(shared=bool(os.getenv("NCR_SHARED_DATA")))
+    DATA_VERSION = load_data_version() or get_data_version(df=DATA)
+
+# written by the etl, only recomputed when the sidecar is missing or stale
+with timed("load summary"):
+    SUMMARY_DATA = load_summary_data(
+        get_data_dir() / Definition.SUMMARY_JSON, data_version=DATA_VERSION
+    )
+    if SUMMARY_DATA is None:
+        SUMMARY_DATA = get_summary_data(df=DATA)
+
+# the overview figure is rendered by the etl, and only on its first request
+# when the sidecar is missing or stale
+with timed("load overview"):
+    OVERVIEW_HTML = load_overview(
+        get_data_dir() / Definition.OVERVIEW_JSON, data_version=DATA_VERSION
+    )
+
+# the county, search, filter, spatial and viewport indexes are written by the etl and
+# memory-mapped, so the workers share them as they share the data. they are
+# only built here when they are missing or stale
+with timed("load indexes"):
+    INDEXES = load_indexes(
+        get_data_dir() / Definition.INDEXES_DIR, df=DATA, data_version=DATA_VERSION
+    )
+    if INDEXES is None:
+        INDEXES = get_indexes(df=DATA)
+
+# shared by every session, so a county change only touches that county's rows
+COUNTY_INDEX = INDEXES.county_index
+
+# free text in the county box resolves to the closest county or town
+SEARCH_INDEX = INDEXES.search_index
+
+# accessibility pie chart counts of every county, computed once
+with timed("count accessibility"):
+    ACCESSIBILITY_COUNTS = get_accessibility_counts(df=DATA)
+
+# counts of every archived snapshot, written by the etl
+with timed("load trends"):
+    TRENDS = load_trends(get_data_dir() / Definition.TRENDS_JSON)
+
+# the connector table is written by the etl, its histograms are binned once
+with timed("bin connectors"):
+    CONNECTORS = load_connector_table(data_version=DATA_VERSION)
+    if CONNECTORS is None:
+        CONNECTORS = get_connector_table(df=DATA)
+    CONNECTOR_HISTOGRAMS = get_connector_histograms(CONNECTORS)
+
+# a bitmap per value of every filter attribute, filters are bitwise operations
+FILTER_INDEX = INDEXES.filter_index
+
+# the kd-tree itself is only built on the first nearby search
+SPATIAL_INDEX = INDEXES.spatial_index
+with timed("locate postcodes"):
+    POSTCODE_LOCATIONS = get_postcode_locations(df=DATA)
+
+# dense county maps ask for the chargers in view instead of embedding them
+VIEWPORT_INDEX = INDEXES.viewport_index
+
+# rendered county outputs are shared by every session of this process
+RENDER_CACHE = RenderCache(
+    max_bytes=int(os.getenv("RENDER_CACHE_BYTES", Definition.RENDER_CACHE_BYTES))
 )
 
-SUMMARY_DATA = get_summary_data(df=DATA)
+# county outputs are rendered here rather than on the event loop, so that a
+# large county does not hold up the other sessions of this process
+RENDER_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("RENDER_THREADS", Definition.RENDER_THREADS)),
+    thread_name_prefix="render",
+)
+
+# downloads are written in a pool of their own, so that a few large downloads
+# do not take the threads the county outputs are rendered on
+EXPORT_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("EXPORT_THREADS", Definition.EXPORT_THREADS)),
+    thread_name_prefix="export",
+)
+
+T = TypeVar("T")
+
+
+async def render_off_loop(
+    output: str, render: Callable[..., T], county: str, *args
+) -> T:
+    return await asyncio.get_running_loop().run_in_executor(
+        RENDER_POOL,
+        instrument(output, county=lambda: county, counties=COUNTY_INDEX)(render),
+        county,
+        *args,
+    )
+
+
+async def iterate_off_loop(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    # every chunk is written in the export pool, a download takes turns with
+    # the other downloads rather than holding up the event loop
+    loop = asyncio.get_running_loop()
+    while (
+        chunk := await loop.run_in_executor(EXPORT_POOL, next, chunks, None)
+    ) is not None:
+        yield chunk
+
+
+def get_filtered_positions(county: str, filters: Filters) -> np.ndarray:
+    # the rows of the county, narrowed down to the filters bit by bit, so only
+    # the rows of the county are touched
+    positions = COUNTY_INDEX.get(county, np.array([], dtype=np.intp))
+    if not filters:
+        return positions
+
+    return FILTER_INDEX.within(FILTER_INDEX.select(filters), positions)
+
+
+def get_filtered_data(county: str, filters: Filters) -> pd.DataFrame:
+    if not filters:
+        return get_county_data(DATA, COUNTY_INDEX, county)
+
+    return DATA.iloc[get_filtered_positions(county, filters)]
+
+
+def _get_county_map(county: str, filters: Filters) -> str:
+    county_data = get_filtered_data(county, filters)
+    if filters and county_data.empty:
+        return "<p>No chargepoints in the county match the filters.</p>"
+
+    if county_data.shape[0] > Definition.VIEWPORT_MAP_MIN_CHARGERS:
+        return get_viewport_map(
+            county_data, county=county, filters=filters
+        )._repr_html_()
+
+    return get_map(county_data)._repr_html_()
+
+
+def count_filtered_chargers(county: str, filters: Filters) -> int:
+    return get_filtered_positions(county, filters).shape[0]
+
+
+def _get_accessibility_counts(county: str, filters: Filters) -> dict[str, pd.DataFrame]:
+    if not filters:
+        return get_county_value_counts(ACCESSIBILITY_COUNTS, county)
+
+    # the accessibility columns are filter attributes, so their counts are
+    # popcounts of the filtered bitmap and the bitmap of every value
+    bitmap = FILTER_INDEX.select({"County": [county], **filters})
+
+    return {
+        column: FILTER_INDEX.value_counts(bitmap, column)
+        for column in Definition.TAB_NAMES["Accessibility"]
+    }
+
+
+def render_county_map(county: str, filters: Filters | None = None) -> str:
+    filters = filters or {}
+    return RENDER_CACHE.get_or_render(
+        ("map", county, get_filters_key(filters), DATA_VERSION),
+        lambda: _get_county_map(county, filters),
+    )
+
+
+def render_county_accessibility(county: str, filters: Filters | None = None) -> str:
+    filters = filters or {}
+    return RENDER_CACHE.get_or_render(
+        ("accessibility", county, get_filters_key(filters), DATA_VERSION),
+        lambda: plot_accessibility(
+            value_counts=_get_accessibility_counts(county, filters)
+        ).to_json(),
+    )
+
+
+def get_county_accessibility_figure(
+    county: str, filters: Filters | None = None
+) -> go.Figure:
+    import plotly.io as pio
+
+    return pio.from_json(render_county_accessibility(county, filters))
+
+
+def render_connector_histograms(county: str | None = None) -> str:
+    # national histograms when county is None
+    return RENDER_CACHE.get_or_render(
+        ("connectors", county, DATA_VERSION),
+        lambda: plot_connector_histograms(
+            {
+                measure: get_histogram_counts(CONNECTOR_HISTOGRAMS, measure, county)
+                for measure in CONNECTOR_MEASURES
+            }
+        ).to_json(),
+    )
+
+
+def render_trends(county: str | None = None) -> str:
+    # national counts when county is None
+    if county is None:
+        series = {
+            "Total chargepoints": TRENDS.total_chargers,
+            "In service": TRENDS.in_service_chargers,
+        }
+    else:
+        series = {county: TRENDS.county_chargers.get(county, [0] * len(TRENDS.dates))}
+
+    return RENDER_CACHE.get_or_render(
+        ("trends", county, DATA_VERSION),
+        lambda: plot_trends(TRENDS.dates, series).to_json(),
+    )
+
+
+@functools.cache
+def get_overview_page() -> StaticPage:
+    # encoded and compressed once, every session is served the same bytes
+    return get_static_page(
+        OVERVIEW_HTML if OVERVIEW_HTML is not None else render_overview(SUMMARY_DATA),
+        data_version=DATA_VERSION,
+    )
+
+
+@functools.cache
+def get_overview_plotlyjs() -> StaticPage:
+    return get_plotlyjs_page()
+
+
+def warm_render_cache(top_n: int) -> None:
+    # render the most popular counties before the first session asks for them
+    for county in SUMMARY_DATA.top_ten["County"]["County"].head(top_n):
+        render_county_map(county)
+        render_county_accessibility(county)
+
+    return None
+
+
+with timed("warm render cache"):
+    warm_render_cache(top_n=int(os.getenv("RENDER_CACHE_WARM_TOP_N", 0)))
 
 page_dependencies = ui.head_content(
     ui.HTML(
@@ -90,10 +390,22 @@ overview_ui = ui.nav_panel(
     ),
     ui.card(
         top_ten_text(),
-        output_widget("_top_ten"),
+        # relative, so that it resolves under the path the app is served from
+        ui.tags.iframe(
+            src=Definition.OVERVIEW_ROUTE.lstrip("/"),
+            title="Top ten",
+            height=f"{Definition.OVERVIEW_HEIGHT_PX + 20}px",
+            style="width: 100%; border: none;",
+        ),
     ),
 )
 
+# the county has its own input
+FILTER_PANEL_ATTRIBUTES = [
+    attribute for attribute in Definition.FILTER_ATTRIBUTES if attribute != "County"
+]
+
+
 county_ui = ui.nav_panel(
     "UK county chargepoint information",
     ui.tags.div(
@@ -118,6 +430,29 @@ county_ui = ui.nav_panel(
                     ui.output_text("_county_charger_count"),
                     showcase=icon_svg("plug"),
                 ),
+                ui.accordion(
+                    ui.accordion_panel(
+                        "Filter chargepoints",
+                        filter_text(),
+                        *[
+                            ui.input_selectize(
+                                get_filter_input_id(attribute),
+                                attribute,
+                                choices=FILTER_INDEX.choices(attribute),
+                                multiple=True,
+                                options={"placeholder": "Any"},
+                            )
+                            for attribute in FILTER_PANEL_ATTRIBUTES
+                        ],
+                    ),
+                    open=False,
+                ),
+                ui.input_select(
+                    "export_format",
+                    "Download the chargers as",
+                    choices={"csv": "CSV", "parquet": "Parquet", "geojson": "GeoJSON"},
+                ),
+                ui.download_button("_export", "Download", icon=icon_svg("download")),
             ),
             ui.column(
                 10,
@@ -135,6 +470,89 @@ county_ui = ui.nav_panel(
     ),
 )
 
+connectors_ui = ui.nav_panel(
+    "Connectors",
+    ui.card(
+        connectors_text(),
+        output_widget("_national_connectors"),
+    ),
+    ui.card(
+        ui.card_header("Connectors in a county"),
+        ui.input_selectize(
+            "connector_county",
+            "Enter or select a UK county",
+            choices=SUMMARY_DATA.counties,
+            selected="Edinburgh",
+            multiple=False,
+        ),
+        output_widget("_county_connectors"),
+    ),
+)
+
+trends_ui = ui.nav_panel(
+    "Trends",
+    *(
+        [
+            ui.card(
+                trends_text(),
+                output_widget("_national_trends"),
+            ),
+            ui.card(
+                ui.card_header("Chargepoints in a county"),
+                ui.input_selectize(
+                    "trends_county",
+                    "Enter or select a UK county",
+                    choices=list(TRENDS.county_chargers),
+                    selected="Edinburgh",
+                    multiple=False,
+                ),
+                output_widget("_county_trends"),
+            ),
+        ]
+        if TRENDS is not None
+        else [
+            ui.card(
+                ui.markdown(
+                    """
+                    No snapshots have been archived yet. Every run of `run.py`
+                    archives the registry it fetches.
+                    """
+                )
+            )
+        ]
+    ),
+)
+
+near_me_ui = ui.nav_panel(
+    "Chargepoints near me",
+    ui.layout_sidebar(
+        ui.sidebar(
+            ui.input_text("near_postcode", "Postcode", placeholder="e.g. EH1 1YZ"),
+            ui.input_numeric("near_latitude", "or latitude", value=None),
+            ui.input_numeric("near_longitude", "and longitude", value=None),
+            ui.input_numeric(
+                "near_k",
+                "Number of nearest chargepoints",
+                value=Definition.NEAREST_K,
+                min=1,
+                max=Definition.NEAREST_MAX_K,
+            ),
+            ui.input_action_button("near_search", "Search", class_="btn-primary"),
+        ),
+        ui.value_box(
+            f"Chargepoints within {Definition.DISTANCE_THRESHOLD:g} km",
+            ui.output_text("_near_count"),
+            showcase=icon_svg("location-dot"),
+            fill=False,
+        ),
+        ui.card(
+            near_me_text(Definition.DISTANCE_THRESHOLD),
+            ui.output_data_frame("_nearest_table"),
+        ),
+        ui.card(ui.output_ui("_near_map")),
+    ),
+)
+
 sidebar = ui.sidebar(
     ui.card(about_text()),
     ui.card(disclaimer_text()),
@@ -146,6 +564,9 @@ app_ui = ui.page_navbar(
     page_dependencies,
     overview_ui,
     county_ui,
+    connectors_ui,
+    trends_ui,
+    near_me_ui,
     sidebar=sidebar,
     title="UK EV CHARGEPOINTS",
     fillable=True,
@@ -155,28 +576,170 @@ app_ui = ui.page_navbar(
 def server(input: Inputs, output: Outputs, session: Session):
     info_modal()
 
-    @render_widget
-    def _top_ten():
-        return plot_top_ten(top_ten=SUMMARY_DATA.top_ten)
+    @reactive.calc
+    @instrument("selected_county")
+    def _selected_county() -> str:
+        county = input.county()
+        if county == "":
+            return "Edinburgh"
+        if county in COUNTY_INDEX:
+            return county
+
+        return SEARCH_INDEX.resolve(county) or county
 
     @reactive.calc
-    @reactive.event(input.county)
-    def _get_filtered_data() -> tuple[str, pd.DataFrame]:
-        county = "Edinburgh" if input.county() == "" else input.county()
-        return county, DATA[DATA["County"] == county]
+    @instrument("selected_filters", county=_selected_county, counties=COUNTY_INDEX)
+    def _selected_filters() -> Filters:
+        filters = {
+            attribute: list(input[get_filter_input_id(attribute)]() or [])
+            for attribute in FILTER_PANEL_ATTRIBUTES
+        }
+
+        return {attribute: values for attribute, values in filters.items() if values}
+
+    # typing in the county box or ticking several filters renders once
+    @debounce(Definition.INPUT_DEBOUNCE_SECONDS)
+    @instrument("county_request", county=_selected_county, counties=COUNTY_INDEX)
+    def _county_request() -> tuple[str, Filters]:
+        return _selected_county(), _selected_filters()
+
+    @latest_task(_county_request)
+    async def _map_task(county: str, filters: Filters) -> str:
+        return await render_off_loop("map", render_county_map, county, filters)
+
+    @latest_task(_county_request)
+    async def _accessibility_task(county: str, filters: Filters) -> go.Figure:
+        return await render_off_loop(
+            "accessibility", get_county_accessibility_figure, county, filters
+        )
+
+    # the county the outputs are shown for is that of the county request
+    def _requested_county() -> str:
+        return _county_request()[0]
 
     @render.ui
+    @instrument("county_map", county=_requested_county, counties=COUNTY_INDEX)
     def _map():
-        return get_map(_get_filtered_data()[1])
+        return ui.HTML(_map_task.result())
 
     @render.text
+    @instrument("county_charger_count", county=_selected_county, counties=COUNTY_INDEX)
     def _county_charger_count():
-        _, filtered_data = _get_filtered_data()
-        return f"{filtered_data.shape[0]}"
+        return f"{count_filtered_chargers(*_county_request())}"
 
     @render_widget
+    @instrument("county_accessibility", county=_requested_county, counties=COUNTY_INDEX)
     def _accessibility():
-        return plot_accessibility(df=_get_filtered_data()[1])
+        return _accessibility_task.result()
+
+    def _export_filename() -> str:
+        return get_export_filename(_selected_county(), input.export_format())
+
+    # the chargers of the county and filters as they are when the download
+    # starts, streamed a chunk at a time
+    @render.download(
+        filename=_export_filename,
+        media_type=lambda: Definition.EXPORT_MEDIA_TYPES[input.export_format()],
+    )
+    async def _export():
+        positions = get_filtered_positions(_selected_county(), _selected_filters())
+        async for chunk in iterate_off_loop(
+            iter_export(DATA, positions, input.export_format())
+        ):
+            yield chunk
+
+    @render_widget
+    @instrument("national_connectors")
+    def _national_connectors():
+        import plotly.io as pio
+
+        return pio.from_json(render_connector_histograms())
+
+    @render_widget
+    @instrument(
+        "county_connectors", county=input.connector_county, counties=COUNTY_INDEX
+    )
+    def _county_connectors():
+        import plotly.io as pio
+
+        req(input.connector_county())
+        return pio.from_json(render_connector_histograms(input.connector_county()))
+
+    @render_widget
+    @instrument("national_trends")
+    def _national_trends():
+        import plotly.io as pio
+
+        return pio.from_json(render_trends())
+
+    @render_widget
+    @instrument("county_trends", county=input.trends_county, counties=COUNTY_INDEX)
+    def _county_trends():
+        import plotly.io as pio
 
+        req(input.trends_county())
+        return pio.from_json(render_trends(input.trends_county()))
+
+    @reactive.calc
+    @reactive.event(input.near_search)
+    @instrument("nearby_chargers")
+    def _get_nearby_chargers() -> NearbyChargers:
+        if input.near_postcode().strip():
+            location = locate_postcode(POSTCODE_LOCATIONS, input.near_postcode())
+        elif None not in (input.near_latitude(), input.near_longitude()):
+            location = (input.near_latitude(), input.near_longitude())
+        else:
+            location = None
+
+        if location is None:
+            ui.notification_show(
+                "Postcode not found, try its first part or a latitude and longitude",
+                type="warning",
+            )
+        req(location)
+
+        return get_nearby_chargers(
+            DATA, SPATIAL_INDEX, *location, k=get_nearest_k(input.near_k())
+        )
+
+    @render.text
+    @instrument("near_count")
+    def _near_count():
+        return f"{_get_nearby_chargers().within_radius.shape[0]:,}"
+
+    @render.data_frame
+    @instrument("nearest_table")
+    def _nearest_table():
+        nearest = _get_nearby_chargers().nearest
+        return nearest[
+            ["Name", "Street", "Town", "Postcode", "Device Status", "Distance (km)"]
+        ].round({"Distance (km)": 2})
+
+    @render.ui
+    @instrument("near_map")
+    def _near_map():
+        return ui.HTML(get_map(_get_nearby_chargers().nearest)._repr_html_())
+
+
+shiny_app = App(app_ui, server)
+
+routes = [
+    get_viewport_route(viewport_index=VIEWPORT_INDEX, filter_index=FILTER_INDEX),
+    get_static_page_route(path=Definition.OVERVIEW_ROUTE, get_page=get_overview_page),
+    get_static_page_route(
+        path=Definition.PLOTLYJS_ROUTE, get_page=get_overview_plotlyjs
+    ),
+]
+# prometheus histograms of the render timings and payloads on /metrics
+if METRICS_ENABLED:
+    routes.append(get_metrics_route())
+
+# one app serves the routes and passes everything else to shiny, whose
+# startup and shutdown run as the lifespan of the app
+app = Starlette(
+    routes=[*routes, Mount("/", app=shiny_app)],
+    lifespan=shiny_app.starlette_app.router.lifespan_context,
+)
 
-app = App(app_ui, server)
+if os.getenv("NCR_PROFILE_STARTUP"):
+    print(format_timings(STARTUP_TIMINGS))
@@ -0,0 +1,16 @@
+import contextlib
+import io
+from pathlib import Path
+
+from utils.etl import clean_ncr_data
+
+# roughly the number of chargers in the registry before it was decommissioned
+REGISTRY_ROWS = 60_000
+
+
+def clean_quietly(url: str, data_dir: Path, **kwargs) -> None:
+    # clean_ncr_data without its progress report, which would drown the results
+    with contextlib.redirect_stdout(io.StringIO()):
+        clean_ncr_data(url=url, data_dir=data_dir, **kwargs)
+
+    return None
@@ -0,0 +1,69 @@
+"""Compare county lookups through the precomputed row index with a boolean mask.
+
+Every county in the summary data is looked up once per repeat, as happens
+when sessions switch between counties. Finding the rows of a county and
+copying them into a frame are timed apart: the count and the filters of the
+county tab only need the rows, while the map and the export copy them. Run
+from the repository root:
+
+    python -m benchmarks.county_index
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from utils.etl import load_cleaned_data
+from utils.processor import get_county_data, get_county_index, get_summary_data
+
+
+def _time_lookups(lookup, counties: list[str], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for county in counties:
+            lookup(county)
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = load_cleaned_data()
+    counties = get_summary_data(df).counties
+
+    start = time.perf_counter()
+    county_index = get_county_index(df)
+    build_time = time.perf_counter() - start
+
+    def mask_positions(county: str) -> np.ndarray:
+        return np.flatnonzero(df["County"].to_numpy() == county)
+
+    def index_positions(county: str) -> np.ndarray:
+        return county_index[county]
+
+    def copy_rows(county: str) -> None:
+        get_county_data(df, county_index, county)
+
+    n = len(counties)
+    mask_time = _time_lookups(mask_positions, counties, args.repeat)
+    index_time = _time_lookups(index_positions, counties, args.repeat)
+    copy_time = _time_lookups(copy_rows, counties, args.repeat)
+
+    print(f"rows: {df.shape[0]:,}, counties: {n}")
+    print(f"index build:         {build_time * 1e3:.2f} ms")
+    print(f"rows by mask:        {mask_time * 1e6 / n:.1f} us per county")
+    print(f"rows by index:       {index_time * 1e6 / n:.1f} us per county")
+    print(f"speedup:             {mask_time / index_time:.1f}x")
+    print(f"copy rows to frame:  {copy_time * 1e6 / n:.1f} us per county")
+
+    return None
+
+
+if __name__ == "__main__":
+    main()
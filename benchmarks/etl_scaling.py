@@ -0,0 +1,109 @@
+"""Time the etl with one to N worker processes on a large synthetic registry.
+
+A seeded synthetic registry is written to disk and served by the local
+registry stand-in, and clean_ncr_data runs end to end with every number of
+workers. The read of the registry, which the workers parse and clean in
+partitions, is also timed on its own, since the rest of the etl runs on one
+core. Every run must write the data version of the serial run. Run from the
+repository root:
+
+    python -m benchmarks.etl_scaling --rows 2000000 --max-workers 8
+"""
+
+import argparse
+import functools
+import mmap
+import os
+import time
+from collections.abc import Callable
+from datetime import date
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pandas as pd
+
+from benchmarks.common import clean_quietly
+from benchmarks.fixtures import RegistryServer, write_raw_csv
+from utils.definitions import Definition
+from utils.etl import (
+    _read_registry,
+    _read_registry_partitioned,
+    load_data_version,
+)
+
+SEED = 19
+
+
+def _best_of(run: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def _clean(url: str, data_dir: Path, workers: int) -> None:
+    # the same fetch date replaces the snapshot of the previous repeat
+    clean_quietly(url, data_dir, fetch_date=date(2024, 1, 1), workers=workers)
+
+
+def _read(csv_path: Path, workers: int) -> None:
+    if workers == 1:
+        with open(csv_path, "rb") as f:
+            _read_registry(f, Definition.CHUNK_SIZE)
+    else:
+        _read_registry_partitioned(csv_path, Definition.CHUNK_SIZE, workers)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+
+    print(f"cores: {os.cpu_count()}, rows: {args.rows:,}")
+    with TemporaryDirectory() as tmp, RegistryServer() as server:
+        csv_path = Path(tmp) / "registry.csv"
+        write_raw_csv(csv_path, n_rows=args.rows, seed=SEED)
+        print(f"registry: {csv_path.stat().st_size / 1024**2:.0f} MiB")
+
+        rows = []
+        with (
+            open(csv_path, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as payload,
+        ):
+            server.publish(payload)
+
+            for workers in range(1, args.max_workers + 1):
+                data_dir = Path(tmp) / f"data_{workers}"
+                rows.append(
+                    dict(
+                        workers=workers,
+                        read=_best_of(
+                            functools.partial(_read, csv_path, workers), args.repeat
+                        ),
+                        etl=_best_of(
+                            functools.partial(_clean, server.url, data_dir, workers),
+                            args.repeat,
+                        ),
+                        data_version=load_data_version(data_dir=data_dir),
+                    )
+                )
+
+    report = pd.DataFrame(rows).set_index("workers")
+    for phase in ["read", "etl"]:
+        report[f"{phase} speed-up"] = report[phase].iloc[0] / report[phase]
+    report["etl efficiency"] = report["etl speed-up"] / report.index
+
+    identical = (report.pop("data_version") == rows[0]["data_version"]).all()
+    print(report.round(2).to_string())
+    print(f"output identical to one worker: {identical}")
+
+    return None
+
+
+if __name__ == "__main__":
+    main()
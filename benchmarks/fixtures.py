@@ -0,0 +1,284 @@
+import hashlib
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# spelling of the raw registry headers, the etl lowercases them on load
+RAW_COLUMN_NAMES: dict[str, str] = {
+    "latitude": "latitude",
+    "longitude": "longitude",
+    "chargedeviceid": "chargeDeviceID",
+    "name": "name",
+    "town": "town",
+    "street": "street",
+    "county": "county",
+    "postcode": "postcode",
+    "access24hours": "access24Hours",
+    "paymentrequired": "paymentRequired",
+    "subscriptionrequired": "subscriptionRequired",
+    "accessrestrictionflag": "accessRestrictionFlag",
+    "parkingfeesflag": "parkingFeesFlag",
+    "locationtype": "locationType",
+    "devicemanufacturer": "deviceManufacturer",
+    "deviceownername": "deviceOwnerName",
+    "chargedevicestatus": "chargeDeviceStatus",
+    "devicecontrollername": "deviceControllerName",
+    **{
+        f"connector{i}{field.lower()}": f"connector{i}{field}"
+        for i in range(1, 4)
+        for field in [
+            "Type",
+            "ChargeMethod",
+            "ChargeMode",
+            "TetheredCable",
+            "Status",
+            "RatedOutputKW",
+            "OutputCurrent",
+            "RatedVoltage",
+        ]
+    },
+}
+
+COUNTIES: dict[str, tuple[float, float]] = {
+    "London": (51.507, -0.128),
+    "Edinburgh": (55.953, -3.188),
+    "Essex": (51.767, 0.456),
+    "Kent": (51.278, 0.522),
+    "Greater Manchester": (53.480, -2.242),
+    "West Midlands": (52.486, -1.890),
+    "Argyll and Bute": (56.208, -5.243),
+    "Bath and North East Somerset": (51.381, -2.359),
+    "Cardiff": (51.481, -3.179),
+    "Glasgow": (55.864, -4.252),
+    "Hampshire": (51.057, -1.308),
+    "Surrey": (51.314, -0.559),
+    "Devon": (50.718, -3.534),
+    "Norfolk": (52.631, 1.297),
+    "Fife": (56.208, -3.149),
+}
+
+# raw spellings that the etl is expected to repair
+DIRTY_COUNTIES: dict[str, list[str]] = {
+    "London": ["London ", "Lond", "london"],
+    "Essex": ["Essesx", " Essex"],
+    "Argyll and Bute": ["Argyll", "Argyl and Bute", "Argyll & Bute"],
+    "Bath and North East Somerset": [
+        "Bath & North East Somerset",
+        "Bath and N.E. Somerset",
+    ],
+}
+
+CONNECTOR_TYPES: dict[str, tuple[float, float, float]] = {
+    "Type 2 Mennekes (IEC62196)": (7.0, 32.0, 230.0),
+    "Type 2 Tethered Connector": (22.0, 32.0, 400.0),
+    "JEVS G105 (CHAdeMO) DC": (50.0, 125.0, 500.0),
+    "CCS Type 2 Combo (IEC62196)": (150.0, 200.0, 500.0),
+    "3-pin Type G (BS1363)": (3.0, 13.0, 230.0),
+}
+
+LOCATION_TYPES = [
+    "On-street",
+    "Public car park",
+    "Retail car park",
+    "Service station",
+    "Hotel / Accommodation",
+    "Workplace car park",
+]
+MANUFACTURERS = ["Pod Point", "Alfen", "Chargemaster", "ABB", "Andersen", "Rolec"]
+OWNERS = ["Pod Point", "BP Pulse", "Shell Recharge", "Connected Kerb", "Instavolt"]
+CONTROLLERS = ["Pod Point", "BP Pulse", "Shell Recharge", "Char.gy", "Instavolt"]
+STREETS = ["High Street", "Station Road", "Church Lane", "Market Square", "Park Road"]
+TOWN_SUFFIXES = ["", " St. Mary", " & Kings", " Upon Thames", " Green"]
+
+# share of missing values in the text columns of the registry
+MISSING_RATES: dict[str, float] = {
+    "name": 0.005,
+    "town": 0.02,
+    "street": 0.05,
+    "postcode": 0.01,
+    "locationtype": 0.03,
+    "devicemanufacturer": 0.08,
+    "deviceownername": 0.03,
+    "devicecontrollername": 0.15,
+}
+
+
+def make_raw_registry(n_rows: int, seed: int = 0, first_id: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+
+    # a zipf-like skew so that a few counties hold most of the chargers
+    county_names = list(COUNTIES)
+    weights = 1 / np.arange(1, len(county_names) + 1)
+    county_idx = rng.choice(len(county_names), size=n_rows, p=weights / weights.sum())
+    centres = np.array(list(COUNTIES.values()))
+
+    county = np.array(county_names, dtype=object)[county_idx]
+    for clean, dirty in DIRTY_COUNTIES.items():
+        rows = np.flatnonzero((county == clean) & (rng.random(n_rows) < 0.1))
+        county[rows] = rng.choice(dirty, size=rows.shape[0])
+
+    # a few hundred towns per county, again heavily skewed
+    town = (
+        pd.Series(np.array(county_names)[county_idx])
+        + " Town "
+        + pd.Series(rng.zipf(1.5, size=n_rows) % 300).astype(str)
+        + pd.Series(rng.choice(TOWN_SUFFIXES, size=n_rows))
+    ).to_numpy(dtype=object)
+
+    raw = {
+        "latitude": centres[county_idx, 0] + rng.normal(0, 0.08, n_rows),
+        "longitude": centres[county_idx, 1] + rng.normal(0, 0.12, n_rows),
+        "chargedeviceid": np.char.add(
+            "dev", np.arange(first_id, first_id + n_rows).astype(str)
+        ).astype(object),
+        "name": np.char.add("Charger ", rng.integers(0, 10_000, n_rows).astype(str)),
+        "town": town,
+        "street": rng.choice(STREETS, size=n_rows),
+        "county": county,
+        "postcode": np.char.add("AB", rng.integers(1, 99, n_rows).astype(str)),
+        "locationtype": rng.choice(LOCATION_TYPES, size=n_rows),
+        "devicemanufacturer": np.char.add(rng.choice(MANUFACTURERS, size=n_rows), " "),
+        "deviceownername": rng.choice(OWNERS, size=n_rows),
+        "chargedevicestatus": rng.choice(
+            ["In service", "Planned", "Removed"], size=n_rows, p=[0.9, 0.05, 0.05]
+        ),
+        "devicecontrollername": rng.choice(CONTROLLERS, size=n_rows),
+    }
+    for flag, p_yes in {
+        "access24hours": 0.7,
+        "paymentrequired": 0.6,
+        "subscriptionrequired": 0.1,
+        "accessrestrictionflag": 0.2,
+        "parkingfeesflag": 0.3,
+    }.items():
+        raw[flag] = (rng.random(n_rows) < p_yes).astype(int)
+
+    connector_names = list(CONNECTOR_TYPES)
+    connector_specs = np.array(list(CONNECTOR_TYPES.values()))
+    for i, p_present in zip(range(1, 4), [1.0, 0.6, 0.2]):
+        present = rng.random(n_rows) < p_present
+        kind = rng.choice(len(connector_names), size=n_rows)
+        spec = np.where(present[:, None], connector_specs[kind], np.nan)
+
+        raw[f"connector{i}type"] = np.where(
+            present, np.array(connector_names, dtype=object)[kind], None
+        )
+        raw[f"connector{i}chargemethod"] = np.where(
+            present, np.where(spec[:, 0] >= 50, "DC", "Single Phase AC"), None
+        )
+        raw[f"connector{i}chargemode"] = np.where(present, 3, np.nan)
+        raw[f"connector{i}tetheredcable"] = np.where(
+            present, (rng.random(n_rows) < 0.5).astype(float), np.nan
+        )
+        raw[f"connector{i}status"] = np.where(present, "In service", None)
+        raw[f"connector{i}ratedoutputkw"] = spec[:, 0]
+        raw[f"connector{i}outputcurrent"] = spec[:, 1]
+        raw[f"connector{i}ratedvoltage"] = spec[:, 2]
+
+    df = pd.DataFrame(raw)
+
+    for column, p_missing in MISSING_RATES.items():
+        df.loc[rng.random(n_rows) < p_missing, column] = None
+
+    # rows the etl is expected to drop
+    df.loc[rng.random(n_rows) < 0.01, "chargedeviceid"] = None
+    df.loc[rng.random(n_rows) < 0.01, ["latitude", "longitude"]] = [0.0, 0.0]
+
+    # columns that the etl is expected to ignore
+    df["reference"] = np.char.add(
+        "REF", np.arange(first_id, first_id + n_rows).astype(str)
+    )
+    df["countryCode"] = "gb"
+
+    return df.rename(columns=RAW_COLUMN_NAMES)[
+        list(RAW_COLUMN_NAMES.values()) + ["reference", "countryCode"]
+    ]
+
+
+def to_raw_csv(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False, lineterminator="\n").encode("utf-8")
+
+
+def write_raw_csv(
+    path: Path, n_rows: int, seed: int = 0, chunk_rows: int = 100_000
+) -> None:
+    # written a chunk at a time so that millions of rows fit in memory
+    n_chunks = -(-n_rows // chunk_rows)
+    seeds = np.random.SeedSequence(seed).generate_state(n_chunks)
+
+    with open(path, "wb") as f:
+        for i, chunk_seed in enumerate(seeds):
+            first_id = i * chunk_rows
+            chunk = make_raw_registry(
+                min(chunk_rows, n_rows - first_id),
+                seed=int(chunk_seed),
+                first_id=first_id,
+            )
+            f.write(
+                chunk.to_csv(index=False, header=i == 0, lineterminator="\n").encode(
+                    "utf-8"
+                )
+            )
+
+
+class RegistryHandler(BaseHTTPRequestHandler):
+    server: "RegistryServer"
+
+    def do_GET(self) -> None:
+        self.server.requests += 1
+        payload = self.server.payload
+
+        if self.headers.get("If-None-Match") == self.server.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.server.etag)
+            self.end_headers()
+            return None
+
+        self.server.downloads += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("ETag", self.server.etag)
+        self.send_header("Last-Modified", self.server.last_modified)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args) -> None:
+        return None
+
+
+class RegistryServer(ThreadingHTTPServer):
+    # a local stand-in for the registry csv endpoint, serving whichever
+    # snapshot was published last
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), RegistryHandler)
+        self.payload = b""
+        self.etag = ""
+        self.last_modified = ""
+        self.requests = 0
+        self.downloads = 0
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/retrieve/registry/format/csv"
+
+    def publish(self, payload: bytes) -> None:
+        # every published snapshot gets new validators, as the registry would
+        self.payload = payload
+        self.etag = f'"{hashlib.sha1(payload).hexdigest()}"'
+        self.last_modified = formatdate(usegmt=True)
+
+    def __enter__(self) -> "RegistryServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.shutdown()
+        self.server_close()
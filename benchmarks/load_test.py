@@ -0,0 +1,311 @@
+"""Simulate concurrent dashboard sessions against a local uvicorn server.
+
+A seeded synthetic registry is cleaned into a temporary data directory, the
+etl reading it from the local registry stand-in, and app:app is started on it
+with --workers uvicorn workers. Every simulated session loads the page and the
+overview as a browser does, opens the Shiny websocket and waits for its first
+flush, then opens the county tab and switches input.county --switches times.
+Counties are picked in proportion to their chargers, so the large counties
+are asked for about as often as users ask for them, with exponential think
+times between switches.
+
+For every number of sessions the connect latency, the p50/p95/p99 latency of
+every county output from the input change to its new value, and the county
+switches completed per second are reported. The sessions run in this process
+on the same machine as the server, so keep an eye on the cores left over.
+Nothing leaves the machine. Run from the repository root:
+
+    python -m benchmarks.load_test --sessions 1 8 32 --workers 1
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pandas as pd
+import websockets
+
+from benchmarks.common import REGISTRY_ROWS, clean_quietly
+from benchmarks.fixtures import RegistryServer, make_raw_registry, to_raw_csv
+from utils.definitions import Definition
+from utils.etl import load_cleaned_data
+from utils.filters import get_filter_input_id
+
+SEED = 19
+
+# outputs of the county tab, and of the tabs that stay hidden
+COUNTY_OUTPUTS = ["_county_charger_count", "_accessibility", "_map"]
+HIDDEN_OUTPUTS = [
+    "_national_connectors",
+    "_county_connectors",
+    "_national_trends",
+    "_county_trends",
+    "_near_count",
+    "_nearest_table",
+    "_near_map",
+]
+PERCENTILES = [50, 95, 99]
+
+
+@dataclass(frozen=True)
+class SessionResult:
+    connect_seconds: float | None
+    # seconds from every input change to the new value of every output
+    render_seconds: dict[str, list[float]]
+    switches: int
+    errors: int
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def _serve(data_dir: Path, port: int, workers: int):
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app:app",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        cwd=Path(__file__).resolve().parents[1],
+        env={**os.environ, "NCR_DATA_DIR": str(data_dir)},
+    )
+    try:
+        deadline = time.monotonic() + 120
+        while True:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=5).read()
+                break
+            except OSError:
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("the app did not start")
+                time.sleep(0.5)
+
+        yield
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def _http_get(port: int, path: str) -> int:
+    # a bare http/1.1 get, so that every session loads its pages concurrently
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n"
+        "Accept-Encoding: gzip\r\nConnection: close\r\n\r\n".encode()
+    )
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+
+    return int(response.split(b" ", 2)[1])
+
+
+def _init_data(county: str) -> dict:
+    # the inputs and client data a browser sends when it connects on the
+    # overview tab
+    return {
+        "county": county,
+        **{
+            get_filter_input_id(attribute): None
+            for attribute in Definition.FILTER_ATTRIBUTES
+            if attribute != "County"
+        },
+        **{
+            f".clientdata_output_{output}_hidden": True
+            for output in COUNTY_OUTPUTS + HIDDEN_OUTPUTS
+        },
+    }
+
+
+async def _receive_outputs(
+    ws, outputs: list[str], sent: float, timeout: float
+) -> tuple[dict[str, float], int]:
+    # seconds from sent until every output has a new value or an error, and
+    # the number of errors. an empty list waits for the next flush
+    received, errors = {}, 0
+    while True:
+        message = json.loads(await asyncio.wait_for(ws.recv(), timeout))
+        if "values" not in message:
+            continue
+
+        for output in outputs:
+            if output in message["values"] or output in message.get("errors", {}):
+                received.setdefault(output, time.perf_counter() - sent)
+                errors += output in message.get("errors", {})
+
+        if len(received) == len(outputs):
+            return received, errors
+
+
+async def _session(
+    port: int,
+    counties: list[str],
+    weights: np.ndarray,
+    switches: int,
+    think_seconds: float,
+    timeout: float,
+    seed: int,
+) -> SessionResult:
+    rng = np.random.default_rng(seed)
+    render_seconds = {output: [] for output in COUNTY_OUTPUTS}
+    connect_seconds, completed, errors = None, 0, 0
+
+    def _pick(current: str | None) -> str:
+        # an unchanged input would not render anything
+        while (county := counties[rng.choice(len(counties), p=weights)]) == current:
+            pass
+        return county
+
+    try:
+        start = time.perf_counter()
+        for path in ["/", Definition.OVERVIEW_ROUTE]:
+            if await _http_get(port, path) != 200:
+                raise RuntimeError(f"{path} did not load")
+
+        async with websockets.connect(
+            f"ws://127.0.0.1:{port}/websocket/", max_size=None
+        ) as ws:
+            county = _pick(None)
+            await ws.send(json.dumps({"method": "init", "data": _init_data(county)}))
+            await _receive_outputs(ws, [], start, timeout)
+            connect_seconds = time.perf_counter() - start
+
+            # the first switch opens the county tab on the selected county
+            update = {f".clientdata_output_{o}_hidden": False for o in COUNTY_OUTPUTS}
+            for _ in range(switches):
+                await asyncio.sleep(rng.exponential(think_seconds))
+
+                sent = time.perf_counter()
+                await ws.send(json.dumps({"method": "update", "data": update}))
+                received, output_errors = await _receive_outputs(
+                    ws, COUNTY_OUTPUTS, sent, timeout
+                )
+                for output, seconds in received.items():
+                    render_seconds[output].append(seconds)
+                completed += 1
+                errors += output_errors
+
+                county = _pick(county)
+                update = {"county": county}
+    except (OSError, RuntimeError, TimeoutError, websockets.WebSocketException):
+        errors += 1
+
+    return SessionResult(
+        connect_seconds=connect_seconds,
+        render_seconds=render_seconds,
+        switches=completed,
+        errors=errors,
+    )
+
+
+async def _run_sessions(
+    port: int, n_sessions: int, counties: list[str], weights: np.ndarray, args
+) -> tuple[list[SessionResult], float]:
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *[
+            _session(
+                port,
+                counties,
+                weights,
+                switches=args.switches,
+                think_seconds=args.think,
+                timeout=args.timeout,
+                seed=SEED + i,
+            )
+            for i in range(n_sessions)
+        ]
+    )
+
+    return results, time.perf_counter() - start
+
+
+def _summarise(
+    workers: int, n_sessions: int, results: list[SessionResult], seconds: float
+) -> dict:
+    connect = [r.connect_seconds for r in results if r.connect_seconds is not None]
+    row = dict(
+        workers=workers,
+        sessions=n_sessions,
+        connected=len(connect),
+        errors=sum(r.errors for r in results),
+        switches_per_second=sum(r.switches for r in results) / seconds,
+        connect_p50=np.percentile(connect, 50) if connect else np.nan,
+        connect_p95=np.percentile(connect, 95) if connect else np.nan,
+    )
+    for output in COUNTY_OUTPUTS:
+        samples = [s for r in results for s in r.render_seconds[output]]
+        for q in PERCENTILES:
+            row[f"{output.lstrip('_')}_p{q}"] = (
+                np.percentile(samples, q) if samples else np.nan
+            )
+
+    return row
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=REGISTRY_ROWS)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1])
+    parser.add_argument("--switches", type=int, default=10)
+    parser.add_argument("--think", type=float, default=2.0, help="mean seconds")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", type=Path, help="also write the results as json")
+    args = parser.parse_args()
+
+    rows = []
+    with TemporaryDirectory() as tmp:
+        data_dir = Path(tmp) / "data"
+        with RegistryServer() as registry:
+            registry.publish(to_raw_csv(make_raw_registry(args.rows, seed=SEED)))
+            clean_quietly(registry.url, data_dir)
+
+        chargers = load_cleaned_data(data_dir=data_dir)["County"].value_counts()
+        counties = chargers.index.astype(str).tolist()
+        weights = (chargers / chargers.sum()).to_numpy()
+
+        for workers in args.workers:
+            port = _free_port()
+            with _serve(data_dir, port, workers):
+                for n_sessions in args.sessions:
+                    results, seconds = asyncio.run(
+                        _run_sessions(port, n_sessions, counties, weights, args)
+                    )
+                    rows.append(_summarise(workers, n_sessions, results, seconds))
+
+    report = pd.DataFrame(rows).set_index(["workers", "sessions"])
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(f"cores: {os.cpu_count()}, rows: {args.rows:,}, seconds:")
+        print(report.T.round(3))
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(rows, indent=2))
+
+    return None
+
+
+if __name__ == "__main__":
+    main()
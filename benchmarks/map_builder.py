@@ -0,0 +1,79 @@
+"""Compare the per-marker map builder with the single geojson layer builder.
+
+Both maps are built and rendered to html, which is what a county switch
+pays for. Run from the repository root:
+
+    python -m benchmarks.map_builder
+"""
+
+import argparse
+import time
+
+import folium
+import leafmap.foliumap as leafmap
+import pandas as pd
+from folium import plugins
+
+from utils.etl import load_cleaned_data
+from utils.plotter import get_map
+
+SIZES = [100, 1_000, 10_000]
+
+
+def get_map_per_marker(df: pd.DataFrame) -> folium.Map:
+    # the map builder as it was before the markers moved to one geojson layer
+    location_map = leafmap.Map(
+        center=[df["Latitude"].mean(), df["Longitude"].mean()], zoom=10
+    )
+    plugins.Geocoder().add_to(location_map)
+
+    for _, row in df.iterrows():
+        tooltip_html = "<br>".join(
+            [
+                f"<b>{key}:</b> {value}"
+                for key, value in row.to_dict().items()
+                if str(value) != "nan"
+            ]
+        )
+        folium.Marker(
+            location=[row["Latitude"], row["Longitude"]],
+            tooltip=tooltip_html,
+        ).add_to(location_map)
+
+    return location_map
+
+
+def _time_render(builder, df: pd.DataFrame, repeat: int) -> tuple[float, int]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        html = builder(df).get_root().render()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings), len(html)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = load_cleaned_data()
+
+    print(f"{'chargers':>10}{'per marker (s)':>16}{'geojson (s)':>14}{'speedup':>10}")
+    for size in SIZES:
+        county = df.sample(n=size, replace=size > df.shape[0], random_state=0)
+
+        marker_time, _ = _time_render(get_map_per_marker, county, args.repeat)
+        geojson_time, _ = _time_render(get_map, county, args.repeat)
+
+        print(
+            f"{size:>10,}{marker_time:>16.3f}{geojson_time:>14.3f}"
+            f"{marker_time / geojson_time:>9.1f}x"
+        )
+
+    return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Report the memory of every cleaned column before and after the schema.
+
+A seeded synthetic registry is cleaned as the etl does, and the bytes held by
+every column are compared with and without the types declared in
+Definition.COLUMN_DTYPES. Run from the repository root:
+
+    python -m benchmarks.schema_memory
+"""
+
+import argparse
+
+import pandas as pd
+
+from benchmarks.common import REGISTRY_ROWS
+from benchmarks.fixtures import make_raw_registry
+from utils.etl import _refine_chunk, apply_schema, clean_ncr_frame
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=REGISTRY_ROWS)
+    args = parser.parse_args()
+
+    before = clean_ncr_frame(_refine_chunk(make_raw_registry(n_rows=args.rows)))
+    after = apply_schema(before)
+
+    report = pd.DataFrame(
+        {
+            "before": before.dtypes.astype(str),
+            "after": after.dtypes.astype(str),
+            "bytes before": before.memory_usage(deep=True, index=False),
+            "bytes after": after.memory_usage(deep=True, index=False),
+        }
+    )
+    report["bytes per row"] = (report["bytes after"] / after.shape[0]).round(1)
+
+    with pd.option_context(
+        "display.width", 120, "display.max_rows", None, "display.max_columns", None
+    ):
+        print(f"rows: {after.shape[0]:,}")
+        print(report)
+
+    total_before = report["bytes before"].sum()
+    total_after = report["bytes after"].sum()
+    print(f"total before: {total_before / 1024**2:.1f} MiB")
+    print(f"total after:  {total_after / 1024**2:.1f} MiB")
+    print(f"saved:        {1 - total_after / total_before:.0%}")
+
+    return None
+
+
+if __name__ == "__main__":
+    main()
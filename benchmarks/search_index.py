@@ -0,0 +1,82 @@
+"""Compare the trigram search index with a linear difflib scan.
+
+The queries are county and town names with one typo each: a dropped, doubled,
+swapped or replaced letter. Both methods are asked for the closest name, the
+scan with difflib.get_close_matches over every name, which is what a search
+without an index does. Per query timings and the share of queries that find
+the name the typo was made in are reported. Run from the repository root
+after `run.py`:
+
+    python -m benchmarks.search_index
+"""
+
+import argparse
+import difflib
+import string
+import time
+
+import numpy as np
+
+from utils.etl import load_cleaned_data
+from utils.search import get_search_index
+
+
+def _typo(name: str, rng: np.random.Generator) -> str:
+    i = int(rng.integers(0, len(name) - 1))
+    letter = str(rng.choice(list(string.ascii_lowercase)))
+    edit = rng.integers(0, 4)
+    if edit == 0:
+        return name[:i] + name[i + 1 :]
+    if edit == 1:
+        return name[: i + 1] + name[i:]
+    if edit == 2:
+        return name[:i] + name[i + 1] + name[i] + name[i + 2 :]
+
+    return name[:i] + letter + name[i + 1 :]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    df = load_cleaned_data()
+    names = sorted(df["County"].dropna().astype(str).unique().tolist()) + sorted(
+        df["Town"].dropna().astype(str).unique().tolist()
+    )
+
+    start = time.perf_counter()
+    search_index = get_search_index(df)
+    build_time = time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    targets = [names[i] for i in rng.integers(0, len(names), args.queries)]
+    queries = [_typo(name, rng) for name in targets]
+
+    start = time.perf_counter()
+    index_results = [search_index.search(query, k=1) for query in queries]
+    index_time = (time.perf_counter() - start) / args.queries
+
+    start = time.perf_counter()
+    scan_results = [
+        difflib.get_close_matches(query, names, n=1, cutoff=0.6) for query in queries
+    ]
+    scan_time = (time.perf_counter() - start) / args.queries
+
+    index_hits = np.mean(
+        [bool(m) and m[0].name == t for m, t in zip(index_results, targets)]
+    )
+    scan_hits = np.mean([bool(m) and m[0] == t for m, t in zip(scan_results, targets)])
+
+    print(f"{len(names):,} names, {args.queries} queries with one typo")
+    print(f"index build: {build_time * 1e3:.1f} ms")
+    print(f"{'method':<10}{'per query (ms)':>16}{'top-1 hits':>12}")
+    print(f"{'index':<10}{index_time * 1e3:>16.3f}{index_hits:>12.1%}")
+    print(f"{'difflib':<10}{scan_time * 1e3:>16.3f}{scan_hits:>12.1%}")
+    print(f"speedup: {scan_time / index_time:.1f}x")
+
+    return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Compare the kd-tree radius and nearest queries with a brute-force scan.
+
+Both answer the "chargers near me" question for query points drawn from the
+charger locations: the chargers within the distance threshold and the k
+nearest. The scan computes the haversine distance to every charger. Run from
+the repository root after `run.py`:
+
+    python -m benchmarks.spatial_index
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from utils.definitions import Definition
+from utils.etl import load_cleaned_data
+from utils.spatial import get_spatial_index, haversine_km
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    df = load_cleaned_data()
+    latitude, longitude = df["Latitude"].to_numpy(), df["Longitude"].to_numpy()
+
+    rng = np.random.default_rng(0)
+    points = rng.integers(0, df.shape[0], args.queries)
+    queries = list(zip(latitude[points], longitude[points]))
+
+    start = time.perf_counter()
+    spatial_index = get_spatial_index(df)
+    spatial_index.nearest(*queries[0], k=1)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tree_results = []
+    for lat, lon in queries:
+        within = spatial_index.within(lat, lon, Definition.DISTANCE_THRESHOLD)
+        nearest, _ = spatial_index.nearest(lat, lon, args.k)
+        tree_results.append((within, nearest))
+    tree_time = (time.perf_counter() - start) / args.queries
+
+    start = time.perf_counter()
+    scan_results = []
+    for lat, lon in queries:
+        distances = haversine_km(lat, lon, latitude, longitude)
+        within = np.flatnonzero(distances <= Definition.DISTANCE_THRESHOLD)
+        nearest = np.argpartition(distances, args.k)[: args.k]
+        nearest = nearest[np.argsort(distances[nearest])]
+        scan_results.append((within, nearest))
+    scan_time = (time.perf_counter() - start) / args.queries
+
+    # the two only disagree on points within floating point error of the radius
+    mismatches = sum(
+        np.setxor1d(tree[0], scan[0]).size + np.setxor1d(tree[1], scan[1]).size
+        for tree, scan in zip(tree_results, scan_results)
+    )
+    mean_within = np.mean([within.size for within, _ in tree_results])
+
+    print(f"{df.shape[0]:,} chargers, {mean_within:,.0f} within radius on average")
+    print(f"kd-tree build (with scipy import): {build_time * 1e3:.1f} ms")
+    print(f"{'method':<10}{'per query (ms)':>16}")
+    print(f"{'kd-tree':<10}{tree_time * 1e3:>16.3f}")
+    print(f"{'scan':<10}{scan_time * 1e3:>16.3f}")
+    print(f"speedup: {scan_time / tree_time:.1f}x, mismatched chargers: {mismatches}")
+
+    return None
+
+
+if __name__ == "__main__":
+    main()
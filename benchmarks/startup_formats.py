@@ -0,0 +1,105 @@
+"""Compare the cold-start cost of loading the cleaned data from csv and arrow ipc.
+
+Each format is loaded in a fresh interpreter and the reported RSS is the growth
+of the peak resident set caused by the load alone, imports excluded. Run from the repository root after `run.py`:
+
+    python -m benchmarks.startup_formats
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pandas as pd
+
+from utils.definitions import Definition
+from utils.etl import load_cleaned_data, save_cleaned_data
+
+FORMATS = ["csv", "feather"]
+
+
+def _load(fmt: str, data_dir: Path) -> pd.DataFrame:
+    if fmt == "csv":
+        return pd.read_csv(data_dir / Definition.CLEANED_DATA_CSV)
+
+    return load_cleaned_data(data_dir=data_dir)
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss survives exec on linux, so read the high-water mark of this
+    # process image instead
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1]) / 1024
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _child(fmt: str, data_dir: Path) -> None:
+    baseline_rss = _peak_rss_mb()
+    start = time.perf_counter()
+    df = _load(fmt, data_dir)
+    elapsed = time.perf_counter() - start
+
+    print(
+        json.dumps(
+            dict(
+                rows=df.shape[0],
+                seconds=elapsed,
+                load_rss_mb=_peak_rss_mb() - baseline_rss,
+            )
+        )
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--child", nargs=2, metavar=("FORMAT", "DATA_DIR"))
+    args = parser.parse_args()
+
+    if args.child is not None:
+        _child(args.child[0], Path(args.child[1]))
+        return None
+
+    df = load_cleaned_data()
+
+    with TemporaryDirectory() as tmp:
+        save_cleaned_data(df, data_dir=Path(tmp), export_csv=True)
+
+        print(f"{'format':<10}{'rows':>10}{'best (s)':>12}{'load rss (MB)':>16}")
+        for fmt in FORMATS:
+            runs = [
+                json.loads(
+                    subprocess.run(
+                        [
+                            sys.executable,
+                            "-m",
+                            "benchmarks.startup_formats",
+                            "--child",
+                            fmt,
+                            tmp,
+                        ],
+                        check=True,
+                        capture_output=True,
+                        text=True,
+                    ).stdout
+                )
+                for _ in range(args.repeat)
+            ]
+            print(
+                f"{fmt:<10}{runs[0]['rows']:>10,}"
+                f"{min(r['seconds'] for r in runs):>12.3f}"
+                f"{min(r['load_rss_mb'] for r in runs):>16.1f}"
+            )
+
+    return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Break down the cold start of the app into imports and data loading.
+
+Imports `app` in a fresh interpreter with `-X importtime` and prints the
+slowest modules imported directly by the app, followed by the start-up
+phases the app times itself (NCR_PROFILE_STARTUP). Run from the repository
+root:
+
+    python -m benchmarks.startup_profile
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+IMPORT_TIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        env={**os.environ, "NCR_PROFILE_STARTUP": "1"},
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+
+    # modules imported by app itself are indented one level below it
+    imports = [
+        (int(cumulative), name)
+        for _, cumulative, indent, name in IMPORT_TIME.findall(result.stderr)
+        if len(indent) == 3
+    ]
+    total = next(
+        int(cumulative)
+        for _, cumulative, _, name in IMPORT_TIME.findall(result.stderr)
+        if name == "app"
+    )
+
+    print("imports (cumulative)")
+    for cumulative, name in sorted(imports, reverse=True)[: args.top]:
+        print(f"  {name:<40}{cumulative / 1e3:9.1f} ms")
+    print(f"  {'app':<40}{total / 1e3:9.1f} ms")
+
+    print("start-up phases")
+    for line in result.stdout.splitlines():
+        print(f"  {line}")
+
+    return None
+
+
+if __name__ == "__main__":
+    main()
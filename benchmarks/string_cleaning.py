@@ -0,0 +1,74 @@
+"""Compare row-wise and category-level text cleaning at 10x the registry size.
+
+python -m benchmarks.string_cleaning
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.common import REGISTRY_ROWS
+from benchmarks.fixtures import make_raw_registry
+from utils.definitions import Definition
+from utils.etl import TEXT_CLEANERS, clean_text_columns
+
+
+def clean_text_columns_rowwise(data_refined: pd.DataFrame) -> pd.DataFrame:
+    # the cleaning as it was done before it moved to the categories
+    data_refined = data_refined.copy()
+    for col in TEXT_CLEANERS:
+        data_refined[col] = data_refined[col].str.strip()
+
+    data_refined["county"] = data_refined["county"].replace(
+        Definition.MISSPELT_COUNTY_NAMES
+    )
+
+    for col in ["county", "town"]:
+        data_refined[col] = data_refined[col].str.replace(
+            '[.&`"]', lambda x: "and" if x.group() == "&" else "", regex=True
+        )
+        data_refined[col] = data_refined[col].str.title()
+
+    return data_refined
+
+
+def _best_of(func, df: pd.DataFrame, repeat: int) -> tuple[float, pd.DataFrame]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        timings.append(time.perf_counter() - start)
+
+    return min(timings), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    raw = make_raw_registry(n_rows=args.scale * REGISTRY_ROWS)
+    raw.columns = raw.columns.str.lower()
+    df = raw[list(Definition.COLUMNS_NEEDED)]
+
+    rowwise_time, rowwise = _best_of(clean_text_columns_rowwise, df, args.repeat)
+    category_time, category = _best_of(clean_text_columns, df, args.repeat)
+
+    for col in TEXT_CLEANERS:
+        pd.testing.assert_series_equal(
+            category[col].astype(object).fillna(""),
+            rowwise[col].astype(object).fillna(""),
+        )
+
+    print(f"rows: {df.shape[0]:,}")
+    print(f"row-wise:       {rowwise_time:.3f} s")
+    print(f"category-level: {category_time:.3f} s")
+    print(f"speedup:        {rowwise_time / category_time:.1f}x")
+
+    return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Time the data pipeline and the plotting functions on synthetic registries.
+
+For every size a seeded synthetic registry is written to disk and served by
+the local registry stand-in, so clean_ncr_data runs end to end without the
+network. The other cases run on its output; the county plots use the smallest
+county, which holds about 2% of the chargers. The best of --repeat runs is
+compared with benchmarks/baselines.json, and cases slower than --threshold
+times their baseline, and by more than --min-delta seconds, are flagged.
+Baselines are machine specific, record new ones with --update-baselines after
+changing hardware. Run from the repository root:
+
+    python -m benchmarks.suite --check
+
+The 5m size needs roughly 16 GB of memory and is only run when asked for with
+--sizes. baselines.json holds no 5m baselines, so its cases are reported but
+not checked until some are recorded with --update-baselines.
+"""
+
+import argparse
+import functools
+import json
+import mmap
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pandas as pd
+
+from benchmarks.common import clean_quietly
+from benchmarks.fixtures import COUNTIES, RegistryServer, write_raw_csv
+from utils.etl import load_cleaned_data
+from utils.plotter import get_map, plot_accessibility, plot_top_ten
+from utils.processor import SummaryData, get_column_value_counts, get_summary_data
+
+SIZES = {"50k": 50_000, "500k": 500_000, "5m": 5_000_000}
+DEFAULT_SIZES = ["50k", "500k"]
+BASELINES_PATH = Path(__file__).parent / "baselines.json"
+SEED = 19
+
+
+@dataclass(frozen=True)
+class Workload:
+    data: pd.DataFrame
+    summary_data: SummaryData
+    county_data: pd.DataFrame
+
+
+# cases timed on the output of clean_ncr_data
+CASES: dict[str, Callable[[Workload], object]] = {
+    "get_summary_data": lambda w: get_summary_data(w.data),
+    "get_column_value_counts": lambda w: get_column_value_counts(w.data, "County"),
+    "plot_top_ten": lambda w: plot_top_ten(w.summary_data.top_ten),
+    "plot_accessibility": lambda w: plot_accessibility(df=w.county_data),
+    "get_map": lambda w: get_map(w.county_data)._repr_html_(),
+}
+
+
+def _best_of(run: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def run_size(n_rows: int, repeat: int) -> dict[str, float]:
+    with TemporaryDirectory() as tmp, RegistryServer() as server:
+        csv_path = Path(tmp) / "registry.csv"
+        write_raw_csv(csv_path, n_rows=n_rows, seed=SEED)
+
+        with (
+            open(csv_path, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as payload,
+        ):
+            server.publish(payload)
+
+            data_dir = Path(tmp) / "data"
+            data_dir.mkdir()
+            timings = {
+                "clean_ncr_data": _best_of(
+                    lambda: clean_quietly(server.url, data_dir), repeat
+                )
+            }
+
+        data = load_cleaned_data(data_dir=data_dir)
+        workload = Workload(
+            data=data,
+            summary_data=get_summary_data(data),
+            county_data=data[data["County"] == list(COUNTIES)[-1]],
+        )
+        for name, case in CASES.items():
+            timings[name] = _best_of(functools.partial(case, workload), repeat)
+
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", nargs="+", choices=SIZES, default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--min-delta", type=float, default=0.01)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--update-baselines", action="store_true")
+    args = parser.parse_args()
+
+    baselines = (
+        json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() else {}
+    )
+
+    regressions = []
+    print(f"{'case':<26}{'size':>6}{'best (s)':>12}{'baseline (s)':>14}{'ratio':>8}")
+    for size in args.sizes:
+        timings = run_size(SIZES[size], repeat=args.repeat)
+        if size not in baselines and not args.update_baselines:
+            print(f"no baselines for {size}, its cases are not checked")
+
+        for name, seconds in timings.items():
+            baseline = baselines.get(size, {}).get(name)
+            ratio = None if baseline is None else seconds / baseline
+            flag = ""
+            # millisecond cases are noisy, so small absolute slowdowns pass
+            if (
+                ratio is not None
+                and ratio > args.threshold
+                and seconds - baseline > args.min_delta
+            ):
+                flag = "  slower"
+                regressions.append((name, size, ratio))
+
+            print(
+                f"{name:<26}{size:>6}{seconds:>12.3f}"
+                + ("" if baseline is None else f"{baseline:>14.3f}{ratio:>8.2f}")
+                + flag
+            )
+
+        if args.update_baselines:
+            baselines[size] = {name: round(s, 4) for name, s in timings.items()}
+
+    if args.update_baselines:
+        BASELINES_PATH.write_text(json.dumps(baselines, indent=2) + "\n")
+
+    if args.check and regressions:
+        print(
+            f"{len(regressions)} case(s) slower than {args.threshold:.2f}x "
+            "their baseline",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Measure the memory of the dashboard served by several uvicorn workers.
+
+The app is started with 1, 4 and 8 workers, with and without NCR_SHARED_DATA,
+and the RSS, PSS and private memory of every worker are read from
+/proc/<pid>/smaps_rollup once the workers have loaded the data. PSS splits
+shared pages between the processes mapping them, so the summed PSS is the
+real footprint of the pool. The structures every worker still builds from
+the data at import, rather than mapping them from data/ncr_indexes, are then
+measured one by one with tracemalloc. Linux only. Run from the repository
+root after `run.py`:
+
+    python -m benchmarks.worker_memory
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+import urllib.request
+from pathlib import Path
+
+WORKERS = [1, 4, 8]
+MODES = {"copied": None, "shared": "1"}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _worker_pids(parent: int, workers: int) -> list[int]:
+    # a single worker is served from the uvicorn process itself
+    if workers == 1:
+        return [parent]
+
+    # otherwise uvicorn spawns its workers through multiprocessing, which also
+    # starts a resource tracker that is not a worker
+    pids = []
+    for proc in Path("/proc").iterdir():
+        if not proc.name.isdigit():
+            continue
+        try:
+            ppid = int((proc / "stat").read_text().rsplit(")", 1)[1].split()[1])
+            cmdline = (proc / "cmdline").read_bytes()
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+        if ppid == parent and b"spawn_main" in cmdline:
+            pids.append(int(proc.name))
+
+    return sorted(pids)
+
+
+def _smaps_rollup_mb(pid: int) -> dict[str, float]:
+    fields = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        key, value = line.split(":", 1)
+        fields[key] = int(value.split()[0]) / 1024
+
+    return dict(
+        rss=fields["Rss"],
+        pss=fields["Pss"],
+        private=fields["Private_Clean"] + fields["Private_Dirty"],
+    )
+
+
+def _wait_until_ready(url: str, parent: int, workers: int, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                pass
+        except OSError:
+            time.sleep(0.5)
+            continue
+
+        pids = _worker_pids(parent, workers)
+        if len(pids) == workers:
+            # the data is loaded at import, so wait for the workers to settle
+            before = sum(_smaps_rollup_mb(pid)["rss"] for pid in pids)
+            time.sleep(1.0)
+            after = sum(_smaps_rollup_mb(pid)["rss"] for pid in pids)
+            if abs(after - before) < 1.0:
+                return None
+
+    raise TimeoutError(f"{workers} workers not ready after {timeout:.0f}s")
+
+
+def measure(workers: int, shared: str | None, timeout: float) -> list[dict]:
+    port = _free_port()
+    env = {k: v for k, v in os.environ.items() if k != "NCR_SHARED_DATA"}
+    if shared is not None:
+        env["NCR_SHARED_DATA"] = shared
+
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app:app",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+    try:
+        _wait_until_ready(f"http://127.0.0.1:{port}/", server.pid, workers, timeout)
+        return [_smaps_rollup_mb(pid) for pid in _worker_pids(server.pid, workers)]
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _built_per_worker() -> dict[str, float]:
+    # MB held by each structure app.py builds in every worker, as built from
+    # the data of the shared mode
+    from utils.connectors import get_connector_histograms, get_connector_table
+    from utils.etl import load_cleaned_data, load_connector_table, load_data_version
+    from utils.processor import get_accessibility_counts
+    from utils.spatial import get_postcode_locations
+
+    df = load_cleaned_data(shared=True)
+
+    # as app.py, built when the etl has not written it
+    def connector_table():
+        connectors = load_connector_table(data_version=load_data_version())
+        return get_connector_table(df=df) if connectors is None else connectors
+
+    connectors = connector_table()
+    builders = {
+        "accessibility counts": lambda: get_accessibility_counts(df=df),
+        "postcode locations": lambda: get_postcode_locations(df=df),
+        "connector table": connector_table,
+        "connector histograms": lambda: get_connector_histograms(connectors),
+    }
+
+    sizes = {}
+    for name, build in builders.items():
+        tracemalloc.start()
+        built = build()
+        sizes[name] = tracemalloc.get_traced_memory()[0] / 1024**2
+        tracemalloc.stop()
+        del built
+
+    return sizes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=WORKERS)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':<8}{'workers':>8}{'rss/worker':>12}{'pss/worker':>12}"
+        f"{'private/worker':>16}{'total pss (MB)':>16}"
+    )
+    for workers in args.workers:
+        for mode, shared in MODES.items():
+            usage = measure(workers, shared, timeout=args.timeout)
+            print(
+                f"{mode:<8}{workers:>8}"
+                f"{sum(u['rss'] for u in usage) / workers:>12.1f}"
+                f"{sum(u['pss'] for u in usage) / workers:>12.1f}"
+                f"{sum(u['private'] for u in usage) / workers:>16.1f}"
+                f"{sum(u['pss'] for u in usage):>16.1f}"
+            )
+
+    print(f"\n{'built in every worker':<24}{'MB':>8}")
+    for name, size in _built_per_worker().items():
+        print(f"{name:<24}{size:>8.2f}")
+
+    return None
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,32 @@
+import argparse
+
 from utils.etl import clean_ncr_data
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Download and clean the NCR data.")
+    parser.add_argument(
+        "--csv",
+        action="store_true",
+        help="also export the cleaned data as csv",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="skip an unchanged source and only re-clean new or changed chargers",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of processes that parse and clean the registry",
+    )
+    args = parser.parse_args()
+
     print("cleaning ncr data...")
-    clean_ncr_data()
+    clean_ncr_data(
+        export_csv=args.csv, incremental=args.incremental, workers=args.workers
+    )
 
 
 if __name__ == "__main__":
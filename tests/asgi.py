@@ -0,0 +1,49 @@
+import asyncio
+
+
+def asgi_request(
+    app, url: str, headers: dict[str, str] | None = None
+) -> tuple[int, dict[str, str], bytes]:
+    # drive an asgi app with a single http get request
+    path, _, query_string = url.partition("?")
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query_string.encode(),
+        "headers": [
+            (k.lower().encode(), v.encode()) for k, v in (headers or {}).items()
+        ],
+        "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+    }
+    asyncio.run(app(scope, receive, send))
+
+    start = next(m for m in messages if m["type"] == "http.response.start")
+    body = b"".join(
+        m.get("body", b"") for m in messages if m["type"] == "http.response.body"
+    )
+
+    return (
+        start["status"],
+        {k.decode(): v.decode() for k, v in start.get("headers", [])},
+        body,
+    )
+
+
+def asgi_get(app, url: str) -> tuple[int, bytes]:
+    status, _, body = asgi_request(app, url)
+
+    return status, body
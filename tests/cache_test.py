@@ -0,0 +1,40 @@
+import sys
+
+from utils.cache import RenderCache
+
+
+def test_render_cache_hits_and_misses():
+    cache = RenderCache(max_bytes=1024)
+    renders = []
+
+    for _ in range(3):
+        cache.get_or_render(
+            ("map", "Edinburgh", "v1"), lambda: renders.append(1) or "x"
+        )
+
+    stats = cache.stats()
+    assert len(renders) == 1
+    assert (stats.hits, stats.misses, stats.entries) == (2, 1, 1)
+
+
+def test_render_cache_evicts_least_recently_used():
+    value = "x" * 100
+    cache = RenderCache(max_bytes=3 * sys.getsizeof(value))
+
+    for county in ["a", "b", "c"]:
+        cache.put(county, value)
+    cache.get("a")
+    cache.put("d", value)
+
+    stats = cache.stats()
+    assert cache.get("b") is None
+    assert all(cache.get(county) == value for county in ["a", "c", "d"])
+    assert stats.evictions == 1
+    assert stats.size_bytes <= stats.max_bytes
+
+
+def test_render_cache_skips_values_over_budget():
+    cache = RenderCache(max_bytes=10)
+    cache.put("a", "x" * 100)
+
+    assert cache.stats().entries == 0
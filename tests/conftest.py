@@ -0,0 +1,38 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from benchmarks.fixtures import RegistryServer, make_raw_registry, to_raw_csv
+from utils.etl import clean_ncr_data, load_cleaned_data
+
+
+@pytest.fixture(scope="session")
+def raw_registry() -> pd.DataFrame:
+    return make_raw_registry(n_rows=5_000, seed=19)
+
+
+@pytest.fixture(scope="session")
+def registry_server(raw_registry) -> RegistryServer:
+    with RegistryServer() as server:
+        server.publish(to_raw_csv(raw_registry))
+        yield server
+
+
+@pytest.fixture(scope="session")
+def ncr_data_dir(registry_server, tmp_path_factory) -> Path:
+    data_dir = tmp_path_factory.mktemp("data")
+    clean_ncr_data(url=registry_server.url, data_dir=data_dir)
+
+    return data_dir
+
+
+@pytest.fixture
+def ncr(ncr_data_dir) -> pd.DataFrame:
+    return load_cleaned_data(data_dir=ncr_data_dir)
+
+
+@pytest.fixture
+def snapshot_server() -> RegistryServer:
+    with RegistryServer() as server:
+        yield server
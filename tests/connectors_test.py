@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from utils.connectors import (
+    CONNECTOR_MEASURES,
+    get_connector_histograms,
+    get_connector_table,
+    get_histogram_counts,
+)
+from utils.definitions import Definition
+from utils.etl import load_connector_table, load_data_version
+
+
+def test_connector_table_stacks_connector_groups(ncr):
+    connectors = get_connector_table(ncr)
+
+    for label in Definition.CONNECTOR_LABELS:
+        wide = ncr[[f"{label} Type"] + Definition.TAB_NAMES[label]]
+        wide = wide[wide.notna().any(axis=1)]
+        long = connectors[connectors["Connector"] == label]
+
+        assert long.shape[0] == wide.shape[0]
+        np.testing.assert_array_equal(
+            long["Rated Output (kW)"].to_numpy(),
+            wide[f"{label} Rated Output (kW)"].to_numpy(),
+        )
+
+
+def test_histograms_match_numpy_histogram(ncr):
+    connectors = get_connector_table(ncr)
+    histograms = get_connector_histograms(connectors)
+
+    for measure in CONNECTOR_MEASURES:
+        edges = Definition.CONNECTOR_BINS[measure]
+        values = connectors[measure].dropna().to_numpy()
+        expected, _ = np.histogram(values, bins=[*edges, np.inf])
+
+        national = get_histogram_counts(histograms, measure)
+        by_bin = national.groupby(measure, sort=False)["Count"].sum()
+        np.testing.assert_array_equal(by_bin.to_numpy(), expected)
+
+        # the counties add up to the national histogram
+        counties = sum(
+            get_histogram_counts(histograms, measure, county)["Count"].to_numpy()
+            for county in histograms.counties
+        )
+        np.testing.assert_array_equal(counties, national["Count"].to_numpy())
+
+    assert get_histogram_counts(histograms, measure, "Atlantis")["Count"].sum() == 0
+
+
+def test_etl_writes_connector_table(ncr, ncr_data_dir):
+    data_version = load_data_version(data_dir=ncr_data_dir)
+    connectors = load_connector_table(data_version, data_dir=ncr_data_dir)
+
+    pd.testing.assert_frame_equal(connectors, get_connector_table(ncr))
+    assert load_connector_table("stale", data_dir=ncr_data_dir) is None
@@ -1,15 +1,17 @@
 import pandas as pd
-import pytest
 
+from benchmarks.fixtures import make_raw_registry, to_raw_csv
 from utils.definitions import Definition
+from utils.etl import (
+    EtlReport,
+    clean_ncr_data,
+    load_cleaned_data,
+    load_data_version,
+    save_cleaned_data,
+)
 from utils.processor import get_summary_data
 
 
-@pytest.fixture
-def ncr() -> pd.DataFrame:
-    return pd.read_csv(filepath_or_buffer="./data/ncr_data_cleaned.csv")
-
-
 def test_column_existence(ncr):
     difference = pd.Index(Definition.COLUMNS_NEEDED.values()).difference(ncr.columns)
 
@@ -30,3 +32,131 @@ def test_summary_types(ncr):
             isinstance(summary_data.total_chargers, int),
         ]
     )
+
+
+def test_columnar_roundtrip(ncr, tmp_path):
+    save_cleaned_data(ncr, data_dir=tmp_path, export_csv=True)
+
+    assert (tmp_path / Definition.CLEANED_DATA_CSV).exists()
+    pd.testing.assert_frame_equal(
+        load_cleaned_data(data_dir=tmp_path),
+        ncr.reset_index(drop=True),
+    )
+
+
+def test_shared_load_matches_default(ncr, ncr_data_dir):
+    shared = load_cleaned_data(data_dir=ncr_data_dir, shared=True)
+
+    assert isinstance(shared["Name"].dtype, pd.ArrowDtype)
+    assert isinstance(shared["Latitude"].dtype, pd.ArrowDtype)
+    assert shared.isna().equals(ncr.isna())
+    pd.testing.assert_frame_equal(
+        shared.astype(object).where(shared.notna(), None),
+        ncr.astype(object).where(ncr.notna(), None),
+    )
+
+
+def test_cleaned_data_follows_schema(ncr, tmp_path):
+    assert ncr.dtypes.to_dict() == Definition.COLUMN_DTYPES
+    assert set(ncr["24-hour Access"].dropna()) == {"No", "Yes"}
+
+    # csv exports of older versions of the etl are cast on load
+    ncr.to_csv(tmp_path / Definition.CLEANED_DATA_CSV, index=False)
+    legacy = load_cleaned_data(data_dir=tmp_path)
+
+    assert legacy.dtypes.to_dict() == Definition.COLUMN_DTYPES
+    pd.testing.assert_frame_equal(
+        legacy.astype(object).where(legacy.notna(), None),
+        ncr.astype(object).where(ncr.notna(), None),
+    )
+
+
+def test_chunked_etl_matches_single_chunk(ncr, registry_server, tmp_path):
+    clean_ncr_data(url=registry_server.url, data_dir=tmp_path, chunksize=700)
+
+    pd.testing.assert_frame_equal(load_cleaned_data(data_dir=tmp_path), ncr)
+
+
+def test_parallel_etl_matches_serial(snapshot_server, raw_registry, tmp_path):
+    # quoted fields with commas and newlines must not split a partition
+    registry = raw_registry.copy()
+    registry.loc[10, "name"] = 'Unit 3, "The Yard"\nRear entrance'
+    registry.loc[3_000, "street"] = 'Dock "B"\n\nGate 2'
+    snapshot_server.publish(to_raw_csv(registry))
+
+    for workers in [1, 3]:
+        clean_ncr_data(
+            url=snapshot_server.url,
+            data_dir=tmp_path / str(workers),
+            chunksize=700,
+            workers=workers,
+        )
+
+    assert load_data_version(data_dir=tmp_path / "1") == load_data_version(
+        data_dir=tmp_path / "3"
+    )
+    for name in [
+        Definition.CLEANED_DATA_FEATHER,
+        Definition.SUMMARY_JSON,
+        Definition.CONNECTORS_FEATHER,
+        Definition.ROW_HASHES_FEATHER,
+    ]:
+        assert (tmp_path / "1" / name).read_bytes() == (
+            tmp_path / "3" / name
+        ).read_bytes()
+
+
+def test_etl_filters_rows(ncr, raw_registry):
+    assert ncr["Charge Device ID"].notna().all()
+    assert ncr["Latitude"].between(49, 61).all()
+    assert ncr["Longitude"].between(-8, 2).all()
+    assert ncr.shape[0] < raw_registry.shape[0]
+
+
+def test_incremental_etl_skips_unchanged_source(
+    snapshot_server, raw_registry, tmp_path
+):
+    snapshot_server.publish(to_raw_csv(raw_registry))
+    clean_ncr_data(url=snapshot_server.url, data_dir=tmp_path)
+
+    report = clean_ncr_data(
+        url=snapshot_server.url, data_dir=tmp_path, incremental=True
+    )
+
+    assert report == EtlReport(inserted=0, updated=0, deleted=0)
+    assert (snapshot_server.requests, snapshot_server.downloads) == (2, 1)
+
+
+def test_incremental_etl_matches_full_clean(snapshot_server, raw_registry, tmp_path):
+    snapshot_server.publish(to_raw_csv(raw_registry))
+    clean_ncr_data(url=snapshot_server.url, data_dir=tmp_path / "incremental")
+    initial = load_cleaned_data(data_dir=tmp_path / "incremental")
+
+    # drop some devices, change others and add new ones
+    snapshot = pd.concat(
+        [raw_registry.iloc[100:], make_raw_registry(n_rows=50, seed=7)],
+        ignore_index=True,
+    )
+    snapshot["chargeDeviceID"] = snapshot["chargeDeviceID"].where(
+        snapshot.index < raw_registry.shape[0] - 100,
+        "new" + snapshot["chargeDeviceID"],
+    )
+    snapshot.loc[200:229, "county"] = "Essesx"
+    snapshot_server.publish(to_raw_csv(snapshot))
+
+    report = clean_ncr_data(
+        url=snapshot_server.url,
+        data_dir=tmp_path / "incremental",
+        incremental=True,
+    )
+    clean_ncr_data(url=snapshot_server.url, data_dir=tmp_path / "full")
+
+    before = set(initial["Charge Device ID"])
+    after = set(load_cleaned_data(data_dir=tmp_path / "full")["Charge Device ID"])
+    assert report.inserted == len(after - before)
+    assert report.deleted == len(before - after)
+    assert report.updated > 0
+    pd.testing.assert_frame_equal(
+        load_cleaned_data(data_dir=tmp_path / "incremental"),
+        load_cleaned_data(data_dir=tmp_path / "full"),
+    )
@@ -0,0 +1,87 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.export import get_export_filename, iter_export
+
+
+@pytest.fixture
+def selection(ncr) -> np.ndarray:
+    return np.flatnonzero(ncr["County"] == "Edinburgh")
+
+
+def _export(ncr, positions, export_format) -> tuple[list[bytes], bytes]:
+    chunks = list(iter_export(ncr, positions, export_format, chunk_rows=100))
+    return chunks, b"".join(chunks)
+
+
+def test_csv_export_matches_frame(ncr, selection):
+    chunks, body = _export(ncr, selection, "csv")
+
+    # the header, then a chunk per 100 rows
+    assert len(chunks) == 1 + -(-selection.shape[0] // 100)
+    assert body.decode() == ncr.iloc[selection].to_csv(index=False)
+
+
+def test_parquet_export_matches_frame(ncr, selection):
+    _, body = _export(ncr, selection, "parquet")
+
+    pd.testing.assert_frame_equal(
+        pd.read_parquet(io.BytesIO(body)),
+        ncr.iloc[selection].reset_index(drop=True),
+    )
+
+    _, body = _export(ncr, selection[:0], "parquet")
+    empty = pd.read_parquet(io.BytesIO(body))
+    assert empty.empty and list(empty.columns) == list(ncr.columns)
+
+
+def test_geojson_export_has_a_feature_per_charger(ncr, selection):
+    _, body = _export(ncr, selection, "geojson")
+    features = json.loads(body)["features"]
+    county = ncr.iloc[selection]
+
+    assert len(features) == county.shape[0]
+    assert features[0]["geometry"]["coordinates"] == [
+        county["Longitude"].iloc[0],
+        county["Latitude"].iloc[0],
+    ]
+    assert [f["properties"]["Charge Device ID"] for f in features] == county[
+        "Charge Device ID"
+    ].tolist()
+
+    _, body = _export(ncr, selection[:0], "geojson")
+    assert json.loads(body) == {"type": "FeatureCollection", "features": []}
+
+
+def test_geojson_export_writes_non_finite_floats_as_null(ncr, selection):
+    ncr = ncr.copy()
+    column = "Connector 1 Rated Output (kW)"
+    ncr.loc[ncr.index[selection[:3]], column] = [np.inf, -np.inf, np.nan]
+
+    _, body = _export(ncr, selection[:4], "geojson")
+    features = json.loads(body, parse_constant=pytest.fail)["features"]
+
+    assert [f["properties"][column] for f in features[:3]] == [None, None, None]
+    assert features[3]["properties"][column] == ncr[column].iloc[selection[3]]
+
+
+def test_export_filename_is_header_safe():
+    assert get_export_filename("Edinburgh", "csv") == "chargepoints-edinburgh.csv"
+    assert (
+        get_export_filename("Bath and North East Somerset", "parquet")
+        == "chargepoints-bath-and-north-east-somerset.parquet"
+    )
+    assert (
+        get_export_filename('x"; filename=evil.exe\r\n', "csv")
+        == "chargepoints-x-filename-evil-exe.csv"
+    )
+    assert get_export_filename("!?", "geojson") == "chargepoints.geojson"
+
+
+def test_unknown_export_format(ncr, selection):
+    with pytest.raises(ValueError):
+        iter_export(ncr, selection, "xlsx")
@@ -0,0 +1,118 @@
+import json
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+
+from utils.filters import get_filter_index, get_filters_key
+from utils.processor import get_column_value_counts, get_county_index
+from utils.viewport import ViewportIndex, get_viewport_route
+
+from .asgi import asgi_get
+
+
+def _any_column(ncr, columns: list[str], condition) -> pd.Series:
+    return pd.concat([condition(ncr[column]) for column in columns], axis=1).any(axis=1)
+
+
+def test_filters_match_masks(ncr):
+    filter_index = get_filter_index(ncr)
+    connector_type = filter_index.choices("Connector Type")[0]
+    county = filter_index.choices("County")[0]
+
+    bitmap = filter_index.select(
+        {
+            "County": [county],
+            "Connector Type": [connector_type],
+            "Rated Output": ["Slow (below 7 kW)", "Fast (7 to under 25 kW)"],
+            "Payment Required": ["No"],
+        }
+    )
+    mask = (
+        (ncr["County"] == county)
+        & _any_column(
+            ncr,
+            [f"Connector {i} Type" for i in range(1, 4)],
+            lambda values: values == connector_type,
+        )
+        & _any_column(
+            ncr,
+            [f"Connector {i} Rated Output (kW)" for i in range(1, 4)],
+            lambda values: values < 25,
+        )
+        & (ncr["Payment Required"] == "No")
+    )
+
+    np.testing.assert_array_equal(filter_index.positions(bitmap), np.flatnonzero(mask))
+    assert filter_index.count(bitmap) == mask.sum()
+
+    # bitmaps combine with | for filters across attributes
+    either = filter_index.bitmap("Payment Required", ["No"]) | filter_index.bitmap(
+        "24-hour Access", ["Yes"]
+    )
+    np.testing.assert_array_equal(
+        filter_index.positions(either),
+        np.flatnonzero(
+            (ncr["Payment Required"] == "No") | (ncr["24-hour Access"] == "Yes")
+        ),
+    )
+
+
+def test_value_counts_match_frame_counts(ncr):
+    filter_index = get_filter_index(ncr)
+    bitmap = filter_index.select({"Device Status": ["In service"]})
+    filtered = ncr[ncr["Device Status"] == "In service"]
+
+    for column in ["24-hour Access", "Location Type"]:
+        expected = get_column_value_counts(filtered, column, top_n=None)
+
+        pd.testing.assert_frame_equal(
+            filter_index.value_counts(bitmap, column), expected
+        )
+
+
+def test_empty_filters_select_everything(ncr):
+    filter_index = get_filter_index(ncr)
+
+    assert filter_index.count(filter_index.select({})) == ncr.shape[0]
+    assert filter_index.count(filter_index.bitmap("Device Status", ["Missing"])) == 0
+    assert get_filters_key({"A": ["y", "x"], "B": ["z"]}) == get_filters_key(
+        {"B": ["z"], "A": ["x", "y"]}
+    )
+
+
+def test_viewport_route_applies_filters(ncr):
+    filter_index = get_filter_index(ncr)
+    viewport_index = ViewportIndex(ncr, get_county_index(ncr))
+    app = get_viewport_route(viewport_index, filter_index=filter_index)
+
+    county = filter_index.choices("County")[0]
+    filters = {"Payment Required": ["No"]}
+    params = dict(county=county, south=49, west=-8, north=61, east=2, zoom=5)
+
+    status, body = asgi_get(
+        app, "/api/viewport?" + urlencode({**params, "filters": json.dumps(filters)})
+    )
+    features = json.loads(body)["features"]
+
+    assert status == 200
+    assert sum(feature["properties"].get("count", 1) for feature in features) == (
+        ((ncr["County"] == county) & (ncr["Payment Required"] == "No")).sum()
+    )
+
+    status, _ = asgi_get(
+        app, "/api/viewport?" + urlencode({**params, "filters": '{"Owner": ["x"]}'})
+    )
+    assert status == 400
+
+
+def test_within_matches_positions(ncr):
+    filter_index = get_filter_index(ncr)
+    bitmap = filter_index.select({"Device Status": ["In service"]})
+    county_positions = np.flatnonzero(ncr["County"] == "Edinburgh")
+
+    np.testing.assert_array_equal(
+        filter_index.within(bitmap, county_positions),
+        np.intersect1d(filter_index.positions(bitmap), county_positions),
+    )
+    assert filter_index.within(bitmap, county_positions[:0]).shape == (0,)
@@ -0,0 +1,56 @@
+import numpy as np
+
+from utils.definitions import Definition
+from utils.etl import load_data_version
+from utils.indexes import get_indexes, load_indexes, save_indexes
+
+
+def test_etl_writes_indexes_that_match_built_ones(ncr, ncr_data_dir):
+    path = ncr_data_dir / Definition.INDEXES_DIR
+    loaded = load_indexes(
+        path, df=ncr, data_version=load_data_version(data_dir=ncr_data_dir)
+    )
+    built = get_indexes(ncr)
+
+    assert list(loaded.county_index) == list(built.county_index)
+    for county, positions in built.county_index.items():
+        np.testing.assert_array_equal(loaded.county_index[county], positions)
+    # views of the mapped file, not copies
+    assert not loaded.county_index[county].flags.writeable
+
+    for query in ["Edinbrugh", "glasgo", "Kent", "grater manchster", "zzzz"]:
+        assert loaded.search_index.search(query) == built.search_index.search(query)
+
+    filters = {"Device Status": ["In service"], "24-hour Access": ["Yes"]}
+    np.testing.assert_array_equal(
+        loaded.filter_index.select(filters), built.filter_index.select(filters)
+    )
+    for attribute in Definition.FILTER_ATTRIBUTES:
+        assert loaded.filter_index.choices(attribute) == built.filter_index.choices(
+            attribute
+        )
+
+    latitude, longitude = ncr["Latitude"].iloc[0], ncr["Longitude"].iloc[0]
+    for loaded_part, built_part in zip(
+        loaded.spatial_index.nearest(latitude, longitude, k=10),
+        built.spatial_index.nearest(latitude, longitude, k=10),
+    ):
+        np.testing.assert_array_equal(loaded_part, built_part)
+
+    county = ncr["County"].value_counts().index[0]
+    for zoom in [5, 12, Definition.MAX_CLUSTER_ZOOM]:
+        assert loaded.viewport_index.query(
+            county, 49, -8, 61, 2, zoom=zoom
+        ) == built.viewport_index.query(county, 49, -8, 61, 2, zoom=zoom)
+
+    assert load_indexes(path, df=ncr, data_version="stale") is None
+    assert load_indexes(ncr_data_dir / "missing", df=ncr, data_version="v1") is None
+
+
+def test_indexes_of_no_chargers_roundtrip(ncr, tmp_path):
+    save_indexes(get_indexes(ncr.iloc[:0]), tmp_path / "indexes", data_version="v1")
+    loaded = load_indexes(tmp_path / "indexes", df=ncr.iloc[:0], data_version="v1")
+
+    assert loaded.county_index == {}
+    assert loaded.search_index.search("Kent") == []
+    assert loaded.filter_index.count(loaded.filter_index.select({})) == 0
@@ -0,0 +1,90 @@
+from shiny import ui
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+from utils.metrics import (
+    PAYLOAD_BYTES,
+    RENDER_SECONDS,
+    Histogram,
+    get_metrics_route,
+    instrument,
+    payload_size,
+)
+
+from .asgi import asgi_get
+
+
+def test_histogram_exposition():
+    histogram = Histogram("test_seconds", "Test.", (1.0, 2.0), ("output", "county"))
+    for value in [0.5, 1.5, 3.0]:
+        histogram.observe(value, "map", 'Say "hi"')
+
+    lines = histogram.expose().splitlines()
+    labels = 'output="map",county="Say \\"hi\\""'
+
+    assert lines[1] == "# TYPE test_seconds histogram"
+    assert f'test_seconds_bucket{{{labels},le="1.0"}} 1' in lines
+    assert f'test_seconds_bucket{{{labels},le="2.0"}} 2' in lines
+    assert f'test_seconds_bucket{{{labels},le="+Inf"}} 3' in lines
+    assert f"test_seconds_sum{{{labels}}} 5.0" in lines
+    assert f"test_seconds_count{{{labels}}} 3" in lines
+
+
+def test_instrument_is_a_noop_when_disabled():
+    def render():
+        return "text"
+
+    assert instrument("noop", enabled=False)(render) is render
+
+
+def test_instrument_records_timing_and_payload():
+    @instrument("test_output", county=lambda: "Fife", counties={"Fife"}, enabled=True)
+    def render():
+        return ui.HTML("<b>charger</b>")
+
+    assert str(render()) == "<b>charger</b>"
+    assert 'ncr_render_seconds_count{output="test_output",county="Fife"} 1' in (
+        RENDER_SECONDS.expose()
+    )
+    assert 'ncr_render_payload_bytes_sum{output="test_output",county="Fife"} 14.0' in (
+        PAYLOAD_BYTES.expose()
+    )
+
+
+def test_payload_size_of_figures():
+    import plotly.graph_objects as go
+
+    figure = go.Figure(go.Pie(labels=["Yes", "No"], values=[3, 1]))
+
+    assert payload_size(figure) == len(figure.to_json().encode("utf-8"))
+    assert payload_size(object()) is None
+
+
+def test_instrument_labels_unknown_counties_as_other():
+    typed = []
+
+    @instrument("test_typed", county=lambda: typed[-1], counties={"Fife"}, enabled=True)
+    def render():
+        return "text"
+
+    for text in ["Fife", "fif", "anything at all", "Fife"]:
+        typed.append(text)
+        render()
+
+    exposed = RENDER_SECONDS.expose()
+    assert 'ncr_render_seconds_count{output="test_typed",county="Fife"} 2' in exposed
+    assert 'ncr_render_seconds_count{output="test_typed",county="other"} 2' in exposed
+    assert exposed.count('output="test_typed"') == 2 * (len(RENDER_SECONDS.buckets) + 3)
+
+
+def test_metrics_route_is_mounted_next_to_the_app():
+    async def shiny_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"shiny"})
+
+    app = Starlette(routes=[get_metrics_route(), Mount("/", app=shiny_app)])
+    status, body = asgi_get(app, "/metrics")
+
+    assert status == 200
+    assert b"# TYPE ncr_render_seconds histogram" in body
+    assert asgi_get(app, "/") == (200, b"shiny")
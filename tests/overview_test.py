@@ -0,0 +1,66 @@
+import gzip
+
+from utils.definitions import Definition
+from utils.etl import load_data_version
+from utils.overview import (
+    get_plotlyjs_page,
+    get_static_page,
+    get_static_page_route,
+    load_overview,
+    render_overview,
+)
+from utils.processor import get_summary_data
+
+from .asgi import asgi_request
+
+
+def test_etl_writes_overview(ncr, ncr_data_dir):
+    path = ncr_data_dir / Definition.OVERVIEW_JSON
+    html = load_overview(path, data_version=load_data_version(data_dir=ncr_data_dir))
+
+    assert html == render_overview(get_summary_data(ncr))
+    assert load_overview(path, data_version="stale") is None
+
+
+def test_static_page_route_serves_compressed_page(ncr):
+    calls = []
+
+    def get_page():
+        calls.append(1)
+        return get_static_page(render_overview(get_summary_data(ncr)), "v1")
+
+    app = get_static_page_route(path=Definition.OVERVIEW_ROUTE, get_page=get_page)
+
+    etag = f'"{Definition.OVERVIEW_VERSION}-v1"'
+    status, headers, body = asgi_request(app, Definition.OVERVIEW_ROUTE)
+    assert status == 200
+    assert headers["etag"] == etag
+    assert "content-encoding" not in headers
+    assert b"plotly" in body
+
+    status, headers, gzipped = asgi_request(
+        app, Definition.OVERVIEW_ROUTE, headers={"Accept-Encoding": "gzip, br"}
+    )
+    assert (status, headers["content-encoding"]) == (200, "gzip")
+    assert gzip.decompress(gzipped) == body
+    assert len(gzipped) < len(body)
+
+    status, _, body = asgi_request(
+        app, Definition.OVERVIEW_ROUTE, headers={"If-None-Match": etag}
+    )
+    assert (status, body) == (304, b"")
+    assert len(calls) == 3
+
+
+def test_overview_loads_plotlyjs_from_the_app(ncr):
+    html = render_overview(get_summary_data(ncr))
+    assert "cdn.plot.ly" not in html
+    assert 'src="plotly.min.js"' in html
+
+    app = get_static_page_route(
+        path=Definition.PLOTLYJS_ROUTE, get_page=get_plotlyjs_page
+    )
+    status, headers, body = asgi_request(app, Definition.PLOTLYJS_ROUTE)
+    assert status == 200
+    assert headers["content-type"].startswith("text/javascript")
+    assert body == get_plotlyjs_page().body
@@ -0,0 +1,35 @@
+import pandas as pd
+
+from utils.plotter import get_map, get_tooltips
+
+
+def test_tooltips_match_rowwise(ncr):
+    county = ncr[ncr["County"] == "Edinburgh"]
+
+    expected = [
+        "<br>".join(
+            [
+                f"<b>{key}:</b> {value}"
+                for key, value in row.to_dict().items()
+                if pd.notna(value)
+            ]
+        )
+        for _, row in county.iterrows()
+    ]
+
+    assert get_tooltips(county).tolist() == expected
+
+
+def test_map_has_a_marker_per_charger(ncr):
+    county = ncr[ncr["County"] == "Edinburgh"]
+    html = get_map(county).get_root().render()
+
+    assert html.count('"type": "Feature"') == county.shape[0]
+    assert "</b>" not in html
+
+
+def test_map_of_no_chargers_shows_the_uk(ncr):
+    html = get_map(ncr.iloc[:0]).get_root().render()
+
+    assert '"type": "Feature"' not in html
+    assert "54.5" in html
@@ -0,0 +1,64 @@
+import pandas as pd
+
+from utils.definitions import Definition
+from utils.etl import load_data_version
+from utils.processor import (
+    get_accessibility_counts,
+    get_column_value_counts,
+    get_county_data,
+    get_county_index,
+    get_county_value_counts,
+    get_summary_data,
+    load_summary_data,
+    save_summary_data,
+)
+
+
+def test_county_index_matches_mask(ncr):
+    county_index = get_county_index(ncr)
+
+    for county in get_summary_data(ncr).counties + ["Not A County"]:
+        pd.testing.assert_frame_equal(
+            get_county_data(ncr, county_index, county),
+            ncr[ncr["County"] == county],
+        )
+
+
+def test_accessibility_counts_match_value_counts(ncr):
+    accessibility_counts = get_accessibility_counts(ncr)
+
+    for county in get_summary_data(ncr).counties + ["Not A County"]:
+        value_counts = get_county_value_counts(accessibility_counts, county)
+
+        for column_name in Definition.TAB_NAMES["Accessibility"]:
+            expected = get_column_value_counts(
+                ncr[ncr["County"] == county], column_name, top_n=None
+            )
+            pd.testing.assert_frame_equal(value_counts[column_name], expected)
+
+
+def test_summary_sidecar_roundtrip(ncr, tmp_path):
+    summary_data = get_summary_data(ncr)
+    save_summary_data(summary_data, tmp_path / "summary.json", data_version="v1")
+
+    loaded = load_summary_data(tmp_path / "summary.json", data_version="v1")
+
+    assert loaded.counties == summary_data.counties
+    assert loaded.total_chargers == summary_data.total_chargers
+    assert loaded.county_with_most_chargers == summary_data.county_with_most_chargers
+    for k, v in summary_data.top_ten.items():
+        pd.testing.assert_frame_equal(
+            loaded.top_ten[k], v.reset_index(drop=True), check_dtype=False
+        )
+    assert load_summary_data(tmp_path / "summary.json", data_version="v2") is None
+    assert load_summary_data(tmp_path / "missing.json", data_version="v1") is None
+
+
+def test_etl_writes_current_summary_sidecar(ncr, ncr_data_dir):
+    loaded = load_summary_data(
+        ncr_data_dir / Definition.SUMMARY_JSON,
+        data_version=load_data_version(data_dir=ncr_data_dir),
+    )
+
+    assert loaded is not None
+    assert loaded.counties == get_summary_data(ncr).counties
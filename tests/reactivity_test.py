@@ -0,0 +1,71 @@
+import asyncio
+
+from shiny import reactive
+
+from utils.reactivity import debounce, latest_task
+
+
+def test_debounce_takes_the_first_and_the_settled_value():
+    async def run() -> list[str]:
+        source = reactive.value("a")
+        seen = []
+
+        @debounce(0.2)
+        def settled() -> str:
+            return source()
+
+        @reactive.effect
+        def _():
+            seen.append(settled())
+
+        await reactive.flush()
+
+        # a change after a quiet spell is taken at once, the rest of the
+        # burst only once it settles
+        await asyncio.sleep(0.3)
+        for value in "bcde":
+            source.set(value)
+            await reactive.flush()
+            await asyncio.sleep(0.02)
+        assert seen == ["a", "b"]
+
+        await asyncio.sleep(0.4)
+        await reactive.flush()
+
+        return seen
+
+    assert asyncio.run(run()) == ["a", "b", "e"]
+
+
+def test_latest_task_shows_only_the_newest_request():
+    async def run() -> tuple[list[str], list[str]]:
+        request = reactive.value("a")
+        started = []
+        shown = []
+
+        @latest_task(lambda: (request(),))
+        async def task(county: str) -> str:
+            started.append(county)
+            await asyncio.sleep(0.2)
+            return county
+
+        @reactive.effect
+        def _():
+            shown.append(task.result())
+
+        await reactive.flush()
+        await asyncio.sleep(0.05)
+
+        # a is in flight when b and c come in, b has not started by then
+        for county in "bc":
+            request.set(county)
+            await reactive.flush()
+
+        await asyncio.sleep(0.4)
+        await reactive.flush()
+
+        return started, shown
+
+    started, shown = asyncio.run(run())
+    assert started == ["a", "c"]
+    assert shown == ["c"]
@@ -0,0 +1,32 @@
+from utils.search import SearchIndex, get_search_index
+
+
+def test_search_ranks_prefix_and_typos(ncr):
+    index = get_search_index(ncr)
+
+    assert index.resolve("Edinbrugh") == "Edinburgh"
+    assert index.resolve("glasgo") == "Glasgow"
+    assert index.resolve("argyll & bute") == "Argyll And Bute"
+
+    matches = index.search("grater manchster", k=3)
+    assert matches[0].name == "Greater Manchester"
+    assert matches[0].kind == "County"
+    assert not matches[0].prefix
+
+    matches = index.search("Kent", k=3)
+    assert matches[0].name == "Kent" and matches[0].prefix
+    assert all(match.county == "Kent" for match in matches)
+
+
+def test_search_resolves_towns_to_their_county():
+    index = SearchIndex(
+        names=["Fife", "St Andrews"],
+        kinds=["County", "Town"],
+        counties=["Fife", "Fife"],
+    )
+
+    assert index.resolve("st andrew") == "Fife"
+    assert index.resolve("St Andrwes") == "Fife"
+    assert index.resolve("zzzz") is None
+    assert index.resolve("") is None
+    assert index.search("!?") == []
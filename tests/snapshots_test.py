@@ -0,0 +1,97 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from benchmarks.fixtures import make_raw_registry, to_raw_csv
+from utils.definitions import Definition
+from utils.etl import (
+    clean_ncr_data,
+    list_snapshots,
+    load_cleaned_data,
+    load_data_version,
+    load_snapshot,
+)
+from utils.snapshots import load_trends
+
+FETCH_DATES = [date(2024, 9, 1), date(2024, 10, 1), date(2024, 11, 1)]
+
+
+def _sorted(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(["Charge Device ID", "Latitude"], ignore_index=True)
+
+
+@pytest.fixture
+def archive(snapshot_server, raw_registry, tmp_path) -> dict[str, pd.DataFrame]:
+    # three runs that drop, change and add devices, and their cleaned outputs
+    snapshots = [
+        raw_registry,
+        pd.concat(
+            [raw_registry.iloc[100:], make_raw_registry(n_rows=50, seed=7)],
+            ignore_index=True,
+        ),
+        raw_registry.iloc[:4_000],
+    ]
+    snapshots[1]["chargeDeviceID"] = snapshots[1]["chargeDeviceID"].where(
+        snapshots[1].index < raw_registry.shape[0] - 100,
+        "new" + snapshots[1]["chargeDeviceID"],
+    )
+    snapshots[1].loc[200:229, "county"] = "Essesx"
+
+    cleaned = {}
+    for snapshot, fetch_date in zip(snapshots, FETCH_DATES):
+        snapshot_server.publish(to_raw_csv(snapshot))
+        clean_ncr_data(
+            url=snapshot_server.url, data_dir=tmp_path, fetch_date=fetch_date
+        )
+        cleaned[fetch_date.isoformat()] = load_cleaned_data(data_dir=tmp_path)
+
+    return cleaned
+
+
+def test_snapshots_replay_every_run(archive, tmp_path):
+    assert list_snapshots(tmp_path) == list(archive)
+
+    for fetch_date, cleaned in archive.items():
+        pd.testing.assert_frame_equal(
+            _sorted(load_snapshot(fetch_date, data_dir=tmp_path)), _sorted(cleaned)
+        )
+
+    # later snapshots only hold the devices that changed
+    delta = pd.read_feather(
+        tmp_path / Definition.SNAPSHOTS_DIR / f"{FETCH_DATES[1].isoformat()}.feather"
+    )
+    assert delta.shape[0] < archive[FETCH_DATES[0].isoformat()].shape[0] / 10
+
+
+def test_trends_count_every_snapshot(archive, snapshot_server, tmp_path):
+    trends = load_trends(tmp_path / Definition.TRENDS_JSON)
+
+    assert trends.dates == list(archive)
+    assert trends.total_chargers == [df.shape[0] for df in archive.values()]
+    assert trends.in_service_chargers == [
+        (df["Device Status"] == "In service").sum() for df in archive.values()
+    ]
+    for county, counts in trends.county_chargers.items():
+        assert counts == [(df["County"] == county).sum() for df in archive.values()]
+
+    # a missing sidecar is rebuilt from the archive on the next run, which
+    # replaces the snapshot of the same day
+    (tmp_path / Definition.TRENDS_JSON).unlink()
+    clean_ncr_data(
+        url=snapshot_server.url, data_dir=tmp_path, fetch_date=FETCH_DATES[-1]
+    )
+
+    assert load_trends(tmp_path / Definition.TRENDS_JSON) == trends
+
+
+def test_snapshots_are_append_only(archive, snapshot_server, tmp_path):
+    data_version = load_data_version(data_dir=tmp_path)
+
+    with pytest.raises(ValueError):
+        clean_ncr_data(
+            url=snapshot_server.url, data_dir=tmp_path, fetch_date=date(2024, 1, 1)
+        )
+
+    assert load_data_version(data_dir=tmp_path) == data_version
+    assert list_snapshots(tmp_path) == list(archive)
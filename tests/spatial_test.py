@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from utils.definitions import Definition
+from utils.spatial import (
+    get_nearby_chargers,
+    get_nearest_k,
+    get_postcode_locations,
+    get_spatial_index,
+    haversine_km,
+    locate_postcode,
+)
+
+
+def test_spatial_index_matches_scan(ncr):
+    spatial_index = get_spatial_index(ncr)
+    latitude, longitude = ncr["Latitude"].to_numpy(), ncr["Longitude"].to_numpy()
+
+    for point in np.random.default_rng(0).integers(0, ncr.shape[0], 20):
+        distances = haversine_km(latitude[point], longitude[point], latitude, longitude)
+        within = spatial_index.within(
+            latitude[point], longitude[point], Definition.DISTANCE_THRESHOLD
+        )
+        nearest, nearest_distances = spatial_index.nearest(
+            latitude[point], longitude[point], k=10
+        )
+
+        np.testing.assert_array_equal(
+            within, np.flatnonzero(distances <= Definition.DISTANCE_THRESHOLD)
+        )
+        np.testing.assert_array_equal(nearest, np.argsort(distances)[:10])
+        np.testing.assert_allclose(nearest_distances, np.sort(distances)[:10])
+
+
+def test_nearby_chargers(ncr):
+    nearby = get_nearby_chargers(
+        ncr, get_spatial_index(ncr), 55.953, -3.188, k=ncr.shape[0] + 1
+    )
+
+    assert nearby.nearest.shape[0] == ncr.shape[0]
+    assert nearby.nearest["Distance (km)"].is_monotonic_increasing
+    assert (
+        nearby.within_radius.shape[0]
+        == (nearby.nearest["Distance (km)"] <= Definition.DISTANCE_THRESHOLD).sum()
+    )
+
+
+def test_nearest_k_from_any_number(ncr):
+    spatial_index = get_spatial_index(ncr)
+
+    assert get_nearest_k(2.5) == 2
+    assert get_nearest_k(-1) == 1
+    assert get_nearest_k(1e9) == Definition.NEAREST_MAX_K
+    assert get_nearest_k(None) == Definition.NEAREST_K
+
+    nearby = get_nearby_chargers(
+        ncr, spatial_index, 55.953, -3.188, k=get_nearest_k(2.5)
+    )
+    assert nearby.nearest.shape[0] == 2
+
+    positions, distances = spatial_index.nearest(55.953, -3.188, k=-1)
+    assert positions.size == distances.size == 0
+
+
+def test_locate_postcode():
+    df = pd.DataFrame(
+        {
+            "Postcode": ["EH1 1YZ", "EH1 2AB", "G1 1AA", None],
+            "Latitude": [55.0, 56.0, 57.0, 58.0],
+            "Longitude": [-3.0, -4.0, -5.0, -6.0],
+        }
+    )
+    postcode_locations = get_postcode_locations(df)
+
+    assert locate_postcode(postcode_locations, "eh11yz") == (55.0, -3.0)
+    assert locate_postcode(postcode_locations, "EH1") == (55.5, -3.5)
+    assert locate_postcode(postcode_locations, "EH1 9ZZ") == (55.5, -3.5)
+    assert locate_postcode(postcode_locations, "ZZ9 9ZZ") is None
+    assert locate_postcode(postcode_locations, " ") is None
@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# seconds a cold `import app` may take, override for slower machines
+IMPORT_BUDGET = float(os.getenv("NCR_IMPORT_BUDGET", 3.0))
+
+# only needed once a session renders, see utils/plotter.py
+LAZY_MODULES = ["folium", "leafmap", "plotly.express", "plotly.subplots"]
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import app
+print(json.dumps(dict(
+    seconds=time.perf_counter() - start,
+    eager=[m for m in {LAZY_MODULES!r} if m in sys.modules],
+)))
+"""
+
+
+def _cold_import(data_dir: Path) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=Path(__file__).resolve().parents[1],
+        env={**os.environ, "NCR_DATA_DIR": str(data_dir)},
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_cold_import_within_budget(ncr_data_dir):
+    probe = _cold_import(ncr_data_dir)
+
+    assert probe["seconds"] < IMPORT_BUDGET
+    assert probe["eager"] == []
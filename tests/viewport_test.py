@@ -0,0 +1,128 @@
+import json
+
+import numpy as np
+
+from utils.definitions import Definition
+from utils.plotter import get_tooltips, get_viewport_map
+from utils.processor import get_county_data, get_county_index
+from utils.viewport import ViewportIndex, get_viewport_route
+
+from .asgi import asgi_get
+
+
+def _viewport(latitude: float, longitude: float, zoom: int) -> tuple[float, ...]:
+    # the bounds of a 1000 x 600 px map centred on a point
+    degrees_per_px = 360 / (256 * 2**zoom)
+    half_height = 300 * degrees_per_px * np.cos(np.radians(latitude))
+    half_width = 500 * degrees_per_px
+
+    return (
+        latitude - half_height,
+        longitude - half_width,
+        latitude + half_height,
+        longitude + half_width,
+    )
+
+
+def _largest_county(ncr) -> str:
+    return ncr["County"].value_counts().index[0]
+
+
+def test_clusters_count_every_charger(ncr):
+    county = _largest_county(ncr)
+    viewport_index = ViewportIndex(ncr, get_county_index(ncr))
+
+    features = viewport_index.query(county, 49, -8, 61, 2, zoom=5)["features"]
+
+    assert any("count" in feature["properties"] for feature in features)
+    assert sum(feature["properties"].get("count", 1) for feature in features) == (
+        (ncr["County"] == county).sum()
+    )
+
+
+def test_dense_block_at_max_zoom_counts_every_charger(ncr):
+    county = _largest_county(ncr)
+    positions = np.flatnonzero(ncr["County"] == county)
+    n_dense = Definition.VIEWPORT_MAX_POINTS + 50
+    # a car park of chargers a few metres apart
+    ncr = ncr.copy()
+    latitude, longitude = 51.5, -0.12
+    offsets = np.arange(n_dense) * 1e-6
+    ncr.loc[ncr.index[positions[:n_dense]], "Latitude"] = latitude + offsets
+    ncr.loc[ncr.index[positions[:n_dense]], "Longitude"] = longitude + offsets
+    viewport_index = ViewportIndex(ncr, get_county_index(ncr))
+
+    features = viewport_index.query(
+        county,
+        *_viewport(latitude, longitude, Definition.MAX_CLUSTER_ZOOM),
+        zoom=Definition.MAX_CLUSTER_ZOOM,
+    )["features"]
+
+    assert any("count" in feature["properties"] for feature in features)
+    assert sum(feature["properties"].get("count", 1) for feature in features) == (
+        n_dense
+    )
+
+
+def test_payload_is_bounded_by_the_viewport(ncr):
+    county = _largest_county(ncr)
+    county_data = ncr[ncr["County"] == county]
+    viewport_index = ViewportIndex(ncr, get_county_index(ncr))
+
+    # cells of CLUSTER_CELL_PX that a 1000 x 600 px viewport can overlap
+    max_cells = (1000 // Definition.CLUSTER_CELL_PX + 2) * (
+        600 // Definition.CLUSTER_CELL_PX + 2
+    )
+    for zoom in range(5, Definition.MAX_CLUSTER_ZOOM + 1):
+        bounds = _viewport(
+            county_data["Latitude"].mean(), county_data["Longitude"].mean(), zoom
+        )
+        features = viewport_index.query(county, *bounds, zoom=zoom)["features"]
+
+        assert len(features) <= max(max_cells, Definition.VIEWPORT_MAX_POINTS)
+
+
+def test_points_carry_their_tooltips(ncr):
+    county = _largest_county(ncr)
+    county_index = get_county_index(ncr)
+    county_data = get_county_data(ncr, county_index, county)
+    viewport_index = ViewportIndex(ncr, county_index)
+
+    latitude, longitude = (
+        county_data["Latitude"].iloc[0],
+        county_data["Longitude"].iloc[0],
+    )
+    bounds = (latitude - 0.01, longitude - 0.01, latitude + 0.01, longitude + 0.01)
+    features = viewport_index.query(county, *bounds, zoom=16)["features"]
+
+    in_view = county_data[
+        county_data["Latitude"].between(bounds[0], bounds[2])
+        & county_data["Longitude"].between(bounds[1], bounds[3])
+    ]
+    assert [feature["properties"]["tooltip"] for feature in features] == (
+        get_tooltips(in_view).tolist()
+    )
+
+
+def test_viewport_route(ncr):
+    county = _largest_county(ncr)
+    app = get_viewport_route(viewport_index=ViewportIndex(ncr, get_county_index(ncr)))
+
+    status, body = asgi_get(
+        app,
+        f"{Definition.VIEWPORT_ROUTE}?county={county}"
+        "&south=49&west=-8&north=61&east=2&zoom=5",
+    )
+    assert status == 200
+    assert json.loads(body)["type"] == "FeatureCollection"
+
+    status, _ = asgi_get(app, f"{Definition.VIEWPORT_ROUTE}?county={county}")
+    assert status == 400
+
+
+def test_viewport_map_embeds_no_chargers(ncr):
+    county = _largest_county(ncr)
+    html = get_viewport_map(ncr[ncr["County"] == county], county=county)._repr_html_()
+
+    assert Definition.VIEWPORT_ROUTE.lstrip("/") in html
+    assert "&quot;type&quot;: &quot;Feature&quot;" not in html
@@ -0,0 +1,82 @@
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size_bytes: int
+    max_bytes: int
+
+
+class RenderCache:
+    # process-wide lru cache of rendered outputs (html and figure json) that
+    # evicts the least recently used entries once max_bytes is exceeded
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, str] = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable) -> str | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+
+            return value
+
+    def put(self, key: Hashable, value: str) -> None:
+        size = sys.getsizeof(value)
+
+        with self._lock:
+            if key in self._entries:
+                self._size_bytes -= sys.getsizeof(self._entries.pop(key))
+
+            # values larger than the whole budget are never kept
+            if size > self.max_bytes:
+                return None
+
+            while self._entries and self._size_bytes + size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size_bytes -= sys.getsizeof(evicted)
+                self._evictions += 1
+
+            self._entries[key] = value
+            self._size_bytes += size
+
+        return None
+
+    def get_or_render(self, key: Hashable, render: Callable[[], str]) -> str:
+        value = self.get(key)
+        if value is None:
+            # rendered outside the lock, concurrent misses may render twice
+            value = render()
+            self.put(key, value)
+
+        return value
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                size_bytes=self._size_bytes,
+                max_bytes=self.max_bytes,
+            )
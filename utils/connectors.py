@@ -0,0 +1,114 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .definitions import Definition
+
+# the measures of every connector, as named in the connector table
+CONNECTOR_MEASURES = list(Definition.CONNECTOR_BINS)
+
+
+def get_connector_table(df: pd.DataFrame) -> pd.DataFrame:
+    # one row per connector of every charger, with the columns of the
+    # "Connector 1/2/3" groups stacked under their common names
+    frames = []
+    for label in Definition.CONNECTOR_LABELS:
+        columns = {
+            f"{label} Type": "Type",
+            **{f"{label} {measure}": measure for measure in CONNECTOR_MEASURES},
+        }
+        frame = df[["Charge Device ID", "County", *columns]].rename(columns=columns)
+
+        # chargers with fewer connectors leave the remaining groups empty
+        frames.append(
+            frame[frame[list(columns.values())].notna().any(axis=1)].assign(
+                Connector=label
+            )
+        )
+
+    return (
+        pd.concat(frames, ignore_index=True)
+        .astype(
+            {
+                "Connector": pd.CategoricalDtype(Definition.CONNECTOR_LABELS),
+                "Type": "category",
+                "County": "category",
+                **{measure: "float32" for measure in CONNECTOR_MEASURES},
+            }
+        )
+        .loc[
+            :, ["Charge Device ID", "County", "Connector", "Type", *CONNECTOR_MEASURES]
+        ]
+    )
+
+
+def _bin_labels(edges: list[float]) -> list[str]:
+    return [f"{lower:g}-{upper:g}" for lower, upper in zip(edges, edges[1:])] + [
+        f"{edges[-1]:g}+"
+    ]
+
+
+@dataclass(frozen=True)
+class ConnectorHistograms:
+    counties: list[str]
+    bin_labels: dict[str, list[str]]
+    # connector counts of every measure by county, connector label and bin
+    counts: dict[str, np.ndarray]
+
+
+def get_connector_histograms(connectors: pd.DataFrame) -> ConnectorHistograms:
+    # every histogram of every county in one bincount per measure
+    county = connectors["County"].astype("category")
+    counties = county.cat.categories.tolist()
+    county_codes = county.cat.codes.to_numpy(dtype=np.int64)
+    connector_codes = (
+        connectors["Connector"]
+        .astype(pd.CategoricalDtype(Definition.CONNECTOR_LABELS))
+        .cat.codes.to_numpy(dtype=np.int64)
+    )
+    n_connectors = len(Definition.CONNECTOR_LABELS)
+
+    bin_labels, counts = {}, {}
+    for measure, edges in Definition.CONNECTOR_BINS.items():
+        values = connectors[measure].to_numpy(dtype=float, na_value=np.nan)
+        bins = np.searchsorted(edges, values, side="right") - 1
+        n_bins = len(edges)
+
+        # missing and negative values, and connectors without a county
+        counted = ~np.isnan(values) & (bins >= 0) & (county_codes >= 0)
+        flat = (
+            county_codes[counted] * n_connectors + connector_codes[counted]
+        ) * n_bins + bins[counted]
+
+        bin_labels[measure] = _bin_labels(edges)
+        counts[measure] = np.bincount(
+            flat, minlength=len(counties) * n_connectors * n_bins
+        ).reshape(len(counties), n_connectors, n_bins)
+
+    return ConnectorHistograms(counties=counties, bin_labels=bin_labels, counts=counts)
+
+
+def get_histogram_counts(
+    histograms: ConnectorHistograms,
+    measure: str,
+    county: str | None = None,
+) -> pd.DataFrame:
+    # tidy counts of a measure nationally, or in a county, by connector and bin
+    counts = histograms.counts[measure]
+    if county is None:
+        counts = counts.sum(axis=0)
+    elif county in histograms.counties:
+        counts = counts[histograms.counties.index(county)]
+    else:
+        counts = np.zeros(counts.shape[1:], dtype=np.int64)
+
+    labels = histograms.bin_labels[measure]
+
+    return pd.DataFrame(
+        {
+            measure: np.tile(labels, len(Definition.CONNECTOR_LABELS)),
+            "Connector": np.repeat(Definition.CONNECTOR_LABELS, len(labels)),
+            "Count": counts.ravel(),
+        }
+    )
@@ -1,5 +1,54 @@
+import pandas as pd
+
+
 class Definition:
     # define some constants
+    NCR_URL: str = "https://chargepoints.dft.gov.uk/api/retrieve/registry/format/csv"
+    CHUNK_SIZE: int = 50_000
+    RENDER_CACHE_BYTES: int = 128 * 1024**2
+    RENDER_THREADS: int = 4
+    # input changes closer together than this are rendered once
+    INPUT_DEBOUNCE_SECONDS: float = 0.3
+    # downloads are written this many rows at a time, in one of these formats
+    EXPORT_CHUNK_ROWS: int = 5_000
+    EXPORT_THREADS: int = 2
+    EXPORT_MEDIA_TYPES: dict[str, str] = {
+        "csv": "text/csv",
+        "parquet": "application/vnd.apache.parquet",
+        "geojson": "application/geo+json",
+    }
+    # counties with more chargers load their map points per viewport
+    VIEWPORT_MAP_MIN_CHARGERS: int = 2_000
+    VIEWPORT_MAX_POINTS: int = 250
+    VIEWPORT_ROUTE: str = "/api/viewport"
+    CLUSTER_CELL_PX: int = 64
+    MAX_CLUSTER_ZOOM: int = 18
+    CLEANED_DATA_CSV: str = "ncr_data_cleaned.csv"
+    CLEANED_DATA_FEATHER: str = "ncr_data_cleaned.feather"
+    ROW_HASHES_FEATHER: str = "ncr_row_hashes.feather"
+    SOURCE_STATE_JSON: str = "ncr_source.json"
+    SUMMARY_JSON: str = "ncr_summary.json"
+    CONNECTORS_FEATHER: str = "ncr_connectors.feather"
+    # the arrays of the indexes of the cleaned data, memory-mapped by the app
+    INDEXES_DIR: str = "ncr_indexes"
+    # the overview figure, rendered once per data version and served as is
+    OVERVIEW_JSON: str = "ncr_overview.json"
+    OVERVIEW_ROUTE: str = "/overview/top-ten"
+    # plotly.js for the overview page, served by the app next to it
+    PLOTLYJS_ROUTE: str = "/overview/plotly.min.js"
+    OVERVIEW_HEIGHT_PX: int = 450
+    # one delta per fetch date, and the counts of every snapshot
+    SNAPSHOTS_DIR: str = "snapshots"
+    TRENDS_JSON: str = "ncr_trends.json"
+    # bump whenever the fields of SummaryData change
+    SUMMARY_VERSION: int = 1
+    # bump whenever the fields of Trends change
+    TRENDS_VERSION: int = 1
+    # bump whenever render_overview changes
+    OVERVIEW_VERSION: int = 2
+    # bump whenever the arrays of Indexes change
+    INDEXES_VERSION: int = 2
+
     COLUMNS_NEEDED: dict[str, str] = {
         "latitude": "Latitude",
         "longitude": "Longitude",
@@ -45,6 +94,57 @@ class Definition:
         "connector3ratedvoltage": "Connector 3 Rated Voltage (V)",
     }
 
+    # the yes/no flags arrive as 0 and 1
+    YES_NO = pd.CategoricalDtype(["No", "Yes"])
+    # in-memory types of the cleaned columns, enforced when the cleaned data
+    # is saved and loaded. coordinates stay float64 since float32 would move
+    # chargers by up to a metre, and ids, names, streets and postcodes are
+    # mostly distinct so a category would not save anything
+    COLUMN_DTYPES: dict[str, str | pd.CategoricalDtype] = {
+        "Latitude": "float64",
+        "Longitude": "float64",
+        "Charge Device ID": "object",
+        "Name": "object",
+        "Town": "category",
+        "Street": "object",
+        "County": "category",
+        "Postcode": "object",
+        "24-hour Access": YES_NO,
+        "Payment Required": YES_NO,
+        "Subscription Required": YES_NO,
+        "Restricted Access": YES_NO,
+        "Parking Fees Required": YES_NO,
+        "Location Type": "category",
+        "Device Manufacturer": "category",
+        "Device Owner": "category",
+        "Device Status": "category",
+        "Device Controller": "category",
+        "Connector 1 Type": "category",
+        "Connector 1 Charge Method": "category",
+        "Connector 1 Charge Mode": "float32",
+        "Connector 1 Tethered Cable": YES_NO,
+        "Connector 1 Status": "category",
+        "Connector 1 Rated Output (kW)": "float32",
+        "Connector 1 Output Current (A)": "float32",
+        "Connector 1 Rated Voltage (V)": "float32",
+        "Connector 2 Type": "category",
+        "Connector 2 Charge Method": "category",
+        "Connector 2 Charge Mode": "float32",
+        "Connector 2 Tethered Cable": YES_NO,
+        "Connector 2 Status": "category",
+        "Connector 2 Rated Output (kW)": "float32",
+        "Connector 2 Output Current (A)": "float32",
+        "Connector 2 Rated Voltage (V)": "float32",
+        "Connector 3 Type": "category",
+        "Connector 3 Charge Method": "category",
+        "Connector 3 Charge Mode": "float32",
+        "Connector 3 Tethered Cable": YES_NO,
+        "Connector 3 Status": "category",
+        "Connector 3 Rated Output (kW)": "float32",
+        "Connector 3 Output Current (A)": "float32",
+        "Connector 3 Rated Voltage (V)": "float32",
+    }
+
     MISSPELT_COUNTY_NAMES: dict[str, str] = {
         "Essesx": "Essex",
         "Argyl and Bute": "Argyll and Bute",
@@ -77,8 +177,54 @@ class Definition:
         )
     )
 
+    # attributes of the filter panel and the columns they are read from, a
+    # charger has a value when any of the columns holds it
+    FILTER_ATTRIBUTES: dict[str, list[str]] = {
+        "County": ["County"],
+        "Connector Type": [
+            "Connector 1 Type",
+            "Connector 2 Type",
+            "Connector 3 Type",
+        ],
+        "Rated Output": [
+            "Connector 1 Rated Output (kW)",
+            "Connector 2 Rated Output (kW)",
+            "Connector 3 Rated Output (kW)",
+        ],
+        "24-hour Access": ["24-hour Access"],
+        "Payment Required": ["Payment Required"],
+        "Subscription Required": ["Subscription Required"],
+        "Restricted Access": ["Restricted Access"],
+        "Parking Fees Required": ["Parking Fees Required"],
+        "Location Type": ["Location Type"],
+        "Device Status": ["Device Status"],
+    }
+    # numeric attributes are filtered by band, [lower, upper)
+    FILTER_BANDS: dict[str, dict[str, tuple[float, float]]] = {
+        "Rated Output": {
+            "Slow (below 7 kW)": (0.0, 7.0),
+            "Fast (7 to under 25 kW)": (7.0, 25.0),
+            "Rapid (25 to under 100 kW)": (25.0, 100.0),
+            "Ultra-rapid (100 kW and above)": (100.0, float("inf")),
+        },
+    }
+
     DISTANCE_THRESHOLD: float = 25.0
+    # chargers listed by the nearby search, by default and at most
+    NEAREST_K: int = 10
+    NEAREST_MAX_K: int = 50
+    # free text that is not a county resolves to the county of the closest
+    # county or town when their trigrams are at least this similar
+    SEARCH_MIN_SCORE: float = 0.3
+    # the centre of a map without chargers
+    UK_CENTRE: tuple[float, float] = (54.5, -3.0)
     CONNECTOR_LABELS = ["Connector 1", "Connector 2", "Connector 3"]
+    # histogram bin edges of the connector measures, the last bin is open ended
+    CONNECTOR_BINS: dict[str, list[float]] = {
+        "Rated Output (kW)": [0, 5, 10, 20, 40, 60, 100, 200, 400],
+        "Output Current (A)": [0, 15, 30, 60, 100, 150, 250, 400],
+        "Rated Voltage (V)": [0, 250, 450, 600, 900],
+    }
     TAB_NAMES: dict[str, list] = {
         "Accessibility": [
             "24-hour Access",
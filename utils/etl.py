@@ -1,77 +1,334 @@
+from __future__ import annotations
+
 import io
+import json
+import multiprocessing
+import os
+import tempfile
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
 from pathlib import Path
+from typing import IO, TYPE_CHECKING
 
+import numpy as np
 import pandas as pd
-import requests
+import pyarrow as pa
+import pyarrow.feather as feather
+from pandas.api.types import union_categoricals
 
+from utils.connectors import get_connector_table
 from utils.definitions import Definition
+from utils.indexes import get_indexes, save_indexes
+from utils.overview import render_overview, save_overview
+from utils.processor import (
+    get_data_version,
+    get_device_hashes,
+    get_summary_data,
+    save_summary_data,
+)
+from utils.snapshots import (
+    add_trends,
+    apply_snapshot_delta,
+    get_snapshot_delta,
+    load_trends,
+    save_trends,
+)
+
+# the app only reads the cleaned data, requests is imported when downloading
+if TYPE_CHECKING:
+    import requests
+
+
+@dataclass(frozen=True)
+class EtlReport:
+    inserted: int
+    updated: int
+    deleted: int
+
+
+def download_csv(
+    url: str,
+    buffer: IO[bytes],
+    headers: dict[str, str] | None = None,
+) -> requests.Response:
+    import requests
 
+    with requests.get(url, headers=headers, stream=True, timeout=60) as response:
+        response.raise_for_status()
 
-def load_csv_from_url(url: str) -> pd.DataFrame:
-    req = requests.get(url).content
+        for block in response.iter_content(chunk_size=1 << 20):
+            buffer.write(block)
+        buffer.seek(0)
 
-    return pd.read_csv(
-        io.StringIO(req.decode("utf-8")),
+    return response
+
+
+def iter_csv_chunks(
+    buffer: IO[bytes],
+    usecols: Callable[[str], bool] | list[str] | None = None,
+    chunksize: int = Definition.CHUNK_SIZE,
+) -> Iterator[pd.DataFrame]:
+    with pd.read_csv(
+        buffer,
         header=0,
+        usecols=usecols,
+        chunksize=chunksize,
+        encoding="utf-8",
         low_memory=False,
         lineterminator="\n",
+    ) as reader:
+        yield from reader
+
+
+def get_data_dir() -> Path:
+    return Path(os.getenv("NCR_DATA_DIR", Path().resolve() / "data"))
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    # cast the columns that differ from Definition.COLUMN_DTYPES. arrow backed
+    # columns of the shared load are views of the mapped file, which was
+    # written with the declared types, and are left as they are
+    dtypes = {
+        col: dtype
+        for col, dtype in Definition.COLUMN_DTYPES.items()
+        if col in df.columns
+        and not isinstance(df[col].dtype, pd.ArrowDtype)
+        and df[col].dtype != dtype
+    }
+
+    return df.astype(dtypes) if dtypes else df
+
+
+def _write_feather(df: pd.DataFrame, path: Path, data_version: str) -> None:
+    # stamp the data version into the file so readers need not hash the data
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {**table.schema.metadata, b"data_version": data_version.encode()}
     )
 
+    # arrow ipc is written uncompressed so that it can be memory-mapped on load,
+    # and swapped in atomically so that readers never map a half-written file
+    feather.write_feather(
+        table,
+        path.with_suffix(".tmp"),
+        compression="uncompressed",
+    )
+    os.replace(path.with_suffix(".tmp"), path)
+
+    return None
+
+
+def _read_data_version(path: Path) -> str | None:
+    # the version stamped by _write_feather, read from the file schema only
+    if not path.exists():
+        return None
+
+    with pa.memory_map(str(path)) as source:
+        metadata = pa.ipc.open_file(source).schema.metadata or {}
+
+    data_version = metadata.get(b"data_version")
+
+    return None if data_version is None else data_version.decode()
+
 
-def clean_ncr_data() -> None:
-    data = load_csv_from_url(
-        "https://chargepoints.dft.gov.uk/api/retrieve/registry/format/csv"
+def save_cleaned_data(
+    df: pd.DataFrame,
+    data_dir: Path | None = None,
+    export_csv: bool = False,
+) -> str:
+    data_dir = get_data_dir() if data_dir is None else data_dir
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+    df = apply_schema(df.reset_index(drop=True))
+    data_version = get_data_version(df)
+    _write_feather(df, data_dir / Definition.CLEANED_DATA_FEATHER, data_version)
+
+    if export_csv:
+        df.to_csv(
+            data_dir / Definition.CLEANED_DATA_CSV,
+            index=False,
+        )
+
+    return data_version
+
+
+def _shared_dtype(arrow_type: pa.DataType) -> pd.ArrowDtype | None:
+    # text and float columns stay as arrow arrays over the mapped file, while
+    # dictionary columns become categoricals whose codes are small to copy
+    if pa.types.is_string(arrow_type) or pa.types.is_floating(arrow_type):
+        return pd.ArrowDtype(arrow_type)
+
+    return None
+
+
+def load_cleaned_data(
+    data_dir: Path | None = None, shared: bool = False
+) -> pd.DataFrame:
+    data_dir = get_data_dir() if data_dir is None else data_dir
+
+    feather_path = data_dir / Definition.CLEANED_DATA_FEATHER
+    if feather_path.exists():
+        table = feather.read_table(feather_path, memory_map=True)
+        if shared:
+            # zero-copy, so every worker reads the same page cache pages
+            return apply_schema(
+                table.to_pandas(types_mapper=_shared_dtype, split_blocks=True)
+            )
+
+        return apply_schema(table.to_pandas(split_blocks=True))
+
+    # fall back to the csv export written by older versions of the etl
+    return apply_schema(pd.read_csv(data_dir / Definition.CLEANED_DATA_CSV))
+
+
+def load_data_version(data_dir: Path | None = None) -> str | None:
+    data_dir = get_data_dir() if data_dir is None else data_dir
+
+    return _read_data_version(data_dir / Definition.CLEANED_DATA_FEATHER)
+
+
+def save_connector_table(
+    connectors: pd.DataFrame, data_version: str, data_dir: Path | None = None
+) -> None:
+    data_dir = get_data_dir() if data_dir is None else data_dir
+
+    _write_feather(
+        connectors.reset_index(drop=True),
+        data_dir / Definition.CONNECTORS_FEATHER,
+        data_version,
     )
-    data.columns = data.columns.str.lower()
-    data_refined = data[list(Definition.COLUMNS_NEEDED.keys())]
-    print(f"input dimension: {data_refined.shape}")
+
+    return None
+
+
+def load_connector_table(
+    data_version: str, data_dir: Path | None = None
+) -> pd.DataFrame | None:
+    # None when the table is missing or was written for other data
+    data_dir = get_data_dir() if data_dir is None else data_dir
+
+    path = data_dir / Definition.CONNECTORS_FEATHER
+    if _read_data_version(path) != data_version:
+        return None
+
+    return feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+
+
+def _refine_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    chunk.columns = chunk.columns.str.lower()
+    chunk = chunk[list(Definition.COLUMNS_NEEDED.keys())]
 
     # rectify incorrect lat and long
-    data_refined = data_refined[
-        data_refined["latitude"].between(*(49, 61), inclusive="both")
-        & data_refined["longitude"].between(*(-8, 2), inclusive="both")
+    return chunk[
+        chunk["latitude"].between(*(49, 61), inclusive="both")
+        & chunk["longitude"].between(*(-8, 2), inclusive="both")
     ]
 
-    # drop rows without charge device ID and county
-    data_refined = data_refined.dropna(subset=["chargedeviceid"], axis=0)
 
-    # remove trailing spaces from certain columns
-    for col in [
-        "county",
-        "town",
-        "devicemanufacturer",
-        "deviceownername",
-        "devicecontrollername",
-        "locationtype",
-        "connector1type",
-        "connector2type",
-        "connector3type",
-    ]:
-        data_refined[col] = data_refined[col].str.strip()
-
-    # replace some bad county names
-    data_refined["county"] = data_refined["county"].replace(
-        Definition.MISSPELT_COUNTY_NAMES
-    )
+def _strip_text(values: pd.Series) -> pd.Series:
+    return values.str.strip()
+
+
+def _fix_county_names(values: pd.Series) -> pd.Series:
+    return values.replace(Definition.MISSPELT_COUNTY_NAMES)
 
+
+def _tidy_place_names(values: pd.Series) -> pd.Series:
     # remove . from counties and towns
     # replace & with and
     # capitalize the beginning of every word in counties and towns
-    for col in ["county", "town"]:
-        data_refined[col] = data_refined[col].str.replace(
-            '[.&`"]', lambda x: "and" if x.group() == "&" else "", regex=True
+    return (
+        values.str.replace("&", "and", regex=False)
+        .str.replace('[.`"]', "", regex=True)
+        .str.title()
+    )
+
+
+TEXT_CLEANERS: dict[str, list[Callable[[pd.Series], pd.Series]]] = {
+    "county": [_strip_text, _fix_county_names, _tidy_place_names],
+    "town": [_strip_text, _tidy_place_names],
+    **{
+        col: [_strip_text]
+        for col in [
+            "devicemanufacturer",
+            "deviceownername",
+            "devicecontrollername",
+            "locationtype",
+            "connector1type",
+            "connector2type",
+            "connector3type",
+        ]
+    },
+}
+
+
+def _clean_categories(
+    values: pd.Series,
+    cleaners: list[Callable[[pd.Series], pd.Series]],
+) -> pd.Series:
+    # apply the cleaners once per distinct value and map the result back,
+    # distinct raw values that clean to the same string share a category
+    codes, uniques = pd.factorize(values)
+
+    cleaned = pd.Series(uniques, dtype=object)
+    for cleaner in cleaners:
+        cleaned = cleaner(cleaned)
+
+    cleaned_codes, categories = pd.factorize(cleaned)
+    codes = np.where(codes == -1, -1, cleaned_codes[codes])
+
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=categories),
+        index=values.index,
+        name=values.name,
+    )
+
+
+def _as_categorical(values: pd.Series) -> pd.Series:
+    # categories in order of first appearance, as produced by _clean_categories
+    codes, categories = pd.factorize(values.astype(object))
+
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=categories),
+        index=values.index,
+        name=values.name,
+    )
+
+
+def clean_text_columns(data_refined: pd.DataFrame) -> pd.DataFrame:
+    return data_refined.assign(
+        **{
+            col: _clean_categories(data_refined[col], cleaners)
+            for col, cleaners in TEXT_CLEANERS.items()
+        }
+    )
+
+
+def clean_ncr_frame(
+    data_refined: pd.DataFrame, text_columns: pd.DataFrame | None = None
+) -> pd.DataFrame:
+    # text_columns are the text columns of the rows with a charge device ID
+    # when they were already cleaned while the registry was read
+
+    # drop rows without charge device ID and county
+    data_refined = data_refined.dropna(subset=["chargedeviceid"], axis=0)
+
+    # strip spaces, repair bad county names and tidy counties and towns
+    if text_columns is None:
+        data_refined = clean_text_columns(data_refined)
+    else:
+        data_refined = data_refined.assign(
+            **dict(text_columns.set_axis(data_refined.index).items())
         )
-        data_refined[col] = data_refined[col].str.title()
 
     # # remove couties and towns with numbers
     # for col_name in ["county", "town"]:
     #     data_refined = remove_rows_with_numbers(data_refined, col_name)
 
     # rename columns
-    data_refined.rename(
-        columns=Definition.COLUMNS_NEEDED,
-        inplace=True,
-    )
+    data_refined = data_refined.rename(columns=Definition.COLUMNS_NEEDED)
 
     zero_one_cols = [
         f"Connector {i} Tethered Cable" for i in range(1, 4)
@@ -80,15 +337,466 @@ def clean_ncr_data() -> None:
         {0: "No", 1: "Yes"}
     )
 
-    print(f"output shape: {data_refined.shape}")
-    print(f"{data.shape[0] - data_refined.shape[0]} rows removed")
+    return data_refined
+
+
+def list_snapshots(data_dir: Path | None = None) -> list[str]:
+    # iso fetch dates of the archived snapshots, oldest first
+    data_dir = get_data_dir() if data_dir is None else data_dir
+
+    return sorted(
+        path.stem for path in (data_dir / Definition.SNAPSHOTS_DIR).glob("*.feather")
+    )
+
+
+def _snapshot_path(data_dir: Path, fetch_date: str) -> Path:
+    return data_dir / Definition.SNAPSHOTS_DIR / f"{fetch_date}.feather"
+
+
+def _read_snapshot_delta(data_dir: Path, fetch_date: str) -> pd.DataFrame:
+    return feather.read_table(
+        _snapshot_path(data_dir, fetch_date), memory_map=True
+    ).to_pandas(split_blocks=True)
+
+
+def _replay_snapshots(data_dir: Path, fetch_dates: list[str]) -> Iterator[pd.DataFrame]:
+    # the state after every snapshot, applying the deltas in order
+    state = None
+    for fetch_date in fetch_dates:
+        state = apply_snapshot_delta(state, _read_snapshot_delta(data_dir, fetch_date))
+        yield state
+
+
+def load_snapshot(fetch_date: str, data_dir: Path | None = None) -> pd.DataFrame:
+    # the cleaned data as of the last snapshot on or before fetch_date
+    data_dir = get_data_dir() if data_dir is None else data_dir
+
+    fetch_dates = [d for d in list_snapshots(data_dir) if d <= fetch_date]
+    if not fetch_dates:
+        raise FileNotFoundError(f"no snapshot on or before {fetch_date}")
+
+    for state in _replay_snapshots(data_dir, fetch_dates):
+        pass
+
+    return state
+
+
+def archive_snapshot(
+    df: pd.DataFrame,
+    fetch_date: date,
+    data_dir: Path | None = None,
+    previous: pd.DataFrame | None = None,
+    previous_version: str | None = None,
+) -> None:
+    # append the cleaned data of fetch_date to the snapshot archive as a delta
+    # against the previous snapshot, and its counts to the trends sidecar.
+    # previous is the cleaned data of the last run, used instead of replaying
+    # the archive when it is the state of the previous snapshot
+    data_dir = get_data_dir() if data_dir is None else data_dir
+    (data_dir / Definition.SNAPSHOTS_DIR).mkdir(parents=True, exist_ok=True)
+
+    fetch_date = fetch_date.isoformat()
+    fetch_dates = list_snapshots(data_dir)
+    if fetch_dates and fetch_date < fetch_dates[-1]:
+        raise ValueError(
+            f"snapshots are append-only, {fetch_date} is before {fetch_dates[-1]}"
+        )
+
+    # a second run on the same day replaces that day's snapshot
+    base_dates = [d for d in fetch_dates if d < fetch_date]
+    if not base_dates:
+        base = None
+    elif previous is not None and previous_version == _read_data_version(
+        _snapshot_path(data_dir, base_dates[-1])
+    ):
+        base = previous
+    else:
+        base = load_snapshot(base_dates[-1], data_dir=data_dir)
+
+    df = apply_schema(df.reset_index(drop=True))
+    _write_feather(
+        get_snapshot_delta(base, df),
+        _snapshot_path(data_dir, fetch_date),
+        get_data_version(df),
+    )
+
+    trends_path = data_dir / Definition.TRENDS_JSON
+    trends = load_trends(trends_path)
+    if trends is None or trends.dates != base_dates:
+        # rebuilt from the archive when missing or out of step with it
+        trends = None
+        for base_date, state in zip(
+            base_dates, _replay_snapshots(data_dir, base_dates)
+        ):
+            trends = add_trends(trends, base_date, state)
+    save_trends(add_trends(trends, fetch_date, df), trends_path)
+
+    return None
+
+
+def _is_needed_column(column: str) -> bool:
+    return column.lower() in Definition.COLUMNS_NEEDED
+
+
+def _read_registry(buffer: IO[bytes], chunksize: int) -> tuple[pd.DataFrame, int]:
+    # project and filter every chunk as it is parsed so that the raw
+    # registry is never held in memory as a whole
+    input_rows = 0
+    chunks = []
+    for chunk in iter_csv_chunks(
+        buffer, usecols=_is_needed_column, chunksize=chunksize
+    ):
+        input_rows += chunk.shape[0]
+        chunks.append(_refine_chunk(chunk))
+
+    return pd.concat(chunks, ignore_index=True), input_rows
+
+
+def _scan_rows(path: Path, block_size: int = 1 << 26) -> np.ndarray:
+    # byte offsets of the lines of a csv that are not blank, the header first,
+    # followed by the size of the file. newlines after an odd number of quotes
+    # are inside a quoted field and do not end a line
+    size = path.stat().st_size
+    line_ends, quoted, offset = [np.array([], dtype=np.int64)], 0, 0
+    with open(path, "rb") as file:
+        while block := file.read(block_size):
+            values = np.frombuffer(block, dtype=np.uint8)
+            quotes = np.flatnonzero(values == ord('"'))
+            newlines = np.flatnonzero(values == ord("\n"))
+
+            inside = (np.searchsorted(quotes, newlines) + quoted) % 2 == 1
+            line_ends.append(newlines[~inside] + offset)
+            quoted = (quoted + quotes.shape[0]) % 2
+            offset += len(block)
+
+    line_ends = np.concatenate(line_ends)
+    if size and (line_ends.shape[0] == 0 or line_ends[-1] != size - 1):
+        line_ends = np.append(line_ends, size)
+    line_starts = np.concatenate([[0], line_ends[:-1] + 1])
+
+    # pandas skips blank lines
+    return np.append(line_starts[line_ends > line_starts], size)
+
+
+def _partition_registry(
+    path: Path, chunksize: int, workers: int
+) -> list[tuple[int, int, int, int]]:
+    # split the rows of the spooled registry into at most workers byte ranges
+    # of whole chunks, so that every partition is parsed in the same chunks
+    # as the serial path. every partition is the end of the header, the byte
+    # range of its rows and the number of rows
+    offsets = _scan_rows(path)
+    n_rows = offsets.shape[0] - 2
+    n_chunks = -(-n_rows // chunksize)
+    if n_chunks < 1:
+        return []
 
-    data_refined.to_csv(
-        Path().resolve() / "data" / "ncr_data_cleaned.csv",
-        index=False,
+    partitions = []
+    for chunks in np.array_split(np.arange(n_chunks), min(workers, n_chunks)):
+        first = chunks[0] * chunksize
+        last = min((chunks[-1] + 1) * chunksize, n_rows)
+        partitions.append(
+            (
+                int(offsets[1]),
+                int(offsets[first + 1]),
+                int(offsets[last + 1]),
+                last - first,
+            )
+        )
+
+    return partitions
+
+
+def _read_partition(
+    path: str, header_end: int, start: int, end: int, chunksize: int
+) -> tuple[list[pd.DataFrame], list[pd.DataFrame], int]:
+    # parse the rows of a partition behind the header of the registry, and
+    # project, filter and clean the text of every chunk
+    with open(path, "rb") as file:
+        header = file.read(header_end)
+        file.seek(start)
+        buffer = io.BytesIO(header + file.read(end - start))
+
+    input_rows = 0
+    chunks, text_columns = [], []
+    for chunk in iter_csv_chunks(
+        buffer, usecols=_is_needed_column, chunksize=chunksize
+    ):
+        input_rows += chunk.shape[0]
+        chunk = _refine_chunk(chunk)
+        rows = chunk.dropna(subset=["chargedeviceid"], axis=0)
+
+        chunks.append(chunk)
+        text_columns.append(
+            pd.DataFrame(
+                {
+                    col: _clean_categories(rows[col], cleaners)
+                    for col, cleaners in TEXT_CLEANERS.items()
+                }
+            )
+        )
+
+    return chunks, text_columns, input_rows
+
+
+def _read_registry_partitioned(
+    path: Path, chunksize: int, workers: int
+) -> tuple[pd.DataFrame, int, pd.DataFrame] | None:
+    # the refined registry, its input rows and its cleaned text columns, read
+    # by a pool of workers. None when there is a single partition, or when the
+    # partitions do not hold the rows found by the scan
+    partitions = _partition_registry(path, chunksize, workers)
+    if len(partitions) < 2:
+        return None
+
+    # spawned, since forking a process that runs threads may deadlock
+    with ProcessPoolExecutor(
+        max_workers=len(partitions), mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        futures = [
+            pool.submit(_read_partition, str(path), header_end, start, end, chunksize)
+            for header_end, start, end, _ in partitions
+        ]
+        results = [future.result() for future in futures]
+
+    if any(
+        input_rows != n_rows
+        for (_, _, input_rows), (*_, n_rows) in zip(results, partitions)
+    ):
+        print("partitions do not match the registry, reading it serially")
+        return None
+
+    # concatenated in order, the chunks and categories are those of the
+    # serial path
+    chunks = [chunk for result in results for chunk in result[0]]
+    text_columns = [columns for result in results for columns in result[1]]
+
+    return (
+        pd.concat(chunks, ignore_index=True),
+        sum(input_rows for *_, input_rows in results),
+        pd.DataFrame(
+            {
+                col: union_categoricals(
+                    [columns[col] for columns in text_columns], ignore_order=True
+                )
+                for col in TEXT_CLEANERS
+            }
+        ),
     )
 
+
+def _load_row_hashes(data_dir: Path) -> pd.Series | None:
+    path = data_dir / Definition.ROW_HASHES_FEATHER
+    if not path.exists():
+        return None
+
+    row_hashes = pd.read_feather(path)
+
+    return row_hashes.set_index("chargedeviceid")["row_hash"]
+
+
+def _save_row_hashes(data_dir: Path, row_hashes: pd.Series) -> None:
+    row_hashes.rename("row_hash").rename_axis(
+        "chargedeviceid"
+    ).reset_index().to_feather(data_dir / Definition.ROW_HASHES_FEATHER)
+
+    return None
+
+
+def _load_source_state(data_dir: Path) -> dict[str, str]:
+    path = data_dir / Definition.SOURCE_STATE_JSON
+    if not path.exists():
+        return {}
+
+    return json.loads(path.read_text())
+
+
+def _save_source_state(data_dir: Path, response: requests.Response) -> None:
+    state = {
+        k: response.headers[k]
+        for k in ["ETag", "Last-Modified"]
+        if k in response.headers
+    }
+    (data_dir / Definition.SOURCE_STATE_JSON).write_text(json.dumps(state))
+
+    return None
+
+
+def _conditional_headers(source_state: dict[str, str]) -> dict[str, str]:
+    headers = {}
+    if "ETag" in source_state:
+        headers["If-None-Match"] = source_state["ETag"]
+    if "Last-Modified" in source_state:
+        headers["If-Modified-Since"] = source_state["Last-Modified"]
+
+    return headers
+
+
+def _diff_row_hashes(
+    previous: pd.Series | None,
+    current: pd.Series,
+) -> tuple[pd.Index, pd.Index, pd.Index]:
+    if previous is None:
+        return current.index, pd.Index([]), pd.Index([])
+
+    inserted = current.index.difference(previous.index, sort=False)
+    deleted = previous.index.difference(current.index, sort=False)
+
+    common = current.index.intersection(previous.index, sort=False)
+    updated = common[current.loc[common].to_numpy() != previous.loc[common].to_numpy()]
+
+    return inserted, updated, deleted
+
+
+def _patch_cleaned_data(
+    previous: pd.DataFrame,
+    changed: pd.DataFrame,
+    removed_ids: pd.Index,
+    source_ids: pd.Index,
+) -> pd.DataFrame:
+    id_col = Definition.COLUMNS_NEEDED["chargedeviceid"]
+
+    patched = pd.concat(
+        [previous[~previous[id_col].isin(removed_ids)], changed],
+        ignore_index=True,
+    )
+
+    # restore the order of the source so that the result matches a full clean
+    position = pd.Series(np.arange(source_ids.shape[0]), index=source_ids)
+    patched = patched.iloc[
+        np.argsort(position.reindex(patched[id_col]).to_numpy(), kind="stable")
+    ]
+
+    return patched.assign(
+        **{
+            Definition.COLUMNS_NEEDED[col]: _as_categorical(
+                patched[Definition.COLUMNS_NEEDED[col]]
+            )
+            for col in TEXT_CLEANERS
+        }
+    ).reset_index(drop=True)
+
+
+def clean_ncr_data(
+    url: str = Definition.NCR_URL,
+    data_dir: Path | None = None,
+    export_csv: bool = False,
+    chunksize: int = Definition.CHUNK_SIZE,
+    incremental: bool = False,
+    fetch_date: date | None = None,
+    workers: int = 1,
+) -> EtlReport:
+    data_dir = get_data_dir() if data_dir is None else data_dir
+    data_dir.mkdir(parents=True, exist_ok=True)
+    fetch_date = date.today() if fetch_date is None else fetch_date
+
+    # only previously seen sources can be skipped or patched
+    previous_hashes = _load_row_hashes(data_dir)
+    incremental = (
+        incremental
+        and previous_hashes is not None
+        and (data_dir / Definition.CLEANED_DATA_FEATHER).exists()
+    )
+
+    # spooled to a named file that the workers of a parallel read can open
+    with tempfile.NamedTemporaryFile() as buffer:
+        response = download_csv(
+            url,
+            buffer,
+            headers=(
+                _conditional_headers(_load_source_state(data_dir))
+                if incremental
+                else None
+            ),
+        )
+        if response.status_code == 304:
+            print("source not modified since the last run, nothing to do")
+            return EtlReport(inserted=0, updated=0, deleted=0)
+
+        registry = (
+            _read_registry_partitioned(Path(buffer.name), chunksize, workers)
+            if workers > 1
+            else None
+        )
+        if registry is None:
+            registry = (*_read_registry(buffer, chunksize), None)
+        data_refined, input_rows, text_columns = registry
+
+    # the output of the last run, patched in incremental mode and the base of
+    # the next snapshot
+    previous_version = load_data_version(data_dir)
+    previous = (
+        None if previous_version is None else load_cleaned_data(data_dir=data_dir)
+    )
+
+    print(f"input dimension: {(input_rows, len(Definition.COLUMNS_NEEDED))}")
+
+    row_hashes = get_device_hashes(data_refined, "chargedeviceid")
+    inserted, updated, deleted = _diff_row_hashes(previous_hashes, row_hashes)
+    report = EtlReport(
+        inserted=inserted.shape[0],
+        updated=updated.shape[0],
+        deleted=deleted.shape[0],
+    )
+
+    if incremental:
+        # re-clean only new or changed devices and patch them into the
+        # previous output
+        changed = data_refined["chargedeviceid"].isin(inserted.append(updated))
+        data_cleaned = _patch_cleaned_data(
+            previous=previous,
+            changed=clean_ncr_frame(data_refined[changed]),
+            removed_ids=updated.append(deleted),
+            source_ids=row_hashes.index,
+        )
+    else:
+        data_cleaned = clean_ncr_frame(data_refined, text_columns=text_columns)
+
+    print(f"output shape: {data_cleaned.shape}")
+    print(f"{input_rows - data_cleaned.shape[0]} rows removed")
+    print(
+        f"{report.inserted} inserted, {report.updated} updated, "
+        f"{report.deleted} deleted"
+    )
+
+    # archived first, so that an out of order fetch date changes nothing
+    archive_snapshot(
+        data_cleaned,
+        fetch_date=fetch_date,
+        data_dir=data_dir,
+        previous=previous,
+        previous_version=previous_version,
+    )
+    print(f"snapshot of {fetch_date.isoformat()} archived")
+    data_version = save_cleaned_data(
+        data_cleaned, data_dir=data_dir, export_csv=export_csv
+    )
+    summary_data = get_summary_data(data_cleaned)
+    save_summary_data(
+        summary_data,
+        path=data_dir / Definition.SUMMARY_JSON,
+        data_version=data_version,
+    )
+    save_overview(
+        render_overview(summary_data),
+        path=data_dir / Definition.OVERVIEW_JSON,
+        data_version=data_version,
+    )
+    save_connector_table(
+        get_connector_table(data_cleaned),
+        data_version=data_version,
+        data_dir=data_dir,
+    )
+    # built from the data as the app maps it, so the positions are its rows
+    save_indexes(
+        get_indexes(load_cleaned_data(data_dir=data_dir, shared=True)),
+        path=data_dir / Definition.INDEXES_DIR,
+        data_version=data_version,
+    )
+    _save_row_hashes(data_dir, row_hashes)
+    _save_source_state(data_dir, response)
+
     print("cleaning...done")
     print("<<<cleaned data saved in 'data' folder>>>")
 
-    return None
+    return report
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import io
+import json
+import re
+from collections.abc import Callable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from .definitions import Definition
+
+
+def _iter_chunks(
+    df: pd.DataFrame, positions: np.ndarray, chunk_rows: int
+) -> Iterator[pd.DataFrame]:
+    # only chunk_rows rows of the selection are copied out of df at a time
+    for start in range(0, positions.shape[0], chunk_rows):
+        yield df.iloc[positions[start : start + chunk_rows]]
+
+
+def _iter_csv(df: pd.DataFrame, chunks: Iterator[pd.DataFrame]) -> Iterator[bytes]:
+    yield df.iloc[:0].to_csv(index=False).encode()
+    for chunk in chunks:
+        yield chunk.to_csv(index=False, header=False).encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    # a file for the parquet writer that hands over what has been written
+    # since it was last asked. it keeps counting the bytes written, the
+    # writer records the offsets of the row groups in the footer
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+
+        return data
+
+
+def _iter_parquet(df: pd.DataFrame, chunks: Iterator[pd.DataFrame]) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # one schema for every row group. text columns of an empty frame have no
+    # type, they are all strings
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    schema = pa.schema(
+        [
+            field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+            for field in schema
+        ],
+        metadata=schema.metadata,
+    )
+
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for chunk in chunks:
+            writer.write_table(
+                pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            )
+            yield sink.take()
+
+    # the footer
+    yield sink.take()
+
+
+def _json_values(column: pd.Series) -> np.ndarray:
+    # the json text of every value of column, null where it is missing. the
+    # categories of a categorical column are encoded once
+    missing = column.isna().to_numpy()
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        encoded = np.array(
+            [json.dumps(value) for value in column.cat.categories.tolist()] + ["null"],
+            dtype=object,
+        )
+        # the code of a missing value is -1, the last one
+        return encoded[column.cat.codes.to_numpy()]
+
+    if pd.api.types.is_float_dtype(column.dtype):
+        # the shortest text that reads back as the same float of its dtype.
+        # json has no infinity, those are null too
+        values = column.to_numpy()
+        missing = missing | ~np.isfinite(values)
+        values = values.astype(str).astype(object)
+    else:
+        values = np.array(
+            [
+                "null" if absent else json.dumps(value)
+                for value, absent in zip(column.tolist(), missing)
+            ],
+            dtype=object,
+        )
+    values[missing] = "null"
+
+    return values
+
+
+def _iter_geojson(df: pd.DataFrame, chunks: Iterator[pd.DataFrame]) -> Iterator[bytes]:
+    coordinates = ["Latitude", "Longitude"]
+    yield b'{"type": "FeatureCollection", "features": ['
+
+    separator = ""
+    for chunk in chunks:
+        # the values are encoded a column at a time, rather than from a dict
+        # per charger, and then joined into a feature per charger
+        properties = chunk.drop(columns=coordinates)
+        keys = [f"{json.dumps(column)}: " for column in properties.columns]
+        values = [_json_values(properties[column]) for column in properties.columns]
+        features = [
+            '{"type": "Feature", "geometry": {"type": "Point", "coordinates": '
+            + json.dumps([lon, lat])
+            + '}, "properties": {'
+            + ", ".join([key + value for key, value in zip(keys, row)])
+            + "}}"
+            for lat, lon, *row in zip(
+                chunk["Latitude"].tolist(), chunk["Longitude"].tolist(), *values
+            )
+        ]
+        yield (separator + ", ".join(features)).encode()
+        separator = ", "
+
+    yield b"]}"
+
+
+_WRITERS: dict[
+    str, Callable[[pd.DataFrame, Iterator[pd.DataFrame]], Iterator[bytes]]
+] = {
+    "csv": _iter_csv,
+    "parquet": _iter_parquet,
+    "geojson": _iter_geojson,
+}
+
+
+def get_export_filename(county: str, export_format: str) -> str:
+    # the county goes into a response header, only letters, digits and dashes
+    # are kept
+    slug = re.sub(r"[^a-z0-9]+", "-", county.lower()).strip("-")
+    if not slug:
+        return f"chargepoints.{export_format}"
+
+    return f"chargepoints-{slug}.{export_format}"
+
+
+def iter_export(
+    df: pd.DataFrame,
+    positions: np.ndarray,
+    export_format: str,
+    chunk_rows: int = Definition.EXPORT_CHUNK_ROWS,
+) -> Iterator[bytes]:
+    # the rows of df at positions in export_format, written chunk_rows rows at
+    # a time, so the memory taken does not grow with the selection
+    if export_format not in _WRITERS:
+        raise ValueError(
+            f"unknown export format {export_format!r}, expected one of "
+            f"{', '.join(_WRITERS)}"
+        )
+
+    return _WRITERS[export_format](df, _iter_chunks(df, positions, chunk_rows))
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from .definitions import Definition
+from .processor import sort_value_counts
+
+# values selected for some of the attributes of Definition.FILTER_ATTRIBUTES
+Filters = dict[str, list[str]]
+
+
+def _attribute_values(df: pd.DataFrame, attribute: str, column: str) -> pd.Series:
+    bands = Definition.FILTER_BANDS.get(attribute)
+    if bands is None:
+        return df[column]
+
+    values = df[column].to_numpy(dtype=float, na_value=np.nan)
+    labels = np.full(values.shape[0], None, dtype=object)
+    for band, (lower, upper) in bands.items():
+        labels[(values >= lower) & (values < upper)] = band
+
+    return pd.Series(labels)
+
+
+class FilterIndex:
+    # one bitmap per value of every filter attribute, with the bit of every
+    # charger that has the value set. bitmaps are packed eight chargers to a
+    # byte, so a filter is a handful of bitwise operations over a few
+    # kilobytes instead of a mask over the whole frame per condition. bitmaps
+    # from bitmap and select combine further with & and |
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        attributes: dict[str, list[str]] = Definition.FILTER_ATTRIBUTES,
+    ):
+        self._n_rows = df.shape[0]
+        self._empty = np.packbits(np.zeros(self._n_rows, dtype=bool), bitorder="little")
+        self._all = np.packbits(np.ones(self._n_rows, dtype=bool), bitorder="little")
+
+        self._bitmaps: dict[str, dict[str, np.ndarray]] = {}
+        for attribute, columns in attributes.items():
+            bitmaps: dict[str, np.ndarray] = {}
+            for column in columns:
+                codes, uniques = pd.factorize(_attribute_values(df, attribute, column))
+                for code, value in enumerate(uniques):
+                    bitmap = np.packbits(codes == code, bitorder="little")
+                    if value in bitmaps:
+                        bitmaps[value] = bitmaps[value] | bitmap
+                    else:
+                        bitmaps[value] = bitmap
+
+            # the most common values first
+            self._bitmaps[attribute] = dict(
+                sorted(bitmaps.items(), key=lambda item: -self.count(item[1]))
+            )
+
+    def to_arrays(self) -> tuple[dict[str, np.ndarray], dict]:
+        # a stack of the bitmaps of every attribute, and its values as json,
+        # see from_arrays
+        arrays = {
+            attribute: np.stack(list(bitmaps.values()))
+            if bitmaps
+            else np.empty((0, self._empty.shape[0]), dtype=np.uint8)
+            for attribute, bitmaps in self._bitmaps.items()
+        }
+        meta = dict(
+            n_rows=self._n_rows,
+            values={
+                attribute: list(bitmaps) for attribute, bitmaps in self._bitmaps.items()
+            },
+        )
+
+        return arrays, meta
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, np.ndarray], meta: dict) -> FilterIndex:
+        # the index to_arrays was called on, its bitmaps are rows of arrays,
+        # which may be memory mapped
+        index = cls.__new__(cls)
+        index._n_rows = meta["n_rows"]
+        index._empty = np.packbits(
+            np.zeros(index._n_rows, dtype=bool), bitorder="little"
+        )
+        index._all = np.packbits(np.ones(index._n_rows, dtype=bool), bitorder="little")
+        index._bitmaps = {
+            attribute: dict(zip(values, arrays[attribute]))
+            for attribute, values in meta["values"].items()
+        }
+
+        return index
+
+    def choices(self, attribute: str) -> list[str]:
+        return list(self._bitmaps[attribute])
+
+    def bitmap(self, attribute: str, values: list[str]) -> np.ndarray:
+        # chargers with any of the values, values that never occur match nothing
+        bitmaps = self._bitmaps[attribute]
+        bitmap = self._empty
+        for value in values:
+            bitmap = bitmap | bitmaps.get(value, self._empty)
+
+        return bitmap
+
+    def select(self, filters: Filters) -> np.ndarray:
+        # chargers with one of the selected values of every filtered attribute
+        bitmap = self._all
+        for attribute, values in filters.items():
+            bitmap = bitmap & self.bitmap(attribute, values)
+
+        return bitmap
+
+    def positions(self, bitmap: np.ndarray) -> np.ndarray:
+        # row positions of the chargers in the bitmap, in row order
+        return np.flatnonzero(
+            np.unpackbits(bitmap, count=self._n_rows, bitorder="little")
+        )
+
+    def within(self, bitmap: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        # the positions whose chargers are in the bitmap, by testing their bits
+        # alone, so it takes time in the number of positions rather than rows
+        bits = (bitmap[positions >> 3] >> (positions & 7).astype(np.uint8)) & 1
+
+        return positions[bits.astype(bool)]
+
+    def count(self, bitmap: np.ndarray) -> int:
+        return int(np.bitwise_count(bitmap).sum())
+
+    def value_counts(self, bitmap: np.ndarray, attribute: str) -> pd.DataFrame:
+        # the frame get_column_value_counts returns for the chargers in bitmap
+        counts = pd.Series(
+            {
+                value: self.count(bitmap & value_bitmap)
+                for value, value_bitmap in self._bitmaps[attribute].items()
+            },
+            dtype=np.int64,
+        )
+        counts = counts[counts > 0]
+
+        return sort_value_counts(
+            pd.DataFrame({attribute: counts.index.to_numpy(), "Count": counts.values}),
+            attribute,
+        )
+
+
+def get_filter_index(df: pd.DataFrame) -> FilterIndex:
+    return FilterIndex(df)
+
+
+def get_filters_key(filters: Filters) -> tuple:
+    # hashable and independent of the order of the selections
+    return tuple(
+        sorted(
+            (attribute, tuple(sorted(values))) for attribute, values in filters.items()
+        )
+    )
+
+
+def get_filter_input_id(attribute: str) -> str:
+    # the id of the input of an attribute in the filter panel
+    return "filter_" + re.sub(r"\W+", "_", attribute.lower()).strip("_")
@@ -104,6 +104,27 @@ def access_text() -> ui.Tag:
     )
 
 
+def connectors_text() -> ui.Tag:
+    return ui.card_header(
+        """
+        The following plots show the distribution of the rated output,
+        output current and rated voltage of the connectors of every
+        chargepoint, stacked by connector. Hover on the bars to see the
+        number of connectors in each range.
+        """
+    )
+
+
+def trends_text() -> ui.Tag:
+    return ui.card_header(
+        """
+        The number of chargepoints in every snapshot of the registry
+        archived by the data pipeline. A snapshot is archived on every
+        run of run.py, dated by the day the registry was fetched.
+        """
+    )
+
+
 def top_ten_text() -> ui.Tag:
     return ui.card_header(
         """
@@ -115,3 +136,24 @@ def top_ten_text() -> ui.Tag:
         devices.
         """
     )
+
+
+def near_me_text(distance_threshold: float) -> ui.Tag:
+    return ui.card_header(
+        f"""
+        Enter a postcode (a full postcode or its first part, such as EH1),
+        or a latitude and longitude, to find the chargepoints within
+        {distance_threshold:g} km and the chargepoints nearest to it. Postcodes
+        are located from the chargepoints registered at them.
+        """
+    )
+
+
+def filter_text() -> ui.Tag:
+    return ui.p(
+        """
+        Leave a filter empty to keep every value. Chargepoints with any of
+        the values selected in a filter, and that pass every filter, are
+        shown on the map and in the accessibility plots.
+        """
+    )
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .definitions import Definition
+from .filters import FilterIndex, get_filter_index
+from .processor import get_county_index
+from .search import SearchIndex, get_search_index
+from .spatial import SpatialIndex, get_spatial_index
+from .viewport import ViewportIndex
+
+MANIFEST_JSON = "indexes.json"
+
+
+@dataclass(frozen=True)
+class Indexes:
+    # the indexes the app derives from the cleaned data. their arrays are
+    # written next to the data by the etl and memory-mapped by every worker,
+    # so a pool of workers shares one copy rather than building one each
+    county_index: dict[str, np.ndarray]
+    search_index: SearchIndex
+    filter_index: FilterIndex
+    spatial_index: SpatialIndex
+    viewport_index: ViewportIndex
+
+
+def get_indexes(df: pd.DataFrame) -> Indexes:
+    county_index = get_county_index(df=df)
+
+    return Indexes(
+        county_index=county_index,
+        search_index=get_search_index(df=df),
+        filter_index=get_filter_index(df=df),
+        spatial_index=get_spatial_index(df=df),
+        viewport_index=ViewportIndex(df=df, county_index=county_index),
+    )
+
+
+def _county_index_arrays(
+    county_index: dict[str, np.ndarray],
+) -> tuple[dict[str, np.ndarray], dict]:
+    # the positions of every county one after the other
+    counties = list(county_index)
+    lengths = [len(county_index[county]) for county in counties]
+    arrays = dict(
+        positions=np.concatenate(
+            [county_index[county] for county in counties] or [np.array([])]
+        ).astype(np.intp),
+        offsets=np.concatenate([[0], np.cumsum(lengths, dtype=np.intp)]),
+    )
+
+    return arrays, dict(counties=counties)
+
+
+def _county_index_from_arrays(
+    arrays: dict[str, np.ndarray], meta: dict
+) -> dict[str, np.ndarray]:
+    positions, offsets = arrays["positions"], arrays["offsets"]
+
+    return {
+        county: positions[offsets[i] : offsets[i + 1]]
+        for i, county in enumerate(meta["counties"])
+    }
+
+
+def save_indexes(indexes: Indexes, path: Path, data_version: str) -> None:
+    # an .npy file per array and a manifest of the rest, written to a new
+    # folder that then replaces the previous one
+    parts = dict(
+        county_index=_county_index_arrays(indexes.county_index),
+        search_index=indexes.search_index.to_arrays(),
+        filter_index=indexes.filter_index.to_arrays(),
+        spatial_index=(indexes.spatial_index.to_arrays(), {}),
+        viewport_index=(indexes.viewport_index.to_arrays(), {}),
+    )
+
+    tmp_path = path.with_suffix(".tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+    # the files are numbered, the keys of the arrays are in the manifest
+    for name, (arrays, _) in parts.items():
+        for i, array in enumerate(arrays.values()):
+            np.save(tmp_path / f"{name}-{i}.npy", np.asarray(array))
+
+    (tmp_path / MANIFEST_JSON).write_text(
+        json.dumps(
+            dict(
+                version=Definition.INDEXES_VERSION,
+                data_version=data_version,
+                arrays={name: list(arrays) for name, (arrays, _) in parts.items()},
+                meta={name: meta for name, (_, meta) in parts.items()},
+            )
+        )
+    )
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+    return None
+
+
+def load_indexes(path: Path, df: pd.DataFrame, data_version: str) -> Indexes | None:
+    # None when the indexes are missing, incomplete, or were written for other
+    # data or by another version of the indexes. the arrays are read only
+    # views of the mapped files, df is the data they index
+    manifest_path = path / MANIFEST_JSON
+    if not manifest_path.exists():
+        return None
+
+    manifest = json.loads(manifest_path.read_text())
+    if (manifest.get("version"), manifest.get("data_version")) != (
+        Definition.INDEXES_VERSION,
+        data_version,
+    ):
+        return None
+
+    try:
+        arrays = {
+            name: {
+                key: np.asarray(np.load(path / f"{name}-{i}.npy", mmap_mode="r"))
+                for i, key in enumerate(keys)
+            }
+            for name, keys in manifest["arrays"].items()
+        }
+    except (OSError, ValueError):
+        return None
+
+    meta = manifest["meta"]
+    county_index = _county_index_from_arrays(
+        arrays["county_index"], meta["county_index"]
+    )
+
+    return Indexes(
+        county_index=county_index,
+        search_index=SearchIndex.from_arrays(
+            arrays["search_index"], meta["search_index"]
+        ),
+        filter_index=FilterIndex.from_arrays(
+            arrays["filter_index"], meta["filter_index"]
+        ),
+        spatial_index=SpatialIndex.from_arrays(arrays["spatial_index"]),
+        viewport_index=ViewportIndex.from_arrays(
+            df, county_index, arrays["viewport_index"]
+        ),
+    )
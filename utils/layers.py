@@ -0,0 +1,168 @@
+import json
+
+import pandas as pd
+from branca.element import Element, MacroElement
+
+
+class RawScript(Element):
+    # a script that is added to the page as it is, rather than compiled as a
+    # jinja template first, which gets slow for large inline data
+    def __init__(self, script: str):
+        super().__init__()
+        self.script = script
+
+    def render(self, **kwargs) -> str:
+        return self.script
+
+
+class MarkerLayer(MacroElement):
+    # default leaflet markers with a sticky tooltip each, as folium.Marker
+    # draws them, but shipped as a single geojson layer
+    def __init__(self, latitude: pd.Series, longitude: pd.Series, tooltips: pd.Series):
+        super().__init__()
+        self._name = "MarkerLayer"
+        self.data = {
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                    "properties": {"tooltip": tooltip},
+                }
+                for lat, lon, tooltip in zip(
+                    latitude.tolist(), longitude.tolist(), tooltips.tolist()
+                )
+            ],
+        }
+
+    def render(self, **kwargs) -> None:
+        # escape the markup so that the data cannot close the script tag
+        data = (
+            json.dumps(self.data)
+            .replace("<", "\\u003c")
+            .replace(">", "\\u003e")
+            .replace("&", "\\u0026")
+        )
+        self.get_root().script.add_child(
+            RawScript(
+                f"""
+            var {self.get_name()} = L.geoJson(null, {{
+                onEachFeature: function (feature, layer) {{
+                    layer.bindTooltip(
+                        `<div>${{feature.properties.tooltip}}</div>`,
+                        {{"sticky": true}}
+                    );
+                }}
+            }}).addTo({self._parent.get_name()});
+            {self.get_name()}.addData({data});
+            """
+            ),
+            name=self.get_name(),
+        )
+
+        return None
+
+
+class ViewportLayer(MacroElement):
+    # markers of the current viewport, fetched from the server whenever the
+    # map stops moving, with numbered circles for clusters of chargers
+    def __init__(
+        self, url: str, county: str, filters: dict[str, list[str]] | None = None
+    ):
+        super().__init__()
+        self._name = "ViewportLayer"
+        self.url = url
+        self.county = county
+        self.filters = filters
+
+    def render(self, **kwargs) -> None:
+        map_name = self._parent.get_name()
+        # the map is an iframe srcdoc, so relative urls resolve against the app
+        params = {"county": self.county}
+        if self.filters:
+            params["filters"] = json.dumps(self.filters)
+        params = json.dumps(params).replace("<", "\\u003c")
+        self.get_root().script.add_child(
+            RawScript(
+                f"""
+            var {self.get_name()} = L.geoJson(null, {{
+                pointToLayer: function (feature, latlng) {{
+                    var count = feature.properties.count;
+                    if (!count) {{
+                        return L.marker(latlng);
+                    }}
+                    var size = 30 + 6 * Math.min(Math.floor(Math.log10(count)), 4);
+                    return L.marker(latlng, {{
+                        icon: L.divIcon({{
+                            html: `<div style="width:${{size}}px;height:${{size}}px;line-height:${{size}}px;border-radius:50%;background:rgba(49,130,189,0.75);color:white;text-align:center;font-weight:bold;">${{count}}</div>`,
+                            className: "",
+                            iconSize: [size, size],
+                        }}),
+                    }}).on("click", function () {{
+                        {map_name}.setView(latlng, {map_name}.getZoom() + 2);
+                    }});
+                }},
+                onEachFeature: function (feature, layer) {{
+                    if (feature.properties.tooltip) {{
+                        layer.bindTooltip(
+                            `<div>${{feature.properties.tooltip}}</div>`,
+                            {{"sticky": true}}
+                        );
+                    }}
+                }}
+            }}).addTo({map_name});
+
+            // shown over the map while the chargers in view cannot be loaded
+            var {self.get_name()}_error = L.control({{position: "topright"}});
+            {self.get_name()}_error.onAdd = function () {{
+                var div = L.DomUtil.create("div", "leaflet-bar");
+                div.style.cssText = "background:white;padding:4px 8px;color:#a94442;";
+                div.textContent = "Chargepoints could not be loaded, move the map to retry";
+                return div;
+            }};
+
+            // only the response to the latest request is drawn
+            var {self.get_name()}_request = 0;
+            function {self.get_name()}_refresh() {{
+                var bounds = {map_name}.getBounds();
+                var params = new URLSearchParams(Object.assign({params}, {{
+                    south: bounds.getSouth(),
+                    west: bounds.getWest(),
+                    north: bounds.getNorth(),
+                    east: bounds.getEast(),
+                    zoom: {map_name}.getZoom(),
+                }}));
+                var request = ++{self.get_name()}_request;
+                fetch("{self.url}?" + params)
+                    .then(function (response) {{
+                        if (!response.ok) {{
+                            throw new Error("viewport request failed: " + response.status);
+                        }}
+                        return response.json();
+                    }})
+                    .then(function (data) {{
+                        if (request !== {self.get_name()}_request) {{
+                            return;
+                        }}
+                        {self.get_name()}_error.remove();
+                        {self.get_name()}.clearLayers();
+                        {self.get_name()}.addData(data);
+                    }})
+                    .catch(function (error) {{
+                        if (request !== {self.get_name()}_request) {{
+                            return;
+                        }}
+                        // no stale chargers are left on the map
+                        console.error(error);
+                        {self.get_name()}.clearLayers();
+                        {self.get_name()}_error.addTo({map_name});
+                    }});
+            }}
+            {map_name}.on("moveend", {self.get_name()}_refresh);
+            {self.get_name()}_refresh();
+            """
+            ),
+            name=self.get_name(),
+        )
+
+        return None
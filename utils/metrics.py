@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import bisect
+import os
+import threading
+import time
+from collections import UserString
+from collections.abc import Callable, Container
+from functools import wraps
+from typing import TYPE_CHECKING, Any
+
+from shiny import reactive
+
+if TYPE_CHECKING:
+    from starlette.requests import Request
+    from starlette.responses import Response
+    from starlette.routing import Route
+
+# instrumentation is decided once at import, so disabled outputs are untouched
+METRICS_ENABLED = bool(os.getenv("NCR_METRICS"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 1 KiB up to 256 MiB, county maps of the largest counties reach tens of MiB
+SIZE_BUCKETS = tuple(float(1024 * 4**i) for i in range(10))
+# the county label of any county that is not known, so that text typed into an
+# input cannot add series without bound
+OTHER_COUNTY = "other"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    # a prometheus histogram with a fixed set of label names
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: tuple[float, ...],
+        label_names: tuple[str, ...],
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.label_names = label_names
+        # per label values, the count of each bucket (not cumulative) and the sum
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            counts, total = self._series.setdefault(
+                label_values, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[index] += 1
+            total[0] += value
+
+        return None
+
+    def expose(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+
+        with self._lock:
+            series = [
+                (label_values, list(counts), total[0])
+                for label_values, (counts, total) in self._series.items()
+            ]
+
+        for label_values, counts, total in sorted(series):
+            labels = ",".join(
+                f'{name}="{_escape(value)}"'
+                for name, value in zip(self.label_names, label_values)
+            )
+            cumulative = 0
+            for bound, count in zip([*self.buckets, "+Inf"], counts):
+                cumulative += count
+                le = bound if isinstance(bound, str) else repr(bound)
+                lines.append(f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total!r}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+
+        return "\n".join(lines) + "\n"
+
+
+RENDER_SECONDS = Histogram(
+    "ncr_render_seconds",
+    "Time spent in a render function or reactive calc.",
+    LATENCY_BUCKETS,
+    ("output", "county"),
+)
+PAYLOAD_BYTES = Histogram(
+    "ncr_render_payload_bytes",
+    "Size of the text or html returned by a render function.",
+    SIZE_BUCKETS,
+    ("output", "county"),
+)
+
+
+def payload_size(value: Any) -> int | None:
+    if isinstance(value, bytes):
+        return len(value)
+
+    # ui.HTML is a UserString rather than a str
+    if isinstance(value, (str, UserString)):
+        return len(str(value).encode("utf-8"))
+
+    # plotly figures are sent by shinywidgets as their json, other widgets
+    # are not measured
+    if hasattr(value, "to_plotly_json"):
+        return len(value.to_json().encode("utf-8"))
+
+    return None
+
+
+def instrument(
+    output: str,
+    county: Callable[[], str] | None = None,
+    counties: Container[str] = (),
+    enabled: bool = METRICS_ENABLED,
+) -> Callable[[Callable], Callable]:
+    # county labels the timings by the county it returns, one of counties or
+    # OTHER_COUNTY
+    def decorator(fn: Callable) -> Callable:
+        if not enabled:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            value = fn(*args, **kwargs)
+            seconds = time.perf_counter() - start
+
+            # labelling must not make the output depend on the county input
+            with reactive.isolate():
+                label = "" if county is None else county()
+            if county is not None and label not in counties:
+                label = OTHER_COUNTY
+
+            RENDER_SECONDS.observe(seconds, output, label)
+            size = payload_size(value)
+            if size is not None:
+                PAYLOAD_BYTES.observe(size, output, label)
+
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def expose_metrics() -> str:
+    return RENDER_SECONDS.expose() + PAYLOAD_BYTES.expose()
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    from starlette.responses import PlainTextResponse
+
+    return PlainTextResponse(
+        expose_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def get_metrics_route() -> Route:
+    from starlette.routing import Route
+
+    return Route("/metrics", metrics_endpoint)
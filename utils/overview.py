@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import gzip
+import json
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .definitions import Definition
+from .plotter import plot_top_ten
+from .processor import SummaryData
+
+if TYPE_CHECKING:
+    from starlette.requests import Request
+    from starlette.responses import Response
+    from starlette.routing import Route
+
+
+def render_overview(summary_data: SummaryData) -> str:
+    # the top ten figure as a standalone page. plotly.js is served by the app
+    # next to the page, its src is relative so the app can be mounted anywhere.
+    # a fixed div id keeps the page the same for the same data
+    return plot_top_ten(summary_data.top_ten).to_html(
+        full_html=True,
+        include_plotlyjs=Definition.PLOTLYJS_ROUTE.rsplit("/", 1)[1],
+        div_id="top-ten",
+        config=dict(responsive=True),
+        default_height=f"{Definition.OVERVIEW_HEIGHT_PX}px",
+    )
+
+
+def save_overview(html: str, path: Path, data_version: str) -> None:
+    path.write_text(
+        json.dumps(
+            dict(
+                version=Definition.OVERVIEW_VERSION,
+                data_version=data_version,
+                html=html,
+            )
+        )
+    )
+
+    return None
+
+
+def load_overview(path: Path, data_version: str) -> str | None:
+    # None when the sidecar is missing or was written for other data or by
+    # another version of render_overview
+    if not path.exists():
+        return None
+
+    sidecar = json.loads(path.read_text())
+    if (sidecar.get("version"), sidecar.get("data_version")) != (
+        Definition.OVERVIEW_VERSION,
+        data_version,
+    ):
+        return None
+
+    return sidecar["html"]
+
+
+@dataclass(frozen=True)
+class StaticPage:
+    # a page encoded and compressed once, and served as is to every session
+    body: bytes
+    gzipped: bytes
+    etag: str
+    media_type: str = "text/html"
+
+
+def get_static_page(html: str, data_version: str) -> StaticPage:
+    body = html.encode()
+
+    return StaticPage(
+        body=body,
+        # no timestamp, so the same page compresses to the same bytes
+        gzipped=gzip.compress(body, mtime=0),
+        # a new render_overview changes the page of the same data too
+        etag=f'"{Definition.OVERVIEW_VERSION}-{data_version}"',
+    )
+
+
+def get_plotlyjs_page() -> StaticPage:
+    import plotly
+    from plotly.offline import get_plotlyjs
+
+    body = get_plotlyjs().encode()
+
+    return StaticPage(
+        body=body,
+        gzipped=gzip.compress(body, mtime=0),
+        etag=f'"plotly-{plotly.__version__}"',
+        media_type="text/javascript",
+    )
+
+
+def get_static_page_route(path: str, get_page: Callable[[], StaticPage]) -> Route:
+    from starlette.responses import Response
+    from starlette.routing import Route
+
+    # a sync endpoint, so a page that is rendered on its first request is
+    # rendered in starlette's thread pool
+    def page_endpoint(request: Request) -> Response:
+        page = get_page()
+        # revalidated on every load, the etag changes with the content
+        headers = {
+            "ETag": page.etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if request.headers.get("if-none-match") == page.etag:
+            return Response(status_code=304, headers=headers)
+
+        if "gzip" in request.headers.get("accept-encoding", ""):
+            return Response(
+                page.gzipped,
+                media_type=page.media_type,
+                headers={**headers, "Content-Encoding": "gzip"},
+            )
+
+        return Response(page.body, media_type=page.media_type, headers=headers)
+
+    return Route(path, page_endpoint)
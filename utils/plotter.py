@@ -1,18 +1,24 @@
-import folium
-import leafmap.foliumap as leafmap
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from folium import plugins
-from plotly.subplots import make_subplots
 
 from .definitions import Definition
 from .processor import get_column_value_counts
 
+# plotly, folium and leafmap are slow to import and only needed once a
+# session renders, so they are imported inside the functions that use them
+if TYPE_CHECKING:
+    import folium
+    import plotly.graph_objects as go
+
 
 def plot_bar_chart(
     data: pd.DataFrame, x_axis: str, y_axis: str, y_axis_title: str = None
 ):
+    import plotly.express as px
+
     bar = px.bar(
         data_frame=data,
         x=x_axis,
@@ -24,6 +30,8 @@ def plot_bar_chart(
 
 
 def plot_gauge_chart(value: int | float, title: str) -> go.Figure:
+    import plotly.graph_objects as go
+
     return go.Figure(
         go.Indicator(
             mode="gauge+number",
@@ -38,6 +46,9 @@ def plot_gauge_chart(value: int | float, title: str) -> go.Figure:
 
 
 def plot_top_ten(top_ten: dict[str, pd.DataFrame]) -> go.Figure:
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
     fig = make_subplots(
         rows=1,
         cols=len(top_ten),
@@ -60,17 +71,23 @@ def plot_top_ten(top_ten: dict[str, pd.DataFrame]) -> go.Figure:
         )
 
         fig.update_xaxes(title_text=k, row=1, col=i, tickangle=-90)
-        fig.update_yaxes(
-            title_text="Chargepoint count",
-            row=1,
-            col=1,
-        )
-        fig.update_layout(template="simple_white")
 
-    return fig
+    fig.update_yaxes(
+        title_text="Chargepoint count",
+        row=1,
+        col=1,
+    )
+
+    return fig.update_layout(template="simple_white")
+
 
+def plot_accessibility(
+    df: pd.DataFrame | None = None,
+    value_counts: dict[str, pd.DataFrame] | None = None,
+):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
 
-def plot_accessibility(df: pd.DataFrame):
     fig = make_subplots(
         rows=1,
         cols=5,
@@ -86,10 +103,15 @@ def plot_accessibility(df: pd.DataFrame):
         Definition.TAB_NAMES["Accessibility"],
         start=1,
     ):
-        df_count = get_column_value_counts(
-            df=df,
-            column_name=k,
-            top_n=None,
+        # precomputed counts (see get_county_value_counts) save a scan of df
+        df_count = (
+            get_column_value_counts(
+                df=df,
+                column_name=k,
+                top_n=None,
+            )
+            if value_counts is None
+            else value_counts[k]
         )
 
         fig.add_trace(
@@ -105,27 +127,122 @@ def plot_accessibility(df: pd.DataFrame):
     return fig
 
 
+def plot_connector_histograms(counts: dict[str, pd.DataFrame]) -> go.Figure:
+    # counts of every measure as returned by get_histogram_counts, stacked by
+    # connector
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    fig = make_subplots(rows=1, cols=len(counts), subplot_titles=list(counts))
+    for i, (measure, df_count) in enumerate(counts.items(), start=1):
+        for label, color in zip(
+            Definition.CONNECTOR_LABELS, ["dodgerblue", "darkorange", "seagreen"]
+        ):
+            connector_count = df_count[df_count["Connector"] == label]
+            fig.add_trace(
+                go.Bar(
+                    x=connector_count[measure].values,
+                    y=connector_count["Count"].values,
+                    name=label,
+                    legendgroup=label,
+                    showlegend=i == 1,
+                    marker=dict(color=color),
+                ),
+                row=1,
+                col=i,
+            )
+
+        fig.update_xaxes(title_text=measure, type="category", row=1, col=i)
+
+    fig.update_yaxes(title_text="Connector count", row=1, col=1)
+    fig.update_layout(barmode="stack", template="simple_white")
+
+    return fig
+
+
+def plot_trends(dates: list[str], series: dict[str, list[int]]) -> go.Figure:
+    # a line of counts over the snapshot fetch dates for every series
+    import plotly.graph_objects as go
+
+    fig = go.Figure(
+        [
+            go.Scatter(x=dates, y=values, name=name, mode="lines+markers")
+            for name, values in series.items()
+        ]
+    )
+    fig.update_xaxes(title_text="Fetch date", type="category")
+    fig.update_yaxes(title_text="Chargepoint count")
+    fig.update_layout(template="simple_white")
+
+    return fig
+
+
+def get_tooltips(df: pd.DataFrame) -> pd.Series:
+    # "<b>column:</b> value" for every non-missing value, built column-wise
+    tooltips = pd.Series("", index=df.index, dtype=object)
+    for key in df.columns:
+        text = df[key].astype(str)
+        tooltips += (f"<b>{key}:</b> " + text + "<br>").where(
+            df[key].notna() & (text != "nan"), ""
+        )
+
+    return tooltips.str.removesuffix("<br>")
+
+
 def get_map(
     df: pd.DataFrame,
 ) -> folium.Map:
+    import leafmap.foliumap as leafmap
+    from folium import plugins
+
+    from .layers import MarkerLayer
+
+    # a county without chargers shows the whole of the uk
+    location_map = (
+        leafmap.Map(center=list(Definition.UK_CENTRE), zoom=5)
+        if df.empty
+        else leafmap.Map(
+            center=[df["Latitude"].mean(), df["Longitude"].mean()], zoom=10
+        )
+    )
+
+    # add geocoder
+    plugins.Geocoder().add_to(location_map)
+
+    # a single geojson layer of default markers instead of one marker object
+    # per charger
+    MarkerLayer(
+        latitude=df["Latitude"],
+        longitude=df["Longitude"],
+        tooltips=get_tooltips(df),
+    ).add_to(location_map)
+
+    return location_map
+
+
+def get_viewport_map(
+    df: pd.DataFrame, county: str, filters: dict[str, list[str]] | None = None
+) -> folium.Map:
+    # the chargers are not embedded, the map requests the chargers in view
+    import leafmap.foliumap as leafmap
+    from folium import plugins
+
+    from .layers import ViewportLayer
+
     location_map = leafmap.Map(
         center=[df["Latitude"].mean(), df["Longitude"].mean()], zoom=10
     )
+    location_map.fit_bounds(
+        [
+            [df["Latitude"].min(), df["Longitude"].min()],
+            [df["Latitude"].max(), df["Longitude"].max()],
+        ]
+    )
 
-    # add geocoder
     plugins.Geocoder().add_to(location_map)
 
-    for _, row in df.iterrows():
-        tooltip_html = "<br>".join(
-            [
-                f"<b>{key}:</b> {value}"
-                for key, value in row.to_dict().items()
-                if str(value) != "nan"
-            ]
-        )
-        folium.Marker(
-            location=[row["Latitude"], row["Longitude"]],
-            tooltip=tooltip_html,
-        ).add_to(location_map)
+    ViewportLayer(
+        url=Definition.VIEWPORT_ROUTE.lstrip("/"), county=county, filters=filters
+    ).add_to(location_map)
 
     return location_map
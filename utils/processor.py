@@ -1,6 +1,12 @@
-from dataclasses import dataclass
-import pandas as pd
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
 import numpy as np
+import pandas as pd
+
+from .definitions import Definition
 
 
 @dataclass(frozen=True)
@@ -14,12 +20,12 @@ class SummaryData:
     top_ten: dict[str, pd.DataFrame]
 
 
-def is_number(s: str) -> bool:
-    try:
-        float(s)
-        return True
-    except Exception:
-        return False
+def sort_value_counts(df_count: pd.DataFrame, column_name: str) -> pd.DataFrame:
+    # most common first and ties in order of value, so the same counts are in
+    # the same order however they were counted
+    return df_count.sort_values(
+        by=["Count", column_name], ascending=[False, True], ignore_index=True
+    )
 
 
 def get_column_value_counts(
@@ -29,30 +35,108 @@ def get_column_value_counts(
 ) -> pd.DataFrame:
 
     column_count = df[column_name].value_counts()
+    # categorical columns also count categories that do not occur
+    column_count = column_count[column_count > 0]
 
     df_count = pd.DataFrame()
-    df_count[column_name] = column_count.index
+    df_count[column_name] = column_count.index.to_numpy()
     df_count["Count"] = column_count.values
     df_count.dropna(axis=0, inplace=True)
+    df_count = sort_value_counts(df_count, column_name)
 
     if top_n is None:
         return df_count
 
-    df_count.sort_values(by="Count", ascending=False, inplace=True)
-
     return df_count.head(top_n)
 
 
+def get_data_version(df: pd.DataFrame) -> str:
+    # content hash of the cleaned data, used to key anything derived from it
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()[:16]
+
+
+def get_device_hashes(df: pd.DataFrame, id_column: str) -> pd.Series:
+    # one hash per charge device id, rows sharing an id are combined. both the
+    # incremental etl and the snapshot deltas call a device changed when its
+    # hash changes
+    row_hash = pd.util.hash_pandas_object(df, index=False)
+
+    return row_hash.groupby(df[id_column].to_numpy(), sort=False).sum()
+
+
+def get_county_index(df: pd.DataFrame) -> dict[str, np.ndarray]:
+    # row positions of every county, built in a single grouped pass
+    return df.groupby(by="County", observed=True, sort=False).indices
+
+
+def get_county_data(
+    df: pd.DataFrame,
+    county_index: dict[str, np.ndarray],
+    county: str,
+) -> pd.DataFrame:
+    return df.iloc[county_index.get(county, np.array([], dtype=np.intp))]
+
+
+def get_accessibility_counts(df: pd.DataFrame) -> pd.DataFrame:
+    # value counts of every accessibility column for every county, in one
+    # grouped pass over the data, and in the order of sort_value_counts within
+    # each county and column
+    counts = (
+        df[["County"] + Definition.TAB_NAMES["Accessibility"]]
+        .melt(id_vars="County", var_name="Column", value_name="Value")
+        .groupby(by=["County", "Column", "Value"], observed=True)
+        .size()
+    )
+    counts = counts[counts > 0].rename("Count").reset_index()
+    counts = counts.astype({"Value": str}).sort_values(
+        by=["County", "Column", "Count", "Value"],
+        ascending=[True, True, False, True],
+    )
+
+    return counts.set_index("County").astype({"Column": "category"})
+
+
+def get_county_value_counts(
+    accessibility_counts: pd.DataFrame,
+    county: str,
+) -> dict[str, pd.DataFrame]:
+    # the per-column frames get_column_value_counts would return for the county.
+    # the counts are sorted by county, so its rows are found by a binary search
+    # of the index rather than a scan, and they are already in order
+    if county in accessibility_counts.index:
+        county_counts = accessibility_counts.loc[[county]]
+    else:
+        county_counts = accessibility_counts.iloc[:0]
+
+    columns = county_counts["Column"].to_numpy()
+    values = county_counts["Value"].to_numpy()
+    counts = county_counts["Count"].to_numpy()
+
+    value_counts = {}
+    for column_name in Definition.TAB_NAMES["Accessibility"]:
+        in_column = columns == column_name
+        value_counts[column_name] = pd.DataFrame(
+            {column_name: values[in_column], "Count": counts[in_column]}
+        )
+
+    return value_counts
+
+
 def get_summary_data(df: pd.DataFrame) -> SummaryData:
 
-    counties = df["County"].unique()
-    counties = counties[~np.vectorize(is_number)(counties)].tolist()
+    # drop missing counties and counties that are just numbers
+    counties = pd.Series(df["County"].unique(), dtype=object)
+    counties = counties[
+        counties.notna() & pd.to_numeric(counties, errors="coerce").isna()
+    ].tolist()
 
     total_chargers = df.shape[0]
-    in_service_chargers = df[df["Device Status"] == "In service"].shape[0]
-    county_with_most_chargers = df.groupby(by="County").size().idxmax()
-    non_payment_chargers = df[df["Payment Required"] == "No"].shape[0]
-    all_day_chargers = df[df["24-hour Access"] == "Yes"].shape[0]
+    in_service_chargers = int((df["Device Status"] == "In service").sum())
+    county_with_most_chargers = df.groupby(by="County", observed=True).size().idxmax()
+    non_payment_chargers = int((df["Payment Required"] == "No").sum())
+    all_day_chargers = int((df["24-hour Access"] == "Yes").sum())
 
     column_names = [
         "County",
@@ -72,3 +156,41 @@ def get_summary_data(df: pd.DataFrame) -> SummaryData:
         all_day_chargers=all_day_chargers,
         top_ten=top_ten,
     )
+
+
+def save_summary_data(summary_data: SummaryData, path: Path, data_version: str) -> None:
+    summary = asdict(summary_data)
+    summary["top_ten"] = {
+        k: v.to_dict(orient="list") for k, v in summary_data.top_ten.items()
+    }
+
+    path.write_text(
+        json.dumps(
+            dict(
+                version=Definition.SUMMARY_VERSION,
+                data_version=data_version,
+                summary=summary,
+            )
+        )
+    )
+
+    return None
+
+
+def load_summary_data(path: Path, data_version: str) -> SummaryData | None:
+    # None when the sidecar is missing or was written for other data or by
+    # another version of SummaryData
+    if not path.exists():
+        return None
+
+    sidecar = json.loads(path.read_text())
+    if (sidecar.get("version"), sidecar.get("data_version")) != (
+        Definition.SUMMARY_VERSION,
+        data_version,
+    ):
+        return None
+
+    summary = sidecar["summary"]
+    summary["top_ten"] = {k: pd.DataFrame(v) for k, v in summary["top_ten"].items()}
+
+    return SummaryData(**summary)
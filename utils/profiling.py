@@ -0,0 +1,26 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+# seconds spent in each named start-up phase, in the order they ran
+STARTUP_TIMINGS: dict[str, float] = {}
+
+
+@contextmanager
+def timed(label: str, timings: dict[str, float] = STARTUP_TIMINGS) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[label] = time.perf_counter() - start
+
+
+def format_timings(timings: dict[str, float] = STARTUP_TIMINGS) -> str:
+    width = max(map(len, timings), default=0)
+    lines = [
+        f"{label:<{width}}  {seconds * 1e3:9.1f} ms"
+        for label, seconds in timings.items()
+    ]
+    lines.append(f"{'total':<{width}}  {sum(timings.values()) * 1e3:9.1f} ms")
+
+    return "\n".join(lines)
@@ -0,0 +1,85 @@
+import contextlib
+import time
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from shiny import reactive
+
+T = TypeVar("T")
+
+
+def debounce(seconds: float) -> Callable[[Callable[[], T]], Callable[[], T]]:
+    # a calc that takes the value of fn at once after a quiet spell, and then
+    # only once it has settled for seconds, so that a burst of input changes
+    # invalidates its dependents twice at most. create it in the server
+    # function, its state belongs to the session
+    def decorator(fn: Callable[[], T]) -> Callable[[], T]:
+        current = reactive.calc(fn)
+        deadline = reactive.value(None)
+        settled = reactive.value(0)
+        last_settled = None
+
+        @reactive.effect(priority=2)
+        def _restart():
+            nonlocal last_settled
+            # errors, silent ones included, surface when the value is taken
+            with contextlib.suppress(Exception):
+                current()
+
+            now = time.monotonic()
+            with reactive.isolate():
+                if last_settled is None:
+                    # the first value is taken by debounced itself
+                    last_settled = now
+                elif deadline() is None and now - last_settled >= seconds:
+                    last_settled = now
+                    settled.set(settled() + 1)
+                else:
+                    deadline.set(now + seconds)
+
+        @reactive.effect(priority=1)
+        def _settle():
+            nonlocal last_settled
+            when = deadline()
+            if when is None:
+                return
+
+            remaining = when - time.monotonic()
+            if remaining > 0:
+                reactive.invalidate_later(remaining)
+                return
+
+            last_settled = time.monotonic()
+            with reactive.isolate():
+                deadline.set(None)
+                settled.set(settled() + 1)
+
+        @reactive.calc
+        @reactive.event(settled)
+        def debounced() -> T:
+            return current()
+
+        return debounced
+
+    return decorator
+
+
+def latest_task(
+    request: Callable[[], tuple],
+) -> Callable[[Callable[..., Awaitable[T]]], reactive.ExtendedTask]:
+    # an extended task of fn that is invoked with the arguments request returns
+    # whenever they change. invocations that have not started are dropped, and
+    # the result of the one in flight is discarded, only the newest request is
+    # shown. create it in the server function, like debounce
+    def decorator(fn: Callable[..., Awaitable[T]]) -> reactive.ExtendedTask:
+        task = reactive.extended_task(fn)
+
+        @reactive.effect
+        def _invoke():
+            args = request()
+            task.cancel()
+            task.invoke(*args)
+
+        return task
+
+    return decorator
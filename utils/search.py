@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .definitions import Definition
+
+
+def _normalise(text: str) -> str:
+    # lower case words of letters and digits, "&" read as "and"
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower().replace("&", " and ")))
+
+
+def _trigrams(text: str) -> set[str]:
+    # padded so that the start of a word weighs more than its end
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass(frozen=True)
+class SearchMatch:
+    name: str
+    # "County" or "Town"
+    kind: str
+    # the county itself, or the county with the most chargers in the town
+    county: str
+    # dice similarity of the trigrams of the query and the name
+    score: float
+    prefix: bool
+
+
+class SearchIndex:
+    # trigram index over the names of the counties and towns. every trigram
+    # maps to the names that contain it, so a query counts the trigrams it
+    # shares with every name in one bincount over a few short posting lists,
+    # instead of comparing itself with every name. names that start with the
+    # query are found by bisecting the sorted names and rank first
+
+    def __init__(self, names: list[str], kinds: list[str], counties: list[str]):
+        self._names = names
+        self._kinds = kinds
+        self._counties = counties
+
+        normalised = [_normalise(name) for name in names]
+        trigrams = [_trigrams(name) for name in normalised]
+        n_trigrams = np.array([len(t) for t in trigrams], dtype=np.intp)
+        self._n_trigrams = n_trigrams.astype(np.float64)
+
+        # the posting list of trigram i is postings[offsets[i] : offsets[i + 1]]
+        codes, uniques = pd.factorize(
+            np.array(
+                [t for name_trigrams in trigrams for t in name_trigrams], dtype=object
+            )
+        )
+        self._trigram_codes = dict(zip(uniques, range(len(uniques))))
+        self._postings = np.repeat(np.arange(len(names)), n_trigrams)[
+            np.argsort(codes, kind="stable")
+        ]
+        self._offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(codes, minlength=len(uniques)))]
+        )
+
+        self._order = np.argsort(normalised, kind="stable")
+        self._sorted = np.array(normalised)[self._order]
+
+    def to_arrays(self) -> tuple[dict[str, np.ndarray], dict]:
+        # the arrays of the index, and the rest of it as json, see from_arrays
+        arrays = dict(
+            n_trigrams=self._n_trigrams,
+            postings=self._postings,
+            offsets=self._offsets,
+            order=self._order,
+            sorted=self._sorted,
+        )
+        meta = dict(
+            names=self._names,
+            kinds=self._kinds,
+            counties=self._counties,
+            trigrams=list(self._trigram_codes),
+        )
+
+        return arrays, meta
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, np.ndarray], meta: dict) -> SearchIndex:
+        # the index to_arrays was called on, over arrays that may be memory
+        # mapped, without building it again
+        index = cls.__new__(cls)
+        index._names = meta["names"]
+        index._kinds = meta["kinds"]
+        index._counties = meta["counties"]
+        index._trigram_codes = {t: code for code, t in enumerate(meta["trigrams"])}
+        index._n_trigrams = arrays["n_trigrams"]
+        index._postings = arrays["postings"]
+        index._offsets = arrays["offsets"]
+        index._order = arrays["order"]
+        index._sorted = arrays["sorted"]
+
+        return index
+
+    def _prefixed(self, query: str) -> np.ndarray:
+        lower = np.searchsorted(self._sorted, query, side="left")
+        upper = np.searchsorted(self._sorted, query + "\U0010ffff", side="left")
+
+        return self._order[lower:upper]
+
+    def search(self, text: str, k: int = 5) -> list[SearchMatch]:
+        # the k best matches, names starting with the query first, then by
+        # similarity. counties come before towns of the same score
+        query = _normalise(text)
+        if not query:
+            return []
+
+        trigrams = _trigrams(query)
+        codes = [self._trigram_codes[t] for t in trigrams if t in self._trigram_codes]
+        hits = [self._postings[self._offsets[c] : self._offsets[c + 1]] for c in codes]
+        shared = np.bincount(
+            np.concatenate(hits) if hits else np.array([], dtype=np.intp),
+            minlength=len(self._names),
+        )
+        scores = 2 * shared / (len(trigrams) + self._n_trigrams)
+
+        prefix = np.zeros(len(self._names), dtype=bool)
+        prefix[self._prefixed(query)] = True
+
+        candidates = np.flatnonzero((shared > 0) | prefix)
+        ranks = scores[candidates] + 2 * prefix[candidates]
+        if candidates.shape[0] > k:
+            top = np.argpartition(-ranks, k - 1)[:k]
+            candidates, ranks = candidates[top], ranks[top]
+        best = candidates[np.lexsort((candidates, -ranks))]
+
+        return [
+            SearchMatch(
+                name=self._names[i],
+                kind=self._kinds[i],
+                county=self._counties[i],
+                score=float(scores[i]),
+                prefix=bool(prefix[i]),
+            )
+            for i in best
+        ]
+
+    def resolve(self, text: str) -> str | None:
+        # the county of the best match, None when nothing is close enough
+        matches = self.search(text, k=1)
+        if not matches:
+            return None
+
+        match = matches[0]
+        if match.prefix or match.score >= Definition.SEARCH_MIN_SCORE:
+            return match.county
+
+        return None
+
+
+def get_search_index(df: pd.DataFrame) -> SearchIndex:
+    # every town is searched as part of the county where it has most chargers
+    town_counties = (
+        df.groupby(["Town", "County"], observed=True)
+        .size()
+        .sort_values(ascending=False, kind="stable")
+        .reset_index()
+        .drop_duplicates("Town")
+        .sort_values("Town")
+    )
+    counties = sorted(df["County"].dropna().astype(str).unique().tolist())
+    towns = town_counties["Town"].astype(str).tolist()
+
+    return SearchIndex(
+        names=counties + towns,
+        kinds=["County"] * len(counties) + ["Town"] * len(towns),
+        counties=counties + town_counties["County"].astype(str).tolist(),
+    )
@@ -0,0 +1,131 @@
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .definitions import Definition
+from .processor import get_device_hashes
+
+ID_COLUMN = Definition.COLUMNS_NEEDED["chargedeviceid"]
+# rows of a snapshot delta are either the new rows of a device or the id of a
+# device that was removed
+CHANGE_DTYPE = pd.CategoricalDtype(["upsert", "delete"])
+
+
+def get_snapshot_delta(
+    previous: pd.DataFrame | None, current: pd.DataFrame
+) -> pd.DataFrame:
+    # the rows of the devices that are new or changed since previous, followed
+    # by the ids of the devices that were removed
+    upserts, removed = current, pd.Index([], dtype=object)
+    if previous is not None:
+        previous_hashes = get_device_hashes(previous, ID_COLUMN)
+        current_hashes = get_device_hashes(current, ID_COLUMN)
+
+        common = current_hashes.index.intersection(previous_hashes.index, sort=False)
+        unchanged = common[
+            current_hashes.loc[common].to_numpy()
+            == previous_hashes.loc[common].to_numpy()
+        ]
+        upserts = current[~current[ID_COLUMN].isin(unchanged)]
+        removed = previous_hashes.index.difference(current_hashes.index, sort=False)
+
+    deletes = pd.DataFrame({ID_COLUMN: removed.to_numpy(dtype=object)})
+
+    # the columns keep the types of current, categories included
+    return pd.concat(
+        [upserts.assign(Change="upsert"), deletes.assign(Change="delete")],
+        ignore_index=True,
+    ).astype({**current.dtypes.to_dict(), "Change": CHANGE_DTYPE})
+
+
+def apply_snapshot_delta(
+    state: pd.DataFrame | None, delta: pd.DataFrame
+) -> pd.DataFrame:
+    # the state after the snapshot, with the types of the snapshot. rows of
+    # unchanged devices come first, so the row order differs from the etl output
+    dtypes = delta.dtypes.drop("Change").to_dict()
+    upserts = delta[delta["Change"] == "upsert"].drop(columns="Change")
+    if state is None:
+        return upserts.reset_index(drop=True)
+
+    # every row of a changed device is replaced by its rows in the delta
+    state = pd.concat(
+        [state[~state[ID_COLUMN].isin(delta[ID_COLUMN])], upserts],
+        ignore_index=True,
+    )
+
+    # astype keeps the category order of an equal categorical dtype
+    return state.assign(
+        **{
+            col: pd.Categorical(state[col], dtype=dtype)
+            for col, dtype in dtypes.items()
+            if isinstance(dtype, pd.CategoricalDtype)
+        }
+    ).astype(dtypes)
+
+
+@dataclass(frozen=True)
+class Trends:
+    # iso fetch dates of the snapshots and the counts of every snapshot
+    dates: list[str]
+    total_chargers: list[int]
+    in_service_chargers: list[int]
+    county_chargers: dict[str, list[int]]
+
+
+def add_trends(trends: Trends | None, fetch_date: str, df: pd.DataFrame) -> Trends:
+    # the counts of a snapshot, replacing any counts of the same date
+    if trends is None:
+        trends = Trends(
+            dates=[], total_chargers=[], in_service_chargers=[], county_chargers={}
+        )
+
+    keep = [i for i, date in enumerate(trends.dates) if date != fetch_date]
+    dates = [trends.dates[i] for i in keep] + [fetch_date]
+    order = np.argsort(dates, kind="stable")
+
+    county_counts = df.groupby(by="County", observed=True).size()
+    counties = sorted(set(trends.county_chargers) | set(county_counts.index))
+
+    def _series(previous: list[int], count: int) -> list[int]:
+        values = [previous[i] for i in keep] + [int(count)]
+        return [values[i] for i in order]
+
+    return Trends(
+        dates=[dates[i] for i in order],
+        total_chargers=_series(trends.total_chargers, df.shape[0]),
+        in_service_chargers=_series(
+            trends.in_service_chargers, (df["Device Status"] == "In service").sum()
+        ),
+        # counties that appear in later snapshots count zero before
+        county_chargers={
+            county: _series(
+                trends.county_chargers.get(county, [0] * len(trends.dates)),
+                county_counts.get(county, 0),
+            )
+            for county in counties
+        },
+    )
+
+
+def save_trends(trends: Trends, path: Path) -> None:
+    path.write_text(
+        json.dumps(dict(version=Definition.TRENDS_VERSION, trends=asdict(trends)))
+    )
+
+    return None
+
+
+def load_trends(path: Path) -> Trends | None:
+    # None when the sidecar is missing or was written by another version
+    if not path.exists():
+        return None
+
+    sidecar = json.loads(path.read_text())
+    if sidecar.get("version") != Definition.TRENDS_VERSION:
+        return None
+
+    return Trends(**sidecar["trends"])
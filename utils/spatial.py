@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from .definitions import Definition
+
+if TYPE_CHECKING:
+    from scipy.spatial import cKDTree
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(
+    latitude: float | np.ndarray,
+    longitude: float | np.ndarray,
+    other_latitude: float | np.ndarray,
+    other_longitude: float | np.ndarray,
+) -> np.ndarray:
+    lat1, lon1, lat2, lon2 = map(
+        np.radians, (latitude, longitude, other_latitude, other_longitude)
+    )
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def _to_unit_xyz(latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    lat, lon = np.radians(latitude), np.radians(longitude)
+
+    return np.column_stack(
+        [np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)]
+    )
+
+
+class SpatialIndex:
+    # kd-tree over the chargers placed on the unit sphere, where the straight
+    # line (chord) distance grows with the great circle distance. the tree is
+    # built on the first query so that scipy is only imported when needed
+
+    def __init__(self, latitude: np.ndarray, longitude: np.ndarray):
+        self._xyz = _to_unit_xyz(
+            np.asarray(latitude, dtype=float), np.asarray(longitude, dtype=float)
+        )
+        self._tree: cKDTree | None = None
+        self._lock = threading.Lock()
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        return dict(xyz=self._xyz)
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, np.ndarray]) -> SpatialIndex:
+        # the index to_arrays was called on, the tree is still built on the
+        # first query
+        index = cls.__new__(cls)
+        index._xyz = arrays["xyz"]
+        index._tree = None
+        index._lock = threading.Lock()
+
+        return index
+
+    def _get_tree(self) -> cKDTree:
+        if self._tree is None:
+            with self._lock:
+                if self._tree is None:
+                    from scipy.spatial import cKDTree
+
+                    self._tree = cKDTree(self._xyz)
+
+        return self._tree
+
+    def within(self, latitude: float, longitude: float, radius_km: float) -> np.ndarray:
+        # positions of the chargers within radius_km, in row order
+        chord = 2 * np.sin(radius_km / (2 * EARTH_RADIUS_KM))
+        point = _to_unit_xyz(np.array([latitude]), np.array([longitude]))[0]
+
+        positions = self._get_tree().query_ball_point(point, r=chord)
+
+        # sorting the array is cheaper than asking the tree for sorted output
+        return np.sort(np.asarray(positions, dtype=np.intp))
+
+    def nearest(
+        self, latitude: float, longitude: float, k: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        k = min(int(k), self._xyz.shape[0])
+        if k <= 0:
+            return np.array([], dtype=np.intp), np.array([])
+
+        point = _to_unit_xyz(np.array([latitude]), np.array([longitude]))[0]
+        chords, positions = self._get_tree().query(point, k=[*range(1, k + 1)])
+
+        return np.asarray(positions, dtype=np.intp), _chord_to_km(chords)
+
+
+def _chord_to_km(chord: np.ndarray) -> np.ndarray:
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+def get_spatial_index(df: pd.DataFrame) -> SpatialIndex:
+    return SpatialIndex(df["Latitude"].to_numpy(), df["Longitude"].to_numpy())
+
+
+def get_nearest_k(value: float | None) -> int:
+    # the number input takes any number, and is empty while it is edited
+    if value is None or not np.isfinite(value):
+        return Definition.NEAREST_K
+
+    return int(np.clip(value, 1, Definition.NEAREST_MAX_K))
+
+
+@dataclass(frozen=True)
+class NearbyChargers:
+    within_radius: pd.DataFrame
+    nearest: pd.DataFrame
+
+
+def get_nearby_chargers(
+    df: pd.DataFrame,
+    spatial_index: SpatialIndex,
+    latitude: float,
+    longitude: float,
+    radius_km: float = Definition.DISTANCE_THRESHOLD,
+    k: int = Definition.NEAREST_K,
+) -> NearbyChargers:
+    within_radius = df.iloc[spatial_index.within(latitude, longitude, radius_km)]
+
+    positions, distances = spatial_index.nearest(latitude, longitude, k)
+    nearest = df.iloc[positions].assign(**{"Distance (km)": distances})
+
+    return NearbyChargers(within_radius=within_radius, nearest=nearest)
+
+
+def _normalise_postcodes(postcodes: pd.Series) -> pd.Series:
+    return postcodes.astype(str).str.upper().str.replace(r"\s+", "", regex=True)
+
+
+def get_postcode_locations(df: pd.DataFrame) -> pd.DataFrame:
+    # mean charger location of every full postcode and of every outward code
+    # (the part before the space), so that "EH1" finds the district
+    data = df[["Postcode", "Latitude", "Longitude"]].dropna()
+
+    # normalised once per distinct postcode rather than once per charger
+    codes, uniques = pd.factorize(data["Postcode"])
+    postcodes = _normalise_postcodes(pd.Series(uniques))
+
+    # the inward code of a full postcode is always three characters long
+    outward = postcodes.where(postcodes.str.len() < 5, postcodes.str[:-3])
+
+    coordinates = data[["Latitude", "Longitude"]]
+    locations = pd.concat(
+        [
+            coordinates.groupby(postcodes.to_numpy()[codes]).mean(),
+            coordinates.groupby(outward.to_numpy()[codes]).mean(),
+        ]
+    )
+
+    return locations[~locations.index.duplicated()]
+
+
+def locate_postcode(
+    postcode_locations: pd.DataFrame, postcode: str
+) -> tuple[float, float] | None:
+    key = _normalise_postcodes(pd.Series([postcode])).iloc[0]
+    if not key:
+        return None
+
+    for candidate in [key, key[:-3]]:
+        if candidate in postcode_locations.index:
+            latitude, longitude = postcode_locations.loc[candidate]
+            return float(latitude), float(longitude)
+
+    return None
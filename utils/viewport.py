@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import json
+import threading
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from .definitions import Definition
+from .filters import FilterIndex, Filters
+from .plotter import get_tooltips
+
+if TYPE_CHECKING:
+    from starlette.requests import Request
+    from starlette.responses import Response
+    from starlette.routing import Route
+
+# leaflet tiles are 256 px wide, so a zoom level has 256 / CLUSTER_CELL_PX
+# cells per tile along each axis
+_CELL_BITS = int(np.log2(256 // Definition.CLUSTER_CELL_PX))
+
+
+def _to_mercator(
+    latitude: np.ndarray, longitude: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    # web mercator coordinates scaled to [0, 1), as leaflet projects the map
+    lat = np.radians(np.clip(latitude, -85.0511, 85.0511))
+    x = (longitude + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0
+
+    return np.clip(x, 0.0, 1.0 - 1e-12), np.clip(y, 0.0, 1.0 - 1e-12)
+
+
+class ViewportIndex:
+    # answers map viewport requests from a grid of cells per zoom level, with
+    # the charger count and mean location of every cell of every county
+    # aggregated once per zoom level on first use. cells in view are sent as
+    # clusters until few enough chargers are in view to send them one by one,
+    # so the payload is bounded by the size of the viewport and not the county
+
+    def __init__(self, df: pd.DataFrame, county_index: dict[str, np.ndarray]):
+        self._df = df
+        self._latitude = df["Latitude"].to_numpy(dtype=float)
+        self._longitude = df["Longitude"].to_numpy(dtype=float)
+        self._x, self._y = _to_mercator(self._latitude, self._longitude)
+
+        self._county_index = county_index
+        self._county_codes = {county: code for code, county in enumerate(county_index)}
+        self._county = np.full(df.shape[0], -1, dtype=np.int32)
+        for county, positions in county_index.items():
+            self._county[positions] = self._county_codes[county]
+
+        self._cells: dict[int, dict[str, np.ndarray]] = {}
+        self._tooltips: dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        # the projected chargers and the cells of every zoom level, see
+        # from_arrays
+        arrays = dict(
+            latitude=self._latitude,
+            longitude=self._longitude,
+            x=self._x,
+            y=self._y,
+            county=self._county,
+        )
+        for zoom in range(Definition.MAX_CLUSTER_ZOOM + 1):
+            for column, values in self._get_cells(zoom).items():
+                arrays[f"cells-{zoom}-{column}"] = values
+
+        return arrays
+
+    @classmethod
+    def from_arrays(
+        cls,
+        df: pd.DataFrame,
+        county_index: dict[str, np.ndarray],
+        arrays: dict[str, np.ndarray],
+    ) -> ViewportIndex:
+        # the index to_arrays was called on, over arrays that may be memory
+        # mapped. only the tooltips are still built per county on first use
+        index = cls.__new__(cls)
+        index._df = df
+        index._latitude = arrays["latitude"]
+        index._longitude = arrays["longitude"]
+        index._x = arrays["x"]
+        index._y = arrays["y"]
+        index._county_index = county_index
+        index._county_codes = {county: code for code, county in enumerate(county_index)}
+        index._county = arrays["county"]
+        index._cells = {
+            zoom: {
+                column: arrays[f"cells-{zoom}-{column}"]
+                for column in [
+                    "county",
+                    "cell",
+                    "count",
+                    "latitude",
+                    "longitude",
+                    "position",
+                ]
+            }
+            for zoom in range(Definition.MAX_CLUSTER_ZOOM + 1)
+        }
+        index._tooltips = {}
+        index._lock = threading.Lock()
+
+        return index
+
+    def _get_cells(self, zoom: int) -> dict[str, np.ndarray]:
+        cells = self._cells.get(zoom)
+        if cells is None:
+            with self._lock:
+                cells = self._cells.get(zoom)
+                if cells is None:
+                    cells = self._aggregate(zoom, np.arange(self._county.shape[0]))
+                    self._cells[zoom] = cells
+
+        return cells
+
+    def _aggregate(self, zoom: int, positions: np.ndarray) -> dict[str, np.ndarray]:
+        n_cells = 2 ** (zoom + _CELL_BITS)
+        cell = (self._x[positions] * n_cells).astype(np.int64) * n_cells + (
+            self._y[positions] * n_cells
+        ).astype(np.int64)
+
+        # sorted by county, so that a county is one contiguous slice
+        cells = (
+            pd.DataFrame(
+                {
+                    "county": self._county[positions],
+                    "cell": cell,
+                    "latitude": self._latitude[positions],
+                    "longitude": self._longitude[positions],
+                    "position": positions,
+                }
+            )
+            .groupby(["county", "cell"], sort=True)
+            .agg(
+                count=("position", "size"),
+                latitude=("latitude", "mean"),
+                longitude=("longitude", "mean"),
+                position=("position", "first"),
+            )
+            .reset_index()
+        )
+
+        return {column: cells[column].to_numpy() for column in cells.columns}
+
+    def _get_tooltips(self, county: str) -> np.ndarray:
+        # built for a whole county at once, which costs about as much as
+        # building them for a handful of chargers
+        tooltips = self._tooltips.get(county)
+        if tooltips is None:
+            with self._lock:
+                tooltips = self._tooltips.get(county)
+                if tooltips is None:
+                    tooltips = get_tooltips(
+                        self._df.iloc[self._county_index[county]]
+                    ).to_numpy()
+                    self._tooltips[county] = tooltips
+
+        return tooltips
+
+    def _points(self, county: str, positions: np.ndarray) -> list[dict]:
+        # positions of chargers in the county, in the order of the county index
+        county_positions = self._county_index[county]
+        tooltips = self._get_tooltips(county)[
+            np.searchsorted(county_positions, positions)
+        ]
+
+        return [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                "properties": {"tooltip": tooltip},
+            }
+            for lat, lon, tooltip in zip(
+                self._latitude[positions].tolist(),
+                self._longitude[positions].tolist(),
+                tooltips.tolist(),
+            )
+        ]
+
+    def query(
+        self,
+        county: str,
+        south: float,
+        west: float,
+        north: float,
+        east: float,
+        zoom: int,
+        positions: np.ndarray | None = None,
+    ) -> dict:
+        # positions restricts the query to some of the chargers, see FilterIndex
+        if county not in self._county_index:
+            return {"type": "FeatureCollection", "features": []}
+
+        zoom = int(np.clip(zoom, 0, Definition.MAX_CLUSTER_ZOOM))
+        county_positions = self._county_index[county]
+        if positions is None:
+            cells = self._get_cells(zoom)
+        else:
+            # at most a county of chargers, clustered on every request
+            county_positions = np.intersect1d(county_positions, positions)
+            cells = self._aggregate(zoom, county_positions)
+        code = self._county_codes[county]
+        start, stop = np.searchsorted(cells["county"], [code, code + 1])
+
+        latitude = cells["latitude"][start:stop]
+        longitude = cells["longitude"][start:stop]
+        in_view = np.flatnonzero(
+            (latitude >= south)
+            & (latitude <= north)
+            & (longitude >= west)
+            & (longitude <= east)
+        )
+        counts = cells["count"][start:stop][in_view]
+
+        if counts.sum() <= Definition.VIEWPORT_MAX_POINTS:
+            point_latitude = self._latitude[county_positions]
+            point_longitude = self._longitude[county_positions]
+            positions = county_positions[
+                (point_latitude >= south)
+                & (point_latitude <= north)
+                & (point_longitude >= west)
+                & (point_longitude <= east)
+            ]
+            # the cells are placed at the mean of their chargers, a few more
+            # chargers than counted can be in view
+            if positions.shape[0] <= Definition.VIEWPORT_MAX_POINTS:
+                return {
+                    "type": "FeatureCollection",
+                    "features": self._points(county, positions),
+                }
+
+        # cells with a single charger are sent as that charger. too many
+        # chargers in view at MAX_CLUSTER_ZOOM stay clustered, so that every
+        # one of them is counted
+        clusters = in_view[counts > 1]
+        single = in_view[counts == 1]
+
+        return {
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                    "properties": {"count": count},
+                }
+                for lat, lon, count in zip(
+                    latitude[clusters].tolist(),
+                    longitude[clusters].tolist(),
+                    counts[counts > 1].tolist(),
+                )
+            ]
+            + self._points(county, cells["position"][start:stop][single]),
+        }
+
+
+def _parse_filters(text: str) -> Filters:
+    filters = json.loads(text)
+    if not isinstance(filters, dict) or not all(
+        attribute in Definition.FILTER_ATTRIBUTES
+        and isinstance(values, list)
+        and all(isinstance(value, str) for value in values)
+        for attribute, values in filters.items()
+    ):
+        raise ValueError(f"invalid filters: {text}")
+
+    return filters
+
+
+def get_viewport_route(
+    viewport_index: ViewportIndex, filter_index: FilterIndex | None = None
+) -> Route:
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    # a sync endpoint, so starlette runs the query in its thread pool
+    def viewport_endpoint(request: Request) -> Response:
+        params = request.query_params
+        try:
+            bounds = [float(params[key]) for key in ["south", "west", "north", "east"]]
+            zoom = int(params["zoom"])
+            county = params["county"]
+            filters = (
+                _parse_filters(params["filters"])
+                if "filters" in params and filter_index is not None
+                else {}
+            )
+        except (KeyError, ValueError):
+            return JSONResponse(
+                {"error": "county, south, west, north, east and zoom are required"},
+                status_code=400,
+            )
+
+        positions = (
+            filter_index.positions(filter_index.select(filters)) if filters else None
+        )
+
+        return JSONResponse(
+            viewport_index.query(county, *bounds, zoom=zoom, positions=positions)
+        )
+
+    return Route(Definition.VIEWPORT_ROUTE, viewport_endpoint)